@@ -42,9 +42,41 @@ def create_app():
     app.config["GOOGLE_CLIENT_SECRET"] = os.getenv("GOOGLE_CLIENT_SECRET", "")
     app.config["GOOGLE_PHOTOS_PICKER_API_KEY"] = os.getenv("GOOGLE_PHOTOS_PICKER_API_KEY", "")
 
+    # ``parquet`` (default when pyarrow is installed), ``arrow``, ``csv`` or
+    # ``sqlite`` (which also stores the trips)
+    app.config["TIMELINE_STORAGE"] = os.getenv("TIMELINE_STORAGE", "")
+
+    # Seconds between background flushes of timeline and trip edits; 0 (the
+    # default) writes every edit before the request returns.
+    flush_interval = os.getenv("PERSISTENCE_FLUSH_INTERVAL")
+    try:
+        interval = float(flush_interval) if flush_interval else 0.0
+        if interval < 0:
+            interval = 0.0
+    except (TypeError, ValueError):
+        interval = 0.0
+    app.config["PERSISTENCE_FLUSH_INTERVAL"] = interval
+
+    # Several worker processes (e.g. gunicorn -w 4) sharing one data directory
+    app.config["SHARED_STATE"] = _as_bool(os.getenv("SHARED_STATE"))
+
     # Load cached timeline data once during application startup
+    timeline_storage = data_cache.configure_storage(app.config["TIMELINE_STORAGE"])
+    # The SQLite backend keeps trips in the same database
+    trip_store.configure_database(getattr(timeline_storage, "database", None))
+    shared_state = data_cache.configure_shared_state(app.config["SHARED_STATE"])
+    trip_store.configure_shared_state(app.config["SHARED_STATE"])
     data_cache.load_timeline_data()
     trip_store.load_trips()
+    data_cache.configure_write_behind(app.config["PERSISTENCE_FLUSH_INTERVAL"])
+    trip_store.configure_write_behind(app.config["PERSISTENCE_FLUSH_INTERVAL"])
+
+    if shared_state:
+        @app.before_request
+        def _refresh_shared_state():
+            # Pick up changes saved by other workers before serving a request
+            data_cache.refresh_shared_state()
+            trip_store.refresh_shared_state()
 
     from .routes import main
     app.register_blueprint(main)
@@ -0,0 +1,113 @@
+"""Bounded log of the keys changed after each data version.
+
+:mod:`app.data_cache` and :mod:`app.trip_store` raise a ``data_version``
+after every mutation.  A :class:`ChangeLog` remembers which keys (place IDs)
+were changed while each of the recent versions was current, so a client
+that last synchronised at some version can be sent only what changed since,
+instead of everything.
+
+Readers capture the version before reading the data, so a client holding
+version ``v`` may or may not have seen the changes made while ``v`` was
+current; they are included in its answer.  Changes that cannot be described
+key by key (whole-frame replacements) are recorded as resets, and old
+entries are dropped once ``max_entries`` is reached: clients asking about
+such versions are told to reload everything.
+
+The log is not thread-safe; its owner calls it while holding its own
+mutation lock.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Hashable, Iterable, Optional, Set, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+
+# Larger change sets are cheaper to answer with a full reload.
+DEFAULT_MAX_KEYS = 10000
+
+
+class ChangeLog:
+    """Keys changed per data version, for the last ``max_entries`` versions."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_keys: int = DEFAULT_MAX_KEYS):
+        self.max_keys = max(1, int(max_keys))
+        self._entries: Deque[Tuple[int, frozenset]] = deque(maxlen=max(1, int(max_entries)))
+        # Clients at or below ``_floor`` must reload everything.
+        self._floor = -1
+        self._pending_version: Optional[int] = None
+        self._pending: Set[Hashable] = set()
+
+    def note(self, version: int, keys: Iterable[Hashable]) -> None:
+        """Record that ``keys`` changed while ``version`` was current."""
+
+        if version <= self._floor:
+            return
+        if version != self._pending_version:
+            self._seal()
+            self._pending_version = version
+        self._pending.update(keys)
+        if len(self._pending) > self.max_keys:
+            self.note_reset(version)
+
+    def note_reset(self, version: int) -> None:
+        """Record a change made at ``version`` that has no key by key form."""
+
+        self._floor = max(self._floor, version)
+        if self._pending_version is not None and self._pending_version <= self._floor:
+            self._pending_version = None
+            self._pending = set()
+
+    def defer(self, first: int, version: int) -> None:
+        """Attribute the changes noted at ``first`` or later to ``version``.
+
+        Used when the data version jumps (for example to the shared version
+        of another worker process): clients at any version before the jump
+        may be missing those changes.
+        """
+
+        if self._floor >= first:
+            self._floor = max(self._floor, version)
+        merged: Set[Hashable] = set()
+        while self._entries and self._entries[-1][0] >= first:
+            merged |= self._entries.pop()[1]
+        if self._pending_version is not None and self._pending_version >= first:
+            merged |= self._pending
+            self._pending_version = None
+            self._pending = set()
+        if merged and version > self._floor:
+            self._seal()
+            self._pending_version = version
+            self._pending = merged
+
+    def _seal(self) -> None:
+        if self._pending_version is None:
+            return
+        if self._pending:
+            if len(self._entries) == self._entries.maxlen:
+                self._floor = max(self._floor, self._entries[0][0])
+            self._entries.append((self._pending_version, frozenset(self._pending)))
+        self._pending_version = None
+        self._pending = set()
+
+    def since(self, version: int, current: int) -> Optional[Set[Hashable]]:
+        """Return the keys changed since ``version``.
+
+        ``current`` is the owner's data version now.  Returns ``None`` when
+        the changes cannot be listed: ``version`` is unknown or too old, or
+        a reset happened since.
+        """
+
+        self._seal()
+        if version > current or version <= self._floor:
+            return None
+
+        changed: Set[Hashable] = set()
+        for entry_version, keys in reversed(self._entries):
+            if entry_version < version:
+                break
+            changed |= keys
+            if len(changed) > self.max_keys:
+                return None
+        return changed
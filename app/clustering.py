@@ -0,0 +1,299 @@
+"""Server-side marker clustering for low zoom levels.
+
+:class:`ClusterIndex` pre-aggregates the visible (non-archived) markers into
+a grid per zoom level: at zoom ``z`` the world is divided into cells of
+``radius`` pixels of a ``tile_size`` pixel Web Mercator tile, and each cell
+keeps its point count and the sum of its points' projected coordinates.
+
+The index listens to :func:`app.data_cache.add_change_listener` and folds
+added, deleted and (un)archived markers into the affected cells through a
+small per-level dictionary of deltas, merged into the sorted cell arrays
+once it grows past ``fold_threshold`` entries.  Whole-frame replacements
+mark the index stale and it is rebuilt on the next query.  At deeper zooms
+:func:`cluster_points` groups the markers returned by the spatial index on
+the fly.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .spatial_index import BoundingBox, MAX_MERCATOR_LATITUDE
+
+# Matches ``MAPBOX_CLUSTER_RADIUS`` and the 512 pixel tiles used by Mapbox GL.
+DEFAULT_RADIUS_PIXELS = 70
+DEFAULT_TILE_SIZE = 512
+
+# Zoom levels kept pre-aggregated; deeper zooms are clustered per request.
+PRECLUSTER_MAX_ZOOM = 10
+
+DEFAULT_FOLD_THRESHOLD = 1024
+
+
+def project(latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+    """Return Web Mercator ``x``/``y`` in ``[0, 1]`` for the given degrees."""
+
+    latitudes = np.clip(np.asarray(latitudes, dtype="float64"), -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE)
+    longitudes = np.asarray(longitudes, dtype="float64")
+    x = (longitudes + 180.0) / 360.0
+    sine = np.sin(np.radians(latitudes))
+    y = 0.5 - 0.25 * np.log((1.0 + sine) / (1.0 - sine)) / math.pi
+    return np.clip(x, 0.0, 1.0), np.clip(y, 0.0, 1.0)
+
+
+def unproject(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of :func:`project`; returns ``(latitudes, longitudes)``."""
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    latitudes = np.degrees(np.arctan(np.sinh(math.pi * (1.0 - 2.0 * y))))
+    return latitudes, x * 360.0 - 180.0
+
+
+def visible_points(rows: Optional[pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return positions, ``x`` and ``y`` of the rows shown on the map.
+
+    Archived rows and rows without valid coordinates are skipped; positions
+    are relative to ``rows``.
+    """
+
+    if rows is None or rows.empty or "Latitude" not in rows.columns or "Longitude" not in rows.columns:
+        empty = np.empty(0, dtype="float64")
+        return np.empty(0, dtype=np.int64), empty, empty
+
+    latitudes = rows["Latitude"].to_numpy(dtype="float64", copy=False)
+    longitudes = rows["Longitude"].to_numpy(dtype="float64", copy=False)
+    with np.errstate(invalid="ignore"):
+        keep = (
+            np.isfinite(latitudes)
+            & np.isfinite(longitudes)
+            & (np.abs(latitudes) <= 90.0)
+            & (np.abs(longitudes) <= 180.0)
+        )
+    if "Archived" in rows.columns:
+        keep &= ~rows["Archived"].to_numpy(dtype=bool)
+    positions = np.flatnonzero(keep)
+    x, y = project(latitudes[positions], longitudes[positions])
+    return positions, x, y
+
+
+def _aggregate(keys: np.ndarray, counts: np.ndarray, sum_x: np.ndarray, sum_y: np.ndarray):
+    """Sum ``counts``/``sum_x``/``sum_y`` per key; drops empty cells."""
+
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=counts, minlength=len(unique))
+    sum_x = np.bincount(inverse, weights=sum_x, minlength=len(unique))
+    sum_y = np.bincount(inverse, weights=sum_y, minlength=len(unique))
+    keep = counts > 0.5
+    return unique[keep], np.rint(counts[keep]).astype(np.int64), sum_x[keep], sum_y[keep]
+
+
+class _Grid:
+    """Cell geometry of one zoom level."""
+
+    def __init__(self, zoom: int, radius: float, tile_size: int):
+        self.zoom = zoom
+        self.size = max(1, int(math.ceil(tile_size * (1 << zoom) / radius)))
+
+    def keys(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        columns = np.minimum((x * self.size).astype(np.int64), self.size - 1)
+        rows = np.minimum((y * self.size).astype(np.int64), self.size - 1)
+        return rows * self.size + columns
+
+    def key_ranges(self, bbox: BoundingBox) -> List[Tuple[int, int, int, int]]:
+        """Return ``(first_row, last_row, first_column, last_column)`` ranges."""
+
+        west, south, east, north = bbox
+        (left, right), (top, bottom) = project([north, south], [west, east])
+        first_row = min(int(top * self.size), self.size - 1)
+        last_row = min(int(bottom * self.size), self.size - 1)
+        first_column = min(int(left * self.size), self.size - 1)
+        last_column = min(int(right * self.size), self.size - 1)
+        if west > east:
+            return [
+                (first_row, last_row, first_column, self.size - 1),
+                (first_row, last_row, 0, last_column),
+            ]
+        return [(first_row, last_row, first_column, last_column)]
+
+    def contains(self, key: int, bbox_ranges) -> bool:
+        row, column = divmod(key, self.size)
+        return any(
+            first_row <= row <= last_row and first_column <= column <= last_column
+            for first_row, last_row, first_column, last_column in bbox_ranges
+        )
+
+
+class _Level:
+    """Aggregated cells of one zoom level plus pending deltas."""
+
+    def __init__(self, grid: _Grid, x: np.ndarray, y: np.ndarray):
+        self.grid = grid
+        ones = np.ones(len(x))
+        self.keys, self.counts, self.sum_x, self.sum_y = _aggregate(grid.keys(x, y), ones, x, y)
+        self.deltas: Dict[int, List[float]] = {}
+
+    def update(self, x: np.ndarray, y: np.ndarray, sign: int) -> None:
+        for key, point_x, point_y in zip(self.grid.keys(x, y).tolist(), x.tolist(), y.tolist()):
+            delta = self.deltas.get(key)
+            if delta is None:
+                self.deltas[key] = [sign, sign * point_x, sign * point_y]
+            else:
+                delta[0] += sign
+                delta[1] += sign * point_x
+                delta[2] += sign * point_y
+
+    def fold(self) -> None:
+        """Merge the pending deltas into the cell arrays."""
+
+        if not self.deltas:
+            return
+        keys = np.fromiter(self.deltas.keys(), dtype=np.int64, count=len(self.deltas))
+        values = np.array(list(self.deltas.values()), dtype="float64").reshape(-1, 3)
+        self.keys, self.counts, self.sum_x, self.sum_y = _aggregate(
+            np.concatenate([self.keys, keys]),
+            np.concatenate([self.counts, values[:, 0]]),
+            np.concatenate([self.sum_x, values[:, 1]]),
+            np.concatenate([self.sum_y, values[:, 2]]),
+        )
+        self.deltas = {}
+
+    def cells(self, bbox: BoundingBox):
+        """Return ``(counts, sum_x, sum_y)`` of the cells overlapping ``bbox``."""
+
+        ranges = self.grid.key_ranges(bbox)
+        selections = []
+        for first_row, last_row, first_column, last_column in ranges:
+            rows = np.arange(first_row, last_row + 1, dtype=np.int64) * self.grid.size
+            starts = np.searchsorted(self.keys, rows + first_column, side="left")
+            ends = np.searchsorted(self.keys, rows + last_column, side="right")
+            selections.extend(np.arange(start, end) for start, end in zip(starts, ends) if end > start)
+        selected = np.concatenate(selections) if selections else np.empty(0, dtype=np.int64)
+
+        keys = self.keys[selected]
+        counts = self.counts[selected].astype("float64")
+        sum_x = self.sum_x[selected]
+        sum_y = self.sum_y[selected]
+
+        pending = [
+            (key, delta) for key, delta in self.deltas.items() if self.grid.contains(key, ranges)
+        ]
+        if pending:
+            values = np.array([delta for _, delta in pending], dtype="float64").reshape(-1, 3)
+            keys, counts, sum_x, sum_y = _aggregate(
+                np.concatenate([keys, np.array([key for key, _ in pending], dtype=np.int64)]),
+                np.concatenate([counts, values[:, 0]]),
+                np.concatenate([sum_x, values[:, 1]]),
+                np.concatenate([sum_y, values[:, 2]]),
+            )
+        return counts, sum_x, sum_y
+
+
+def cluster_points(
+    x: np.ndarray,
+    y: np.ndarray,
+    zoom: int,
+    radius: float = DEFAULT_RADIUS_PIXELS,
+    tile_size: int = DEFAULT_TILE_SIZE,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group projected points into the grid cells of ``zoom``.
+
+    Returns ``(latitudes, longitudes, counts)`` of the resulting clusters,
+    like :meth:`ClusterIndex.clusters`.
+    """
+
+    grid = _Grid(zoom, radius, tile_size)
+    _, counts, sum_x, sum_y = _aggregate(grid.keys(x, y), np.ones(len(x)), x, y)
+    latitudes, longitudes = unproject(sum_x / counts, sum_y / counts)
+    return latitudes, longitudes, counts
+
+
+class ClusterIndex:
+    """Pre-aggregated clusters for zoom levels ``0`` to ``max_zoom``.
+
+    ``load_frame`` returns the current timeline frame; it is called to
+    (re)build the index lazily.  Register :meth:`apply_change` as a
+    timeline change listener to keep the index up to date.
+    """
+
+    def __init__(
+        self,
+        load_frame: Callable[[], Optional[pd.DataFrame]],
+        *,
+        radius: float = DEFAULT_RADIUS_PIXELS,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        max_zoom: int = PRECLUSTER_MAX_ZOOM,
+        fold_threshold: int = DEFAULT_FOLD_THRESHOLD,
+    ):
+        self.radius = radius
+        self.tile_size = tile_size
+        self.max_zoom = max_zoom
+        self.fold_threshold = fold_threshold
+        self._load_frame = load_frame
+        self._lock = threading.Lock()
+        self._levels: Optional[List[_Level]] = None
+        # Frame the levels currently describe; changes must continue from it.
+        self._frame = None
+
+    def _build(self, frame) -> List[_Level]:
+        _, x, y = visible_points(frame)
+        return [
+            _Level(_Grid(zoom, self.radius, self.tile_size), x, y)
+            for zoom in range(self.max_zoom + 1)
+        ]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._levels = None
+            self._frame = None
+
+    def apply_change(self, change: dict) -> None:
+        """Fold a timeline change (see :func:`app.data_cache.add_change_listener`)."""
+
+        with self._lock:
+            if self._levels is None:
+                return
+            if change.get("op") == "reset" or change.get("previous") is not self._frame:
+                # A wholesale replacement, or a change this index missed.
+                self._levels = None
+                self._frame = None
+                return
+
+            self._frame = change.get("frame")
+            if change["op"] not in ("add", "delete", "archive"):
+                return
+            for rows, sign in ((change.get("before"), -1), (change.get("after"), 1)):
+                _, x, y = visible_points(rows)
+                if not len(x):
+                    continue
+                for level in self._levels:
+                    level.update(x, y, sign)
+                    if len(level.deltas) > self.fold_threshold:
+                        level.fold()
+
+    def clusters(self, bbox: BoundingBox, zoom: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return ``(latitudes, longitudes, counts)`` of the clusters in ``bbox``.
+
+        ``zoom`` must not exceed ``max_zoom``.  Clusters are listed by cell,
+        north to south.
+        """
+
+        # Loaded without ``_lock``: loading may take the timeline's mutation
+        # lock, which writers hold while calling :meth:`apply_change`.
+        frame = self._load_frame()
+        with self._lock:
+            levels = self._levels if self._frame is frame else None
+        if levels is None:
+            levels = self._build(frame)
+            with self._lock:
+                if self._levels is None:
+                    self._levels, self._frame = levels, frame
+        with self._lock:
+            counts, sum_x, sum_y = levels[zoom].cells(bbox)
+        latitudes, longitudes = unproject(sum_x / counts, sum_y / counts)
+        return latitudes, longitudes, np.rint(counts).astype(np.int64)
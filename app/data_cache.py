@@ -1,88 +1,1174 @@
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
-# Path to the master timeline CSV
-CSV_PATH = os.path.join('data', 'master_timeline_data.csv')
+from .change_log import ChangeLog
+from .durable_io import atomic_write
+from .shared_state import SharedStamp, is_shared_state_available
+from .spatial_index import GridIndex
+from .timeline_journal import TimelineJournal
+from .timeline_schema import apply_schema, conform_rows, widen_categories
+from .timeline_storage import (
+    STORAGE_BACKENDS,
+    CsvTimelineStorage,
+    TimelineStorage,
+    create_storage,
+    is_columnar_storage_available,
+)
+from .write_behind import WriteBehindFlusher
+
+# Base path (without extension) of the stored master timeline
+STORAGE_BASE_PATH = os.path.join('data', 'master_timeline_data')
+# Path to the master timeline CSV (legacy storage and export target)
+CSV_PATH = STORAGE_BASE_PATH + CsvTimelineStorage.extension
 BACKUP_TEMPLATE = os.path.join('data', 'master_timeline_data_backup_{timestamp}.csv')
+# Append-only log of mutations applied since the last snapshot was written
+JOURNAL_PATH = STORAGE_BASE_PATH + '.journal'
+# Number of journal records that triggers a background compaction
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Columns edited by users that imports must never overwrite.
+MERGE_PRESERVED_COLUMNS = ('Alias', 'Description', 'Archived')
 
 # Cached pandas DataFrame
 timeline_df = None
 
+# Monotonically increasing counter bumped whenever ``timeline_df`` changes.
+# Response caches key on it (see ``routes.api_map_data``).
+data_version = 0
 
-def ensure_archived_column():
-    """Ensure the cached dataframe has the required maintenance columns.
+# Backend used to persist ``timeline_df``; see :func:`configure_storage`
+storage: TimelineStorage | None = None
 
-    The timeline data historically did not include management columns such as
-    ``Archived`` or the newly added ``Alias`` field.  This helper normalises
-    the dataframe so the rest of the codebase can rely on those columns being
-    present with sensible default values.
+journal = TimelineJournal(JOURNAL_PATH)
+
+# ``_mutation_lock`` guards in-memory changes together with their journal
+# record.  ``_snapshot_lock`` serialises (slow) snapshot writes so a stale
+# background compaction can never overwrite a newer full save.
+_mutation_lock = threading.RLock()
+_snapshot_lock = threading.Lock()
+_compaction_thread = None
+
+# Consistent view of ``timeline_df`` and its ``Place ID`` index, replaced
+# wholesale by every mutation (see :class:`TimelineSnapshot`).
+_snapshot = None
+
+# Frame that :func:`ensure_archived_column` last converted to the schema
+_schema_df = None
+
+# Viewport index over the coordinates of the latest snapshot (see
+# :func:`spatial_index`), reused while the coordinates stay the same.
+_spatial_index: GridIndex | None = None
+_spatial_lock = threading.Lock()
+
+# Callables notified of every published change (see add_change_listener).
+_change_listeners: list = []
+
+# Place IDs changed per data version (see changed_place_ids_since).
+_change_log = ChangeLog()
+
+# Optional write-behind mode (see :func:`configure_write_behind`): journal
+# records of applied mutations waiting for the background flusher.
+_write_behind: WriteBehindFlusher | None = None
+_pending_records: list = []
+
+# Multi-process mode (see :func:`configure_shared_state`) and the on-disk
+# state this process last caught up with: shared version, identity of the
+# snapshot file and position in the journal.
+_shared: SharedStamp | None = None
+_synced_stamp = 0
+_synced_snapshot = None
+_journal_position = (None, 0)
+
+
+def configure_storage(backend: str | None = None) -> TimelineStorage:
+    """Select the storage backend used by load/save operations.
+
+    ``backend`` is one of ``"parquet"``, ``"arrow"``, ``"csv"`` or
+    ``"sqlite"``.  When it is omitted the columnar Parquet backend is used if
+    ``pyarrow`` is available.
     """
 
-    global timeline_df
+    global storage
 
-    if timeline_df is None:
-        return
+    storage = create_storage(backend, STORAGE_BASE_PATH)
+    return storage
 
-    if "Archived" not in timeline_df.columns:
-        timeline_df["Archived"] = False
-    else:
-        timeline_df["Archived"] = timeline_df["Archived"].fillna(False)
 
-    if "Alias" not in timeline_df.columns:
-        timeline_df["Alias"] = ""
+def configure_write_behind(interval: float | None) -> None:
+    """Batch journal writes and flush them at most once per ``interval``.
+
+    Mutations are applied in memory immediately, but their journal records
+    are only written (with a single fsync) by a background flusher.  Edits
+    acknowledged less than ``interval`` seconds before a crash are lost.
+    ``None`` or ``0`` restores the default of fsyncing every mutation before
+    it is acknowledged.  Pending records are flushed at interpreter exit.
+    """
+
+    global _write_behind
+
+    if _write_behind is not None:
+        _write_behind.stop()
+        _write_behind = None
+
+    if interval and interval > 0 and _shared is not None:
+        print("Timeline write-behind is unavailable in shared state mode")
+    elif interval and interval > 0:
+        _write_behind = WriteBehindFlusher('timeline', _flush_pending_records, interval)
+        _write_behind.start()
+        print(f"Timeline write-behind enabled (flush interval {interval:g}s)")
+
+
+def flush_pending_mutations() -> int:
+    """Write buffered journal records now.  Returns the mutations flushed."""
+
+    if _write_behind is None:
+        return 0
+    return _write_behind.flush()
+
+
+def write_behind_metrics() -> dict:
+    """Return pending mutation and flush lag figures for the timeline."""
+
+    if _write_behind is None:
+        return {'enabled': False, 'pending_mutations': 0, 'flush_lag_seconds': 0.0}
+    return _write_behind.metrics()
+
+
+def _flush_pending_records() -> None:
+    # ``_snapshot_lock`` keeps a full save (which folds the pending records
+    # into the snapshot and resets the journal) from running between taking
+    # the records and appending them, which would replay stale edits on top
+    # of the newer snapshot at the next start.
+    with _snapshot_lock:
+        with _mutation_lock:
+            records = list(_pending_records)
+            _pending_records.clear()
+
+        try:
+            journal.append_many(records)
+        except Exception:
+            with _mutation_lock:
+                _pending_records[:0] = records
+            raise
+
+    if journal.record_count >= JOURNAL_COMPACT_THRESHOLD:
+        schedule_compaction()
+
+
+def configure_shared_state(enabled: bool) -> bool:
+    """Keep the timeline consistent across several worker processes.
+
+    Writers take a cross-process lock, catch up with changes other workers
+    made and raise the shared version afterwards; readers call
+    :func:`refresh_shared_state` (once per request) to apply changes made
+    elsewhere.  Returns ``True`` when the mode is active.
+    """
+
+    global _shared
+
+    _shared = None
+    if not enabled:
+        return False
+    if not is_shared_state_available():
+        print("Shared state mode requires fcntl; running single-process.")
+        return False
+    _shared = SharedStamp(STORAGE_BASE_PATH)
+    return True
+
+
+def _snapshot_identity():
+    return _get_storage().identity()
+
+
+def _reload_from_disk() -> None:
+    """Replace the cached timeline with the snapshot plus its journal."""
+
+    active_storage = _get_storage()
+    df = active_storage.load() if active_storage.exists() else None
+    if df is not None:
+        df = df.reset_index(drop=True)
+        apply_schema(df)
+    _publish(df)
+    for record in journal.read_all():
+        _apply_mutation(record)
+
+
+def _catch_up() -> bool:
+    """Apply changes written by other processes; caller holds the locks.
+
+    Usually only the journal records appended since the last sync are read.
+    The snapshot is reloaded when another process replaced it.
+    """
+
+    global data_version, _synced_stamp, _synced_snapshot, _journal_position
+
+    stamp = _shared.read()
+    if stamp == _synced_stamp:
+        return False
+
+    first_version = data_version
+    tail = None
+    if _snapshot_identity() == _synced_snapshot:
+        tail = journal.read_since(_journal_position)
+    if tail is None:
+        _reload_from_disk()
+        _synced_snapshot = _snapshot_identity()
+        _journal_position = journal.position()
     else:
-        timeline_df["Alias"] = timeline_df["Alias"].apply(
-            lambda value: "" if pd.isna(value) else str(value)
-        )
+        records, _journal_position = tail
+        for record in records:
+            _apply_mutation(record)
+
+    _synced_stamp = stamp
+    data_version = max(data_version + 1, stamp)
+    # Clients may have synchronised with other workers at any version up
+    # to the new one without these changes.
+    _change_log.defer(first_version, data_version - 1)
+    return True
+
+
+def _record_own_writes() -> None:
+    """Raise the shared version if this process changed the files on disk."""
+
+    global data_version, _synced_stamp, _synced_snapshot, _journal_position
+
+    snapshot_id = _snapshot_identity()
+    position = journal.position()
+    if (snapshot_id, position) != (_synced_snapshot, _journal_position):
+        # Workers compare versions only, so equal versions must mean equal data.
+        stamp = max(data_version, _shared.read() + 1)
+        _shared.write(stamp)
+        _change_log.defer(_synced_stamp, stamp - 1)
+        data_version = stamp
+        _synced_stamp = stamp
+    _synced_snapshot = snapshot_id
+    _journal_position = position
+
+
+@contextmanager
+def _shared_write():
+    """Serialise a change with other worker processes in shared mode.
+
+    Other processes' changes are applied before the block runs and the
+    shared version is raised after it.  Outside shared mode this is a no-op.
+    Lock order: shared lock, ``_snapshot_lock``, ``_mutation_lock``.
+    """
+
+    if _shared is None:
+        yield
+        return
+
+    with _shared.locked() as outermost:
+        if outermost:
+            with _mutation_lock:
+                _catch_up()
+        try:
+            yield
+        finally:
+            if outermost:
+                with _mutation_lock:
+                    _record_own_writes()
+
+
+def refresh_shared_state() -> bool:
+    """Apply timeline changes made by other worker processes.
+
+    Cheap when nothing changed (one small file read).  Returns ``True`` when
+    the cached timeline was updated.
+    """
+
+    if _shared is None or _shared.read() == _synced_stamp:
+        return False
+    with _shared.locked(exclusive=False), _mutation_lock:
+        return _catch_up()
+
+
+def _get_storage() -> TimelineStorage:
+    if storage is None:
+        return configure_storage()
+    return storage
+
+
+def _bump_data_version() -> int:
+    global data_version
+
+    with _mutation_lock:
+        data_version += 1
+        return data_version
+
+
+class TimelineSnapshot:
+    """Immutable view of the timeline together with its ``Place ID`` index.
+
+    Mutations never modify a published frame in place: they build a new
+    frame (sharing unchanged columns) and publish a new snapshot, so request
+    handlers can read a snapshot without locking while writers, serialised
+    by ``_mutation_lock``, prepare the next one.  Callers must treat ``df``
+    as read-only.
+
+    ``place_index`` maps ``Place ID`` to its row position (frames always
+    carry a RangeIndex); IDs occurring on more than one row are additionally
+    listed in ``duplicate_positions``.
+    """
+
+    __slots__ = ('df', 'place_index', 'duplicate_positions')
+
+    def __init__(self, df, place_index: dict, duplicate_positions: dict):
+        self.df = df
+        self.place_index = place_index
+        self.duplicate_positions = duplicate_positions
+
+    @classmethod
+    def build(cls, df) -> 'TimelineSnapshot':
+        """Index ``df``, which must carry a RangeIndex, from scratch."""
+
+        if df is None or df.empty or 'Place ID' not in df.columns:
+            return cls(df, {}, {})
+
+        ids = df['Place ID']
+        place_index = {
+            place_id: position
+            for position, place_id in enumerate(ids.tolist())
+            if isinstance(place_id, str)
+        }
+
+        duplicate_positions: dict = {}
+        duplicated = ids.duplicated(keep=False)
+        if duplicated.any():
+            for position, place_id in zip(duplicated.to_numpy().nonzero()[0], ids[duplicated]):
+                if isinstance(place_id, str):
+                    duplicate_positions.setdefault(place_id, []).append(int(position))
+        return cls(df, place_index, duplicate_positions)
+
+    def with_appended(self, df, start: int, place_ids) -> 'TimelineSnapshot':
+        """Return a snapshot of ``df``, which appends rows from ``start`` on."""
+
+        place_index = dict(self.place_index)
+        duplicate_positions = dict(self.duplicate_positions)
+        for offset, place_id in enumerate(place_ids):
+            if not isinstance(place_id, str):
+                continue
+            position = start + offset
+            if place_id in place_index:
+                existing = duplicate_positions.get(place_id, [place_index[place_id]])
+                duplicate_positions[place_id] = existing + [position]
+            else:
+                place_index[place_id] = position
+        return TimelineSnapshot(df, place_index, duplicate_positions)
+
+    def place_positions(self, place_id) -> list[int]:
+        """Return the row positions holding ``place_id``."""
+
+        if not isinstance(place_id, str):
+            return []
+        duplicates = self.duplicate_positions.get(place_id)
+        if duplicates is not None:
+            return list(duplicates)
+        position = self.place_index.get(place_id)
+        return [] if position is None else [position]
+
+    def places_positions(self, place_ids) -> list[int]:
+        """Return the sorted row positions holding any of ``place_ids``."""
+
+        positions = set()
+        for place_id in place_ids or []:
+            positions.update(self.place_positions(place_id))
+        return sorted(positions)
+
+    def has_place(self, place_id) -> bool:
+        return isinstance(place_id, str) and place_id in self.place_index
+
+    def get_place_row(self, place_id):
+        """Return the first row for ``place_id`` or ``None``."""
+
+        positions = self.place_positions(place_id)
+        if not positions:
+            return None
+        return self.df.iloc[positions[0]]
+
+    def get_place_rows(self, place_ids) -> pd.DataFrame:
+        """Return the rows for ``place_ids`` in timeline order."""
+
+        if self.df is None:
+            return pd.DataFrame()
+        return self.df.iloc[self.places_positions(place_ids)]
+
+
+def add_change_listener(listener) -> None:
+    """Call ``listener(change)`` whenever a new timeline frame is published.
+
+    ``change`` is a dictionary with
 
-    if "Description" not in timeline_df.columns:
-        timeline_df["Description"] = ""
+    ``op``
+        The mutation (``'add'``, ``'delete'``, ``'archive'``, ``'alias'`` or
+        ``'description'``), or ``'reset'`` when the frame was replaced as a
+        whole (loads, imports, merges, snapshots written by other workers).
+    ``before`` / ``after``
+        The affected rows before and after the change, or ``None`` where
+        not applicable (and always for ``'reset'``).
+    ``previous`` / ``frame``
+        The frames published before and after the change, so a listener
+        that missed a change can tell and start over.
+
+    Listeners run while the mutation lock is held: they must be quick and
+    must not modify the timeline.  Exceptions are printed and ignored.
+    """
+
+    with _mutation_lock:
+        if listener not in _change_listeners:
+            _change_listeners.append(listener)
+
+
+def remove_change_listener(listener) -> None:
+    with _mutation_lock:
+        if listener in _change_listeners:
+            _change_listeners.remove(listener)
+
+
+def _publish(df, snapshot: TimelineSnapshot | None = None, change: dict | None = None) -> None:
+    """Make ``df`` the current timeline; caller holds ``_mutation_lock``.
+
+    ``snapshot`` may carry an index already built for ``df``; otherwise the
+    index is rebuilt.  ``change`` describes the mutation for change
+    listeners (see :func:`add_change_listener`); without it they are told
+    the whole frame was reset.
+    """
+
+    global timeline_df, _schema_df, _snapshot
+
+    previous = _snapshot.df if _snapshot is not None else None
+    if snapshot is None or snapshot.df is not df:
+        snapshot = TimelineSnapshot.build(df)
+    timeline_df = df
+    _schema_df = df
+    _snapshot = snapshot
+
+    event = {'op': 'reset', 'before': None, 'after': None}
+    event.update(change or {})
+    if event['op'] == 'reset':
+        _change_log.note_reset(data_version)
     else:
-        def _clean_description(value):
-            if pd.isna(value):
-                return ""
-            text = str(value)
-            return text if text.strip() else ""
-
-        timeline_df["Description"] = timeline_df["Description"].apply(
-            _clean_description
+        for rows in (event['before'], event['after']):
+            if rows is not None and 'Place ID' in rows.columns:
+                _change_log.note(data_version, rows['Place ID'].dropna().astype(str).tolist())
+
+    if not _change_listeners:
+        return
+    event.update(previous=previous, frame=df)
+    for listener in list(_change_listeners):
+        try:
+            listener(event)
+        except Exception as exc:
+            print(f"Timeline change listener {listener!r} failed: {exc}")
+
+
+def changed_place_ids_since(version: int):
+    """Return ``(data_version, place_ids)`` changed after ``version``.
+
+    ``place_ids`` is the set of Place IDs whose rows were added, edited or
+    deleted since ``version``, or ``None`` when that cannot be told (the
+    version is too old or unknown, or the timeline was replaced since) and
+    the caller must reload everything.
+    """
+
+    with _mutation_lock:
+        return data_version, _change_log.since(int(version), data_version)
+
+
+def _rebuild_place_index():
+    """Index and publish the current ``timeline_df`` (after loads or direct
+    assignment)."""
+
+    with _mutation_lock:
+        ensure_archived_column()
+        df = timeline_df
+        if df is not None and not (
+            isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+        ):
+            df = df.reset_index(drop=True)
+        _publish(df)
+
+
+def snapshot() -> TimelineSnapshot:
+    """Return a consistent, read-only view of the current timeline.
+
+    Readers that look rows up by ``Place ID`` should take one snapshot per
+    request and use it throughout instead of re-reading ``timeline_df``.
+    """
+
+    current = _snapshot
+    if current is None or current.df is not timeline_df:
+        # ``timeline_df`` was assigned directly; index it once.
+        _rebuild_place_index()
+        current = _snapshot
+    return current
+
+
+def spatial_index(current: TimelineSnapshot | None = None) -> GridIndex:
+    """Return the coordinate index for ``current`` (default: the latest snapshot).
+
+    The index is built lazily and kept while edits leave the coordinate
+    columns untouched (renames, archiving), so only adding or deleting rows
+    costs a rebuild.
+    """
+
+    global _spatial_index
+
+    if current is None:
+        current = snapshot()
+    index = _spatial_index
+    if index is not None and index.matches(current.df):
+        return index
+    with _spatial_lock:
+        index = _spatial_index
+        if index is None or not index.matches(current.df):
+            index = GridIndex.from_frame(current.df)
+            _spatial_index = index
+    return index
+
+
+def place_positions(place_id) -> list[int]:
+    """Return the row positions in ``timeline_df`` holding ``place_id``."""
+
+    return snapshot().place_positions(place_id)
+
+
+def places_positions(place_ids) -> list[int]:
+    """Return the sorted row positions holding any of ``place_ids``."""
+
+    return snapshot().places_positions(place_ids)
+
+
+def has_place(place_id) -> bool:
+    """Return ``True`` when ``place_id`` exists in ``timeline_df``."""
+
+    return snapshot().has_place(place_id)
+
+
+def get_place_row(place_id):
+    """Return the first timeline row for ``place_id`` or ``None``."""
+
+    return snapshot().get_place_row(place_id)
+
+
+def get_place_rows(place_ids) -> pd.DataFrame:
+    """Return the timeline rows for ``place_ids`` in timeline order."""
+
+    return snapshot().get_place_rows(place_ids)
+
+
+def query_timeline_rows(
+    *,
+    source_types=None,
+    start_date=None,
+    end_date=None,
+    include_archived: bool = True,
+) -> pd.DataFrame | None:
+    """Return candidate rows for a map filter from indexed storage.
+
+    The result holds every row matching the filters in timeline order, and
+    possibly other rows sharing their ``Place ID``, so callers still apply
+    the filters to it.  ``source_types`` of ``None`` matches every type and
+    the dates are inclusive bounds on ``Start Date``.  Returns ``None`` when
+    the storage backend cannot run filter queries; callers then filter the
+    whole frame.
+    """
+
+    active_storage = _get_storage()
+    query_place_ids = getattr(active_storage, 'query_place_ids', None)
+    if query_place_ids is None:
+        return None
+    if source_types is not None and not (
+        isinstance(source_types, (list, tuple))
+        and all(isinstance(value, str) for value in source_types)
+    ):
+        return None
+
+    # Under the lock the stored rows and the snapshot describe the same data.
+    with _mutation_lock:
+        current = snapshot()
+        place_ids = query_place_ids(
+            source_types=source_types,
+            start=start_date,
+            end=end_date,
+            include_archived=include_archived,
         )
+    if place_ids is None or current.df is None:
+        return None
+    return current.get_place_rows(place_ids)
+
+
+def replace_timeline(df) -> None:
+    """Replace ``timeline_df`` wholesale (imports, clearing the map)."""
+
+    with _shared_write(), _mutation_lock:
+        if df is not None:
+            # ``reset_index`` copies, so the caller's frame is left alone and
+            # readers never see the new frame before its schema is applied.
+            df = df.reset_index(drop=True)
+            apply_schema(df)
+        _publish(df)
+        _bump_data_version()
+
+
+def _is_blank(series: pd.Series) -> pd.Series:
+    blank = series.isna()
+    if series.dtype == object:
+        blank |= series.astype(str).str.strip() == ''
+    return blank
+
+
+def _merge_existing_rows(rows: pd.DataFrame, positions: list[int]) -> int:
+    """Fold ``rows`` into the timeline rows at ``positions``.
+
+    ``rows`` must already conform to the schema.  The merge is applied to a
+    copy that replaces the published frame; caller holds the lock.  Returns
+    the number of timeline rows that changed.
+    """
+
+    current = snapshot()
+    df = widen_categories(current.df.copy(), rows)
+    changed = np.zeros(len(positions), dtype=bool)
+    target = np.asarray(positions)
+
+    for column in rows.columns:
+        if column == 'Place ID' or column in MERGE_PRESERVED_COLUMNS:
+            continue
+
+        incoming = rows[column].reset_index(drop=True)
+        if column not in df.columns:
+            df[column] = pd.Series(index=df.index, dtype=incoming.dtype)
+        existing = df[column].iloc[target].reset_index(drop=True)
+
+        usable = ~_is_blank(incoming)
+        if column == 'Start Date':
+            update = usable & (existing.isna() | (incoming < existing))
+        elif column == 'End Date':
+            update = usable & (existing.isna() | (incoming > existing))
+        else:
+            update = usable & _is_blank(existing)
+
+        update = update.to_numpy(dtype=bool)
+        if update.any():
+            df.iloc[target[update], df.columns.get_loc(column)] = incoming[update].to_numpy()
+            changed |= update
+
+    if changed.any():
+        _publish(df, TimelineSnapshot(df, current.place_index, current.duplicate_positions))
+    return int(changed.sum())
+
+
+def fold_repeated_places(rows: pd.DataFrame) -> pd.DataFrame:
+    """Combine the rows of ``rows`` that share a ``Place ID`` into one.
+
+    The combined row keeps the earliest ``Start Date``, the latest
+    ``End Date`` and the first non-missing value of every other column.
+    Rows without a Place ID are left as they are.  The result follows the
+    timeline schema.
+    """
+
+    if rows is None or rows.empty or 'Place ID' not in rows.columns:
+        return rows
+
+    rows = rows.reset_index(drop=True)
+    place_ids = rows['Place ID'].map(lambda value: '' if pd.isna(value) else str(value).strip())
+    rows = apply_schema(rows.assign(**{'Place ID': place_ids}))
+    repeated = (place_ids != '') & place_ids.duplicated(keep=False)
+    if not repeated.any():
+        return rows
+
+    aggregations = {
+        column: 'min' if column == 'Start Date' else 'max' if column == 'End Date' else 'first'
+        for column in rows.columns
+        if column != 'Place ID'
+    }
+    folded = rows[repeated].groupby('Place ID', sort=False).agg(aggregations)
+    # Each folded row takes the position of the place's first row.
+    folded.index = place_ids[repeated].drop_duplicates().index
+    folded.insert(0, 'Place ID', place_ids[folded.index])
+    combined = pd.concat([rows[~repeated], apply_schema(folded[rows.columns])])
+    return combined.sort_index().reset_index(drop=True)
+
+
+def merge_timeline_rows(rows: pd.DataFrame) -> dict:
+    """Merge imported ``rows`` into the timeline keyed on ``Place ID``.
+
+    Rows for unknown places are appended.  For places that already exist,
+    user edits (``Alias``, ``Description``, ``Archived``) are never
+    overwritten, blank fields are filled from the import, ``Start Date``
+    keeps the earliest and ``End Date`` the latest value.  Rows repeating a
+    Place ID within the import are first combined the same way (see
+    :func:`fold_repeated_places`) and count as skipped, as do rows without
+    a Place ID or bringing nothing new.  The merged timeline is persisted
+    when anything changed.
+
+    Returns a dictionary with ``inserted``, ``updated`` and ``skipped``
+    counts.
+    """
+
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    if rows is None or rows.empty:
+        return counts
+    if 'Place ID' not in rows.columns:
+        counts['skipped'] = len(rows)
+        return counts
+
+    with _shared_write():
+        with _mutation_lock:
+            ensure_archived_column()
+            place_index = snapshot().place_index
+
+            folded = fold_repeated_places(rows)
+            counts['skipped'] += len(rows) - len(folded)
+            keep = folded['Place ID'] != ''
+            counts['skipped'] += int((~keep).sum())
+            rows = folded[keep]
+
+            known = np.fromiter(
+                (place_id in place_index for place_id in rows['Place ID']),
+                dtype=bool,
+                count=len(rows),
+            )
+
+            existing_rows = rows[known]
+            if not existing_rows.empty:
+                positions = [place_index[place_id] for place_id in existing_rows['Place ID']]
+                updated = _merge_existing_rows(
+                    conform_rows(existing_rows, timeline_df), positions
+                )
+                counts['updated'] = updated
+                counts['skipped'] += len(existing_rows) - updated
+
+            counts['inserted'] = _append_rows(rows[~known])
+
+            changed = bool(counts['inserted'] or counts['updated'])
+            if changed:
+                _bump_data_version()
+
+        # Saved outside ``_mutation_lock``: the snapshot lock must be taken
+        # first (see :func:`compact_journal`).
+        if changed:
+            save_timeline_data()
+
+    return counts
+
+
+def ensure_archived_column():
+    """Ensure the cached dataframe follows :mod:`app.timeline_schema`.
+
+    The timeline data historically did not include management columns such as
+    ``Archived`` or ``Alias`` and stored every value as text.  The schema is
+    applied once per frame (on load or replacement); mutations keep the frame
+    typed, so repeated calls are cheap no-ops.
+    """
+
+    global _schema_df
+
+    if timeline_df is None or _schema_df is timeline_df:
+        return
+
+    apply_schema(timeline_df)
+    _schema_df = timeline_df
+
+def _migration_source(active_storage: TimelineStorage) -> TimelineStorage | None:
+    """Return the newest timeline stored by another backend, if any."""
+
+    candidates = []
+    for name, backend_cls in STORAGE_BACKENDS.items():
+        if name == active_storage.name:
+            continue
+        if backend_cls.magic and not is_columnar_storage_available():
+            continue
+        candidate = create_storage(name, STORAGE_BASE_PATH)
+        if candidate.exists():
+            candidates.append(candidate)
+    return max(candidates, key=lambda candidate: os.path.getmtime(candidate.path), default=None)
+
+
+def _migrate_to_storage(source: TimelineStorage, active_storage: TimelineStorage):
+    """Load the timeline stored by ``source`` and write it to ``active_storage``."""
+
+    df = apply_schema(source.load().reset_index(drop=True))
+    print(f"Migrating {len(df)} rows from {source.path} to {active_storage.path}")
+    try:
+        active_storage.save(df)
+    except Exception as exc:
+        print(f"Failed to migrate {source.path} to {active_storage.path}: {exc}")
+    return df
+
 
 def load_timeline_data():
-    """Load the timeline CSV into ``timeline_df`` if present."""
+    """Load the stored timeline into ``timeline_df`` if present.
+
+    When the configured backend has no data yet but another backend does
+    (for example the legacy CSV), the newest such file is migrated
+    automatically and left in place.
+    """
+
+    global data_version, _synced_stamp, _synced_snapshot, _journal_position
+
+    if _shared is None:
+        _load_from_storage()
+        return
+
+    # Workers starting together take turns so only one migrates or compacts.
+    with _shared.locked(), _mutation_lock:
+        _load_from_storage()
+        _synced_stamp = _shared.read()
+        _synced_snapshot = _snapshot_identity()
+        _journal_position = journal.position()
+        data_version = max(data_version, _synced_stamp)
+        _change_log.note_reset(data_version - 1)
+
+
+def _load_from_storage():
     global timeline_df
 
-    if os.path.exists(CSV_PATH):
-        try:
-            timeline_df = pd.read_csv(CSV_PATH)
-            print(f"Loaded {len(timeline_df)} rows from {CSV_PATH}")
-            #print(timeline_df)
-        except Exception as exc:
-            print(f"Failed to load {CSV_PATH}: {exc}")
-            timeline_df = None
-    else:
-        print(f"CSV file {CSV_PATH} not found. Continuing without cached data.")
+    active_storage = _get_storage()
+
+    try:
+        if active_storage.exists():
+            timeline_df = active_storage.load()
+            print(f"Loaded {len(timeline_df)} rows from {active_storage.path}")
+        else:
+            source = _migration_source(active_storage)
+            if source is not None:
+                timeline_df = _migrate_to_storage(source, active_storage)
+            else:
+                print(f"Timeline file {active_storage.path} not found. Continuing without cached data.")
+                timeline_df = None
+    except Exception as exc:
+        print(f"Failed to load {active_storage.path}: {exc}")
         timeline_df = None
 
     ensure_archived_column()
+    _rebuild_place_index()
+    _bump_data_version()
+    _replay_journal()
 
 def save_timeline_data():
-    """Persist ``timeline_df`` to ``CSV_PATH`` if data is available."""
+    """Persist the full ``timeline_df`` snapshot and clear the journal.
+
+    Small edits should use the mutation helpers below instead, which only
+    append to the journal.  A full save is reserved for bulk replacements
+    such as imports or clearing the map.
+    """
     global timeline_df
 
     if timeline_df is None:
         print("No timeline data to save.")
         return
 
-    try:
-        os.makedirs(os.path.dirname(CSV_PATH), exist_ok=True)
-        ensure_archived_column()
-        timeline_df.to_csv(CSV_PATH, index=False)
-        print(f"Saved {len(timeline_df)} rows to {CSV_PATH}")
-    except Exception as exc:
-        print(f"Failed to save {CSV_PATH}: {exc}")
+    active_storage = _get_storage()
+
+    with _shared_write(), _snapshot_lock, _mutation_lock:
+        try:
+            os.makedirs(os.path.dirname(active_storage.path), exist_ok=True)
+            ensure_archived_column()
+            active_storage.save(timeline_df)
+            journal.reset()
+            # Buffered write-behind records are part of the new snapshot.
+            _pending_records.clear()
+            print(f"Saved {len(timeline_df)} rows to {active_storage.path}")
+        except Exception as exc:
+            print(f"Failed to save {active_storage.path}: {exc}")
+
+
+def _clean_place_ids(place_ids) -> list[str]:
+    cleaned = []
+    for raw_id in place_ids or []:
+        if raw_id is None:
+            continue
+        identifier = str(raw_id).strip()
+        if identifier:
+            cleaned.append(identifier)
+    return cleaned
+
+
+def _append_rows(rows: pd.DataFrame, store: TimelineStorage | None = None) -> int:
+    """Append schema-conformed ``rows`` and index them; caller holds the lock.
+
+    ``store`` is an incremental storage backend the rows are also written to.
+    """
+
+    if rows is None or rows.empty:
+        return 0
+
+    current = snapshot()
+    df = current.df
+    if df is None or df.empty:
+        replace_timeline(rows)
+        if store is not None:
+            store.append_rows(timeline_df)
+        return len(rows)
+
+    start = len(df)
+    rows = conform_rows(rows, df)
+    if store is not None:
+        store.append_rows(rows)
+    appended = pd.concat([widen_categories(df, rows), rows], ignore_index=True)
+    change = {'op': 'add', 'after': appended.iloc[start:]}
+    if 'Place ID' in rows.columns:
+        _publish(appended, current.with_appended(appended, start, rows['Place ID'].tolist()), change)
+    else:
+        _publish(appended, TimelineSnapshot(appended, current.place_index, current.duplicate_positions), change)
+    return len(rows)
+
+
+def _with_column_values(df: pd.DataFrame, column: str, positions: list[int], value) -> pd.DataFrame:
+    """Return a copy of ``df`` with ``column`` set to ``value`` at ``positions``.
+
+    Only ``column`` is copied; the other columns are shared with ``df``,
+    which is left untouched for readers still holding it.
+    """
+
+    values = df[column].copy()
+    values.iloc[positions] = value
+    updated = df.copy(deep=False)
+    updated[column] = values
+    return updated
+
+
+def _apply_mutation(record: dict, write_through: bool = False) -> int:
+    """Apply a journal ``record`` to ``timeline_df``.
+
+    Returns the number of affected rows.  Every operation is idempotent so
+    records can safely be replayed on top of a snapshot that already
+    contains them.  Rows are located through the ``Place ID`` index.
+
+    With ``write_through`` the change is also written to an incremental
+    storage backend, before it is published.  Only pass it for records this
+    process applies to a frame matching the stored data, never for changes
+    caught up from other workers (they already wrote them).
+    """
+
+    ensure_archived_column()
+    current = snapshot()
+    active_storage = _get_storage()
+    store = active_storage if write_through and active_storage.incremental else None
+
+    op = record.get('op')
+    df = current.df
+
+    if op == 'add':
+        rows = pd.DataFrame(record.get('rows') or [])
+        if not rows.empty and 'Place ID' in rows.columns:
+            rows = rows[[not current.has_place(place_id) for place_id in rows['Place ID']]]
+        return _append_rows(rows, store)
+
+    if df is None or df.empty or 'Place ID' not in df.columns:
+        return 0
+
+    if op == 'delete':
+        place_ids = _clean_place_ids(record.get('place_ids'))
+        positions = current.places_positions(place_ids)
+        if positions and store is not None:
+            store.delete_places(place_ids)
+        if positions:
+            _publish(
+                df.drop(index=positions).reset_index(drop=True),
+                change={'op': 'delete', 'before': df.iloc[positions]},
+            )
+        return len(positions)
+
+    column_by_op = {'archive': 'Archived', 'alias': 'Alias', 'description': 'Description'}
+    column = column_by_op.get(op)
+    if column is None:
+        print(f"Ignoring unknown timeline mutation '{op}'")
+        return 0
+
+    if op == 'archive':
+        place_ids = _clean_place_ids(record.get('place_ids'))
+        positions = current.places_positions(place_ids)
+        value = bool(record.get('archived', True))
+    else:
+        place_ids = [record.get('place_id')]
+        positions = current.place_positions(record.get('place_id'))
+        raw_value = record.get('value')
+        value = '' if raw_value is None else str(raw_value)
+        if op == 'description' and not value.strip():
+            value = ''
+
+    if positions:
+        if store is not None:
+            store.update_values(place_ids, column, value)
+        updated = _with_column_values(df, column, positions, value)
+        _publish(
+            updated,
+            TimelineSnapshot(updated, current.place_index, current.duplicate_positions),
+            {'op': op, 'before': df.iloc[positions], 'after': updated.iloc[positions]},
+        )
+    return len(positions)
+
+
+def _commit_mutation(record: dict) -> int:
+    """Apply ``record`` in memory and append it durably to the journal.
+
+    In write-behind mode the record is queued for the background flusher
+    instead of being written before this returns.
+    """
+
+    with _shared_write(), _mutation_lock:
+        affected = _apply_mutation(record, write_through=True)
+        if affected:
+            _bump_data_version()
+            if _write_behind is not None:
+                _pending_records.append(record)
+            else:
+                journal.append(record)
+
+    if affected and _write_behind is not None:
+        _write_behind.mark_dirty()
+    elif affected and journal.record_count >= JOURNAL_COMPACT_THRESHOLD:
+        schedule_compaction()
+    return affected
+
+
+def add_rows(rows: pd.DataFrame) -> int:
+    """Append ``rows`` to the timeline.  Returns the number of rows added."""
+
+    if rows is None or rows.empty:
+        return 0
+    return _commit_mutation({'op': 'add', 'rows': rows.to_dict('records')})
+
+
+def set_archived(place_ids, archived: bool = True) -> int:
+    """Set the ``Archived`` flag for ``place_ids``.  Returns matched rows."""
+
+    cleaned = _clean_place_ids(place_ids)
+    if not cleaned:
+        return 0
+    return _commit_mutation({'op': 'archive', 'place_ids': cleaned, 'archived': bool(archived)})
+
+
+def set_alias(place_id: str, alias: str) -> int:
+    """Store ``alias`` for ``place_id``.  Returns matched rows."""
+
+    return _commit_mutation({'op': 'alias', 'place_id': place_id, 'value': alias})
+
+
+def set_description(place_id: str, description: str) -> int:
+    """Store ``description`` for ``place_id``.  Returns matched rows."""
+
+    return _commit_mutation({'op': 'description', 'place_id': place_id, 'value': description})
+
+
+def delete_rows(place_ids) -> int:
+    """Delete every row whose ``Place ID`` is in ``place_ids``."""
+
+    cleaned = _clean_place_ids(place_ids)
+    if not cleaned:
+        return 0
+    return _commit_mutation({'op': 'delete', 'place_ids': cleaned})
+
+
+def _replay_journal():
+    """Apply journal records written after the loaded snapshot."""
+
+    records = journal.read_all()
+    if not records:
+        return
+
+    with _mutation_lock:
+        # Incremental storage may predate these records (for example right
+        # after migrating from a snapshot backend), so write them through.
+        for record in records:
+            _apply_mutation(record, write_through=True)
+        _bump_data_version()
+    print(f"Replayed {len(records)} journal record(s) from {JOURNAL_PATH}")
+    compact_journal()
+
+
+def compact_journal() -> bool:
+    """Fold the journal into a fresh snapshot.
+
+    The active journal is rotated aside while holding the mutation lock so
+    that edits made during the (slow) snapshot write land in a new journal
+    file.  Incremental storage already holds every journaled mutation, so
+    the journal is simply discarded.  Returns ``True`` when the journal was
+    folded.
+    """
+
+    active_storage = _get_storage()
+
+    with _shared_write(), _snapshot_lock:
+        with _mutation_lock:
+            rotated = journal.rotate()
+            if not rotated and not journal.has_pending_compaction():
+                return False
+            if timeline_df is None:
+                return False
+            if active_storage.incremental:
+                journal.discard_compacted()
+                return True
+            ensure_archived_column()
+            # Published frames are never modified in place, so no copy is needed.
+            compacted = timeline_df
+
+        try:
+            os.makedirs(os.path.dirname(active_storage.path), exist_ok=True)
+            active_storage.save(compacted)
+        except Exception as exc:
+            # The rotated journal stays on disk and is replayed on next start.
+            print(f"Failed to compact journal into {active_storage.path}: {exc}")
+            return False
+
+        journal.discard_compacted()
+        print(f"Compacted journal into {active_storage.path} ({len(compacted)} rows)")
+        return True
+
+
+def schedule_compaction():
+    """Run :func:`compact_journal` on a background thread."""
+
+    global _compaction_thread
+
+    with _mutation_lock:
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return
+        _compaction_thread = threading.Thread(
+            target=compact_journal,
+            name='timeline-journal-compaction',
+            daemon=True,
+        )
+        _compaction_thread.start()
+
+
+def export_timeline_csv(target=None):
+    """Write ``timeline_df`` as CSV to ``target``.
+
+    ``target`` may be a file path or a writable text buffer and defaults to
+    :data:`CSV_PATH`.  Returns ``target`` or ``None`` when there is no data to
+    export.
+    """
+
+    if timeline_df is None:
+        print("No timeline data to export.")
+        return None
+
+    if target is None:
+        target = CSV_PATH
+    if isinstance(target, str):
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+    ensure_archived_column()
+    if isinstance(target, str):
+        df = timeline_df
+        atomic_write(
+            target,
+            lambda temp_path: df.to_csv(temp_path, index=False),
+            checksum=False,
+            keep_previous=False,
+        )
+    else:
+        timeline_df.to_csv(target, index=False)
+    print(f"Exported {len(timeline_df)} rows as CSV")
+    return target
 
 
 def backup_timeline_data():
@@ -102,9 +1188,13 @@ def backup_timeline_data():
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_path = BACKUP_TEMPLATE.format(timestamp=timestamp)
 
-    os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-
-    timeline_df.to_csv(backup_path, index=False)
+    df = timeline_df
+    atomic_write(
+        backup_path,
+        lambda temp_path: df.to_csv(temp_path, index=False),
+        checksum=False,
+        keep_previous=False,
+    )
     print(f"Created backup with {len(timeline_df)} rows at {backup_path}")
     return backup_path
 
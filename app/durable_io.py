@@ -0,0 +1,266 @@
+"""Crash-safe file replacement shared by the timeline and trip stores.
+
+:func:`atomic_write` writes to a temporary file in the same directory, fsyncs
+it, renames it over the target and fsyncs the directory, so readers (and a
+restart after a crash mid-save) only ever see the old or the new file.
+
+Optionally it also
+
+* records the size and SHA-256 of the new file in a ``<path>.sha256``
+  sidecar, and
+* keeps the previous file as ``<path>.prev`` (a "last good" snapshot).
+
+:func:`readable_candidates` yields the files that pass the cheap checks
+(size and format magic bytes against the sidecar, then the checksum) so a
+loader can fall back to ``<path>.prev`` without first trying to parse a
+damaged file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from typing import Callable, Iterator, Optional, Tuple
+
+CHECKSUM_SUFFIX = ".sha256"
+PREVIOUS_SUFFIX = ".prev"
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _current_umask() -> int:
+    # ``os.umask`` can only be read by setting it, so do it once at import.
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Mode of newly created files, as ``open`` would create them.
+_DEFAULT_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _file_mode(path: str) -> int:
+    """Return the permission bits a replacement for ``path`` should get.
+
+    ``mkstemp`` creates temporary files as 0600, which the rename would
+    carry over to the target.
+    """
+
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return _DEFAULT_FILE_MODE
+
+
+def fsync_directory(directory: str) -> None:
+    """Flush a directory entry (renames, new files) to disk."""
+
+    if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover - Windows
+        return
+    fd = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, "rb+") as handle:
+        os.fsync(handle.fileno())
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_checksum(path: str) -> Optional[dict]:
+    try:
+        with open(path + CHECKSUM_SUFFIX, "r", encoding="utf-8") as handle:
+            record = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _write_small_file(path: str, text: str) -> None:
+    directory = os.path.dirname(path) or "."
+    handle, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    os.chmod(temp_path, _file_mode(path))
+    with os.fdopen(handle, "w", encoding="utf-8") as stream:
+        stream.write(text)
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temp_path, path)
+
+
+def _has_magic(path: str, magic: Optional[bytes], size: int) -> bool:
+    """Return ``True`` if ``path`` starts and ends with ``magic``."""
+
+    if not magic:
+        return True
+    if size < 2 * len(magic):
+        return False
+    with open(path, "rb") as handle:
+        head = handle.read(len(magic))
+        handle.seek(-len(magic), os.SEEK_END)
+        tail = handle.read(len(magic))
+    return head == magic and tail == magic
+
+
+def check_file(path: str, magic: Optional[bytes] = None, verify_checksum: bool = True) -> Tuple[bool, str]:
+    """Return ``(ok, reason)`` for the snapshot stored at ``path``.
+
+    The size recorded in the sidecar and the format's ``magic`` bytes are
+    checked first, which catches truncated files with two ``stat``/``read``
+    calls.  The SHA-256 is only computed when those pass.  Files without a
+    sidecar (written by older versions) are accepted if the magic matches.
+    """
+
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False, "missing"
+
+    record = _read_checksum(path)
+    if record is not None and record.get("size") != size:
+        return False, f"size {size} does not match recorded size {record.get('size')}"
+
+    if not _has_magic(path, magic, size):
+        return False, "truncated or not a valid snapshot"
+
+    if record is not None and verify_checksum and record.get("sha256"):
+        if file_sha256(path) != record["sha256"]:
+            return False, "checksum mismatch"
+
+    return True, ""
+
+
+def readable_candidates(path: str, magic: Optional[bytes] = None) -> Iterator[str]:
+    """Yield ``path`` and then its last good copy, skipping damaged files.
+
+    Callers should try to parse each candidate in turn and stop at the first
+    one that loads.
+    """
+
+    for candidate in (path, path + PREVIOUS_SUFFIX):
+        if not os.path.exists(candidate):
+            continue
+        ok, reason = check_file(candidate, magic)
+        if not ok:
+            print(f"Ignoring damaged snapshot {candidate}: {reason}")
+            continue
+        if candidate != path:
+            print(f"Falling back to last good snapshot {candidate}")
+        yield candidate
+
+
+def select_readable(path: str, magic: Optional[bytes] = None) -> Optional[str]:
+    """Return ``path`` or its last good copy, whichever is intact first."""
+
+    return next(readable_candidates(path, magic), None)
+
+
+def _rotate_previous(path: str, magic: Optional[bytes]) -> None:
+    """Move the current file aside as ``<path>.prev`` if it is intact."""
+
+    if not os.path.exists(path):
+        return
+
+    previous = path + PREVIOUS_SUFFIX
+    ok, _ = check_file(path, magic)
+    if not ok:
+        # Never let a damaged file replace the last good copy.
+        os.remove(path)
+        return
+
+    os.replace(path, previous)
+    if os.path.exists(path + CHECKSUM_SUFFIX):
+        os.replace(path + CHECKSUM_SUFFIX, previous + CHECKSUM_SUFFIX)
+    elif os.path.exists(previous + CHECKSUM_SUFFIX):
+        os.remove(previous + CHECKSUM_SUFFIX)
+
+
+def atomic_write(
+    path: str,
+    writer: Callable[[str], None],
+    *,
+    checksum: bool = True,
+    keep_previous: bool = True,
+    magic: Optional[bytes] = None,
+) -> None:
+    """Durably replace ``path`` with the output of ``writer(temp_path)``.
+
+    ``writer`` receives the path of a temporary file in the same directory
+    and must write the complete new contents to it.  Until the final rename
+    the previous contents of ``path`` (or ``<path>.prev``) stay readable.
+    """
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    os.close(handle)
+    # Read before ``path`` is moved aside as ``<path>.prev``.
+    mode = _file_mode(path)
+
+    try:
+        writer(temp_path)
+        os.chmod(temp_path, mode)
+        _fsync_file(temp_path)
+
+        if keep_previous:
+            _rotate_previous(path, magic)
+
+        record = None
+        if checksum:
+            record = json.dumps({
+                "sha256": file_sha256(temp_path),
+                "size": os.path.getsize(temp_path),
+            })
+
+        if record is not None and keep_previous:
+            # The sidecar is in place before the data file: a crash between
+            # the two leaves ``path`` missing, so loaders use ``.prev``.
+            _write_small_file(path + CHECKSUM_SUFFIX, record)
+            os.replace(temp_path, path)
+        else:
+            # Without a previous copy, drop the stale sidecar first so a
+            # crash leaves an unverified (but readable) file behind.
+            if os.path.exists(path + CHECKSUM_SUFFIX):
+                os.remove(path + CHECKSUM_SUFFIX)
+            os.replace(temp_path, path)
+            if record is not None:
+                _write_small_file(path + CHECKSUM_SUFFIX, record)
+
+        fsync_directory(directory)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def remove_with_history(path: str) -> None:
+    """Delete ``path`` together with its sidecar and last good copy."""
+
+    for candidate in (
+        path,
+        path + CHECKSUM_SUFFIX,
+        path + PREVIOUS_SUFFIX,
+        path + PREVIOUS_SUFFIX + CHECKSUM_SUFFIX,
+    ):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,144 @@
+"""Server-Sent Events fan-out of timeline and trip changes.
+
+``/api/events`` streams the mutations published by :mod:`app.data_cache`
+and :mod:`app.trip_store`; clients then fetch just the affected markers
+from ``/api/map_data/changes``.
+
+:class:`EventBroker` keeps one bounded ring buffer of encoded events shared
+by every subscriber, each of which only remembers the ID of the next event
+it needs, so writers never wait for clients.  A subscriber whose next event
+has left the buffer receives a ``reset`` event and its stream ends; the
+browser then reconnects and reloads.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Events kept for slow subscribers and reconnecting clients.
+DEFAULT_BUFFER_SIZE = 512
+
+# Place IDs listed per event; larger changes only say how many there were.
+MAX_EVENT_PLACE_IDS = 1000
+
+Event = Tuple[int, str, str]
+
+
+class Subscription:
+    """Position of one client in an :class:`EventBroker`."""
+
+    def __init__(self, broker: "EventBroker", next_id: int):
+        self._broker = broker
+        self.next_id = next_id
+
+    def wait(self, timeout: float) -> Optional[List[Event]]:
+        """Return the events published since the last call.
+
+        Waits up to ``timeout`` seconds for one to arrive and returns an
+        empty list if none did.  Returns ``None`` when the subscriber fell
+        behind the buffer and must be dropped.
+        """
+
+        return self._broker._read(self, timeout)
+
+
+class EventBroker:
+    """Bounded publish/subscribe buffer of Server-Sent Events."""
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._events: Deque[Event] = deque(maxlen=max(1, int(buffer_size)))
+        self._next_id = 1
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """Append an event for every subscriber and return its ID."""
+
+        encoded = json.dumps(data, separators=(",", ":"), default=str)
+        with self._condition:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append((event_id, event_type, encoded))
+            self._condition.notify_all()
+        return event_id
+
+    def subscribe(self, last_event_id: Any = None) -> Subscription:
+        """Return a subscription starting after ``last_event_id``.
+
+        ``last_event_id`` is the ``Last-Event-ID`` a reconnecting browser
+        sends; without it only events published from now on are delivered.
+        """
+
+        with self._condition:
+            next_id = self._next_id
+            try:
+                resume = int(last_event_id) + 1
+            except (TypeError, ValueError):
+                resume = None
+            if resume is not None and 0 < resume <= next_id:
+                next_id = resume
+            return Subscription(self, next_id)
+
+    def _read(self, subscription: Subscription, timeout: float) -> Optional[List[Event]]:
+        with self._condition:
+            if subscription.next_id >= self._next_id:
+                self._condition.wait(timeout)
+            if subscription.next_id >= self._next_id:
+                return []
+            oldest = self._events[0][0]
+            if subscription.next_id < oldest:
+                self.dropped += 1
+                return None
+            start = subscription.next_id - oldest
+            events = [self._events[index] for index in range(start, len(self._events))]
+            subscription.next_id = self._next_id
+            return events
+
+
+def format_event(event: Event) -> str:
+    """Return ``event`` in the ``text/event-stream`` wire format."""
+
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+def _place_ids_payload(place_ids) -> Dict[str, Any]:
+    place_ids = sorted({str(place_id) for place_id in place_ids})
+    if len(place_ids) > MAX_EVENT_PLACE_IDS:
+        return {"place_ids": None, "place_count": len(place_ids)}
+    return {"place_ids": place_ids, "place_count": len(place_ids)}
+
+
+def timeline_event(change: dict) -> Dict[str, Any]:
+    """Return the event data for a :func:`app.data_cache` change."""
+
+    op = change.get("op", "reset")
+    if op == "reset":
+        return {"op": "reset"}
+
+    rows = change.get("after") if change.get("after") is not None else change.get("before")
+    place_ids = []
+    if rows is not None and "Place ID" in rows.columns:
+        place_ids = rows["Place ID"].dropna().tolist()
+    data = {"op": op}
+    if op == "archive" and change.get("after") is not None and "Archived" in change["after"].columns:
+        data["archived"] = bool(change["after"]["Archived"].any())
+    data.update(_place_ids_payload(place_ids))
+    return data
+
+
+def trip_event(change: dict) -> Dict[str, Any]:
+    """Return the event data for a :func:`app.trip_store` change."""
+
+    if change.get("op") != "trips":
+        return {"op": "reset"}
+    data = {
+        "op": "trips",
+        "trip_ids": list(change.get("trip_ids") or []),
+        "removed_trip_ids": list(change.get("removed_trip_ids") or []),
+    }
+    data.update(_place_ids_payload(change.get("place_ids") or []))
+    return data
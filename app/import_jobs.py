@@ -0,0 +1,187 @@
+"""Background jobs for Google Timeline imports.
+
+Parsing, geocoding and merging a large Timeline export can take minutes, far
+longer than a request should be held open.  ``/api/update_timeline`` saves
+the upload to a temporary file and hands it to :func:`submit_timeline_import`,
+which runs the import on a small worker pool and returns immediately.  The
+returned :class:`ImportJob` records progress that clients poll through
+``/api/import_jobs/<job_id>``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from . import data_cache
+from .utils.geocoding import is_lookup_error
+from .utils.json_processing_functions import iter_visit_batches
+from .utils.json_stream import iter_semantic_segments
+
+IMPORT_WORKERS = 1
+MAX_FINISHED_JOBS = 50
+PROGRESS_INTERVAL = 1000
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+_jobs: Dict[str, "ImportJob"] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class ImportJob:
+    """Progress of a single timeline import."""
+
+    id: str
+    filename: str
+    source_type: str
+    state: str = JOB_QUEUED
+    segments_parsed: int = 0
+    places_geocoded: int = 0
+    places_failed: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_skipped: int = 0
+    message: str = ""
+    created_at: str = ""
+    updated_at: str = ""
+
+    def update(self, **changes) -> None:
+        with _jobs_lock:
+            for key, value in changes.items():
+                setattr(self, key, value)
+            self.updated_at = _utcnow_iso()
+
+    def to_dict(self) -> Dict[str, object]:
+        with _jobs_lock:
+            return asdict(self)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JOB_COMPLETED, JOB_FAILED)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            # Imports rewrite the whole snapshot, so by default they run one
+            # at a time; each one still geocodes concurrently.
+            _executor = ThreadPoolExecutor(
+                max_workers=IMPORT_WORKERS, thread_name_prefix="timeline-import"
+            )
+        return _executor
+
+
+def _prune_finished_jobs() -> None:
+    finished = [job for job in _jobs.values() if job.finished]
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        _jobs.pop(job.id, None)
+
+
+def get_job(job_id: str) -> Optional[ImportJob]:
+    with _jobs_lock:
+        return _jobs.get((job_id or "").strip())
+
+
+def _count_segments(job: ImportJob, segments: Iterable[dict]) -> Iterator[dict]:
+    count = 0
+    for segment in segments:
+        count += 1
+        if count % PROGRESS_INTERVAL == 0:
+            job.update(segments_parsed=count)
+        yield segment
+    job.update(segments_parsed=count)
+
+
+def _run_timeline_import(job: ImportJob, upload_path: str) -> None:
+    job.update(state=JOB_RUNNING)
+    try:
+        batches = []
+        geocoded = 0
+        failed = 0
+        with open(upload_path, "rb") as handle:
+            segments = _count_segments(job, iter_semantic_segments(handle))
+            visit_batches = iter_visit_batches(segments, job.source_type, include_existing=True)
+            while True:
+                # Segments are parsed lazily while the next batch is built.
+                try:
+                    records = next(visit_batches)
+                except StopIteration:
+                    break
+                except json.JSONDecodeError:
+                    job.update(state=JOB_FAILED, message="Failed to parse JSON.")
+                    return
+                batches.append(pd.DataFrame.from_records(records))
+                # Records without a name were not looked up (known places and
+                # repeat visits); failed lookups carry an "Error ..." name.
+                names = [record["Place Name"] for record in records if record.get("Place Name")]
+                errors = sum(1 for name in names if is_lookup_error(name))
+                geocoded += len(names) - errors
+                failed += errors
+                job.update(places_geocoded=geocoded, places_failed=failed)
+
+        imported_df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+        if not imported_df.empty and "Archived" not in imported_df.columns:
+            imported_df["Archived"] = False
+
+        counts = data_cache.merge_timeline_rows(imported_df)
+        job.update(
+            state=JOB_COMPLETED,
+            rows_inserted=counts["inserted"],
+            rows_updated=counts["updated"],
+            rows_skipped=counts["skipped"],
+            message=(
+                f"Timeline updated with data from {job.filename}! "
+                f"{counts['inserted']} added, {counts['updated']} updated."
+            ),
+        )
+    except Exception as exc:
+        print(f"Timeline import {job.id} failed: {exc}")
+        job.update(state=JOB_FAILED, message=str(exc))
+    finally:
+        try:
+            os.remove(upload_path)
+        except OSError:
+            pass
+
+
+def submit_timeline_import(
+    upload_path: str, filename: str, source_type: str = "google_timeline"
+) -> ImportJob:
+    """Queue an import of the Timeline JSON stored at ``upload_path``.
+
+    The worker deletes ``upload_path`` once the import has finished.
+    """
+
+    now = _utcnow_iso()
+    job = ImportJob(
+        id=uuid.uuid4().hex,
+        filename=filename,
+        source_type=source_type,
+        created_at=now,
+        updated_at=now,
+    )
+
+    with _jobs_lock:
+        _jobs[job.id] = job
+        _prune_finished_jobs()
+
+    _get_executor().submit(_run_timeline_import, job, upload_path)
+    return job
@@ -4,6 +4,7 @@ import folium
 from folium.plugins import MarkerCluster
 
 from . import data_cache
+from .timeline_schema import format_date_series, format_date_value
 
 def update_map_with_timeline_data(
     input_map, input_file=None, df=None, source_type=None
@@ -169,7 +170,7 @@ def update_map_with_timeline_data(
             </p>
             {alias_row}
             <p style="margin: 5px 0; font-size: 12px;">
-                <strong>Date Visited:</strong> {row['Start Date']}
+                <strong>Date Visited:</strong> {format_date_value(row['Start Date'])}
             </p>
             <p style="margin: 5px 0; font-size: 12px;">
                 <strong>Coordinates:</strong><br>
@@ -210,11 +211,49 @@ def update_map_with_timeline_data(
     # The map is kept in memory; the calling code can render it as needed
 
 
-def dataframe_to_markers(
+def _clean_text_column(
+    df: pd.DataFrame,
+    column: str,
+    *,
+    strip: bool = True,
+) -> pd.Series:
+    """Return ``column`` as strings with missing values replaced by ``""``.
+
+    Equivalent to ``"" if pd.isna(value) else str(value)`` (optionally
+    stripped) applied to every cell, but evaluated on the whole column.
+    """
+
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    text = series.where(series.notna(), "").astype(str)
+    return text.str.strip() if strip else text
+
+
+# Keys of a marker dictionary, in the order the frontend documents them
+MARKER_FIELDS = (
+    "id",
+    "lat",
+    "lng",
+    "place",
+    "alias",
+    "display_name",
+    "description",
+    "date",
+    "source_type",
+    "archived",
+)
+
+
+def dataframe_to_marker_columns(
     df: pd.DataFrame,
     include_archived: bool = False,
-) -> list[dict]:
-    """Return a simplified marker list from the timeline dataframe.
+    fields=None,
+) -> dict:
+    """Return marker values from the timeline dataframe as parallel lists.
 
     Parameters
     ----------
@@ -223,57 +262,93 @@ def dataframe_to_markers(
     include_archived:
         When ``True`` archived rows are retained in the output; otherwise they
         are omitted.
+    fields:
+        Marker keys to compute (see ``MARKER_FIELDS``); defaults to all of
+        them.  Unrequested columns, such as long descriptions, are skipped.
+
+    Returns
+    -------
+    dict
+        Mapping of each requested field to a list with one value per marker.
     """
 
+    fields = MARKER_FIELDS if fields is None else tuple(fields)
+
     # Return early if no timeline data is available
     if df is None or df.empty:
-        return []
-
-    markers = []
-    # Iterate over each row and build a small dict for the frontend
-    for _, row in df.iterrows():
-        archived_value = bool(row.get("Archived", False))
-        if archived_value and not include_archived:
-            continue
+        return {field: [] for field in fields}
+
+    # Work on whole columns rather than iterating row by row
+    if "Archived" in df.columns:
+        archived = df["Archived"]
+        if archived.dtype != bool:
+            archived = archived.astype(bool)
+    else:
+        archived = pd.Series(False, index=df.index)
+
+    if not include_archived:
+        keep = ~archived
+        df = df[keep]
+        archived = archived[keep]
+        if df.empty:
+            return {field: [] for field in fields}
+
+    def _raw_column(column: str) -> list:
+        if column not in df.columns:
+            return [""] * len(df)
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        return series.tolist()
+
+    def _description() -> list:
+        descriptions = _clean_text_column(df, "Description", strip=False)
+        return descriptions.where(descriptions.str.strip() != "", "").tolist()
+
+    def _display_name() -> list:
+        # Alias when present otherwise the place name
+        aliases = _clean_text_column(df, "Alias")
+        return aliases.where(aliases != "", _clean_text_column(df, "Place Name")).tolist()
+
+    def _date() -> list:
+        if "Start Date" in df.columns:
+            return format_date_series(df["Start Date"]).tolist()
+        return [""] * len(df)
+
+    builders = {
+        "id": lambda: _raw_column("Place ID"),
+        "lat": lambda: df["Latitude"].tolist(),
+        "lng": lambda: df["Longitude"].tolist(),
+        "place": lambda: _clean_text_column(df, "Place Name").tolist(),
+        "alias": lambda: _clean_text_column(df, "Alias").tolist(),
+        "display_name": _display_name,
+        "description": _description,
+        "date": _date,
+        "source_type": lambda: _raw_column("Source Type"),
+        "archived": archived.tolist,
+    }
+    return {field: builders[field]() for field in fields}
 
-        place_name = row.get("Place Name", "")
-        if pd.isna(place_name):
-            place_name = ""
-        else:
-            place_name = str(place_name).strip()
 
-        alias_value = row.get("Alias", "")
-        if pd.isna(alias_value):
-            alias_value = ""
-        else:
-            alias_value = str(alias_value).strip()
-
-        description_value = row.get("Description", "")
-        if pd.isna(description_value):
-            description_value = ""
-        else:
-            description_str = str(description_value)
-            description_value = description_str if description_str.strip() else ""
+def dataframe_to_markers(
+    df: pd.DataFrame,
+    include_archived: bool = False,
+) -> list[dict]:
+    """Return a simplified marker list from the timeline dataframe.
 
-        display_name = alias_value or place_name
+    Parameters
+    ----------
+    df:
+        Source DataFrame containing timeline data.
+    include_archived:
+        When ``True`` archived rows are retained in the output; otherwise they
+        are omitted.
+    """
 
-        markers.append(
-            {
-                "id": row.get("Place ID", ""),      # Unique identifier used for actions
-                "lat": row["Latitude"],           # Latitude for the map marker
-                "lng": row["Longitude"],          # Longitude for the map marker
-                "place": place_name,               # Human readable place name
-                "alias": alias_value,              # Optional custom alias provided by the user
-                "display_name": display_name,      # Alias when present otherwise the place name
-                "description": description_value,  # Optional location description
-                "date": row.get("Start Date", ""),   # Date when the place was visited
-                "source_type": row.get("Source Type", ""),  # Data source category
-                "archived": archived_value,
-            }
-        )
+    columns = dataframe_to_marker_columns(df, include_archived=include_archived)
 
     # The frontend expects a list of marker dictionaries
-    return markers
+    return [dict(zip(MARKER_FIELDS, values)) for values in zip(*columns.values())]
 
 
 def filter_dataframe_by_date_range(
@@ -305,7 +380,10 @@ def filter_dataframe_by_date_range(
     if start_date is None and end_date is None:
         return df
 
-    dates = pd.to_datetime(df["Start Date"], errors="coerce")
+    dates = df["Start Date"]
+    if not pd.api.types.is_datetime64_dtype(dates.dtype):
+        # Cached timeline data is already typed; other frames are parsed here.
+        dates = pd.to_datetime(dates, errors="coerce")
     mask = pd.Series(True, index=df.index)
 
     if start_date is not None:
@@ -0,0 +1,49 @@
+"""Small thread-safe LRU cache for encoded API responses.
+
+Endpoints that serialise large parts of the timeline (for example
+``/api/map_data``) store the final JSON bytes here keyed by the data
+version they were built from together with the request filters.  Because
+the data version changes on every mutation, stale entries are never
+returned; they simply age out of the cache.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class PayloadCache:
+    """Least-recently-used mapping of cache keys to encoded payloads."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key`` or ``None``."""
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entries."""
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,6 +1,8 @@
 """Flask routes for the WanderLog application."""
 
+import base64
 import hashlib
+import io
 import json
 import logging
 import os
@@ -11,6 +13,7 @@ import time
 from datetime import datetime
 from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
 import requests
 from flask import (
@@ -35,9 +38,26 @@ from google_auth_oauthlib.flow import Flow
 # and verifying ID tokens.  We keep the imports grouped so it is obvious which
 # pieces of the file interact with Google's APIs.
 
-from app.map_utils import dataframe_to_markers, filter_dataframe_by_date_range
-from app.utils.json_processing_functions import unique_visits_to_df
-from . import data_cache, trip_store
+from app.map_utils import (
+    MARKER_FIELDS,
+    dataframe_to_marker_columns,
+    dataframe_to_markers,
+    filter_dataframe_by_date_range,
+)
+from app.clustering import (
+    DEFAULT_RADIUS_PIXELS,
+    DEFAULT_TILE_SIZE,
+    PRECLUSTER_MAX_ZOOM,
+    ClusterIndex,
+    cluster_points,
+    visible_points,
+)
+from app.events import EventBroker, format_event, timeline_event, trip_event
+from app.payload_cache import PayloadCache
+from app.spatial_index import MAX_ZOOM, parse_bbox, parse_zoom, snap_bbox, tile_latitude, tile_longitude
+from app.timeline_schema import format_date_value
+from app.vector_tiles import DEFAULT_BUFFER, DEFAULT_EXTENT, MVT_CONTENT_TYPE, Layer, encode_tile, tile_pixels
+from . import data_cache, import_jobs, trip_store
 
 main = Blueprint("main", __name__)
 
@@ -48,6 +68,41 @@ MAX_TRIP_DESCRIPTION_LENGTH = 2000
 MAX_LOCATION_DESCRIPTION_LENGTH = 2000
 MAX_TRIP_PHOTOS_URL_LENGTH = 1000
 DEFAULT_TRIP_PHOTO_CACHE_TTL_SECONDS = 60 * 60 * 24  # 24 hours
+MAP_DATA_CACHE_SIZE = 32
+
+# Encoded ``/api/map_data`` payloads keyed by data version and filters
+_map_data_cache = PayloadCache(MAP_DATA_CACHE_SIZE)
+
+# Encoded ``/api/clusters`` payloads keyed by data version, zoom and viewport
+_clusters_cache = PayloadCache(MAP_DATA_CACHE_SIZE)
+
+# Encoded ``/tiles/{z}/{x}/{y}.mvt`` tiles keyed by data versions and filters
+VECTOR_TILE_CACHE_SIZE = 512
+_vector_tile_cache = PayloadCache(VECTOR_TILE_CACHE_SIZE)
+
+# Low zoom clusters, kept current by timeline change events
+_cluster_index = ClusterIndex(lambda: data_cache.snapshot().df)
+data_cache.add_change_listener(_cluster_index.apply_change)
+
+# Seconds between keep-alive comments on idle ``/api/events`` streams
+EVENT_STREAM_HEARTBEAT_SECONDS = 15
+# How often idle streams look for changes made by other workers
+EVENT_STREAM_SHARED_POLL_SECONDS = 1
+
+# Timeline and trip changes pushed to ``/api/events`` subscribers
+_event_broker = EventBroker()
+
+
+def _publish_timeline_event(change: dict) -> None:
+    _event_broker.publish('timeline', timeline_event(change))
+
+
+def _publish_trip_event(change: dict) -> None:
+    _event_broker.publish('trips', trip_event(change))
+
+
+data_cache.add_change_listener(_publish_timeline_event)
+trip_store.add_change_listener(_publish_trip_event)
 
 # Scopes control which Google APIs the user grants access to.  ``openid`` and
 # the ``userinfo`` scopes allow WanderLog to read the signed-in profile details
@@ -824,24 +879,6 @@ def _extract_trip_place_ids(trip):
     return identifiers
 
 
-def _parse_trip_date(value):
-    """Parse ``value`` into a :class:`~pandas.Timestamp` if possible."""
-
-    cleaned = _clean_string(value)
-    if not cleaned:
-        return None
-
-    try:
-        parsed = pd.to_datetime(cleaned, errors='coerce')
-    except Exception:
-        return None
-
-    if pd.isna(parsed):
-        return None
-
-    return parsed
-
-
 def _format_timestamp_for_response(timestamp) -> str:
     """Return a normalised string representation for ``timestamp``."""
 
@@ -864,13 +901,13 @@ def _build_place_date_lookup(place_ids):
     if not identifiers:
         return {}
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
+    timeline = data_cache.snapshot()
+    df = timeline.df
 
     if df is None or df.empty or 'Place ID' not in df.columns:
         return {}
 
-    matches = df[df['Place ID'].isin(identifiers)]
+    matches = timeline.get_place_rows(identifiers)
     if matches.empty:
         return {}
 
@@ -880,23 +917,15 @@ def _build_place_date_lookup(place_ids):
     if not relevant_columns:
         return {}
 
-    lookup: dict[str, pd.Timestamp] = {}
-
-    for _, row in matches.iterrows():
-        place_id = _clean_string(row.get('Place ID'))
-        if not place_id:
-            continue
-
-        latest_value = lookup.get(place_id)
+    # Date columns are stored as datetime64 (see ``app.timeline_schema``) so
+    # the latest date per place is a pair of vectorised reductions.
+    row_latest = matches[relevant_columns].max(axis=1)
+    latest_by_place = row_latest.groupby(matches['Place ID'], observed=True).max().dropna()
 
-        for column in relevant_columns:
-            candidate = _parse_trip_date(row.get(column))
-            if candidate is None:
-                continue
-            if latest_value is None or candidate > latest_value:
-                latest_value = candidate
-
-        if latest_value is not None:
+    lookup: dict[str, pd.Timestamp] = {}
+    for raw_place_id, latest_value in latest_by_place.items():
+        place_id = _clean_string(raw_place_id)
+        if place_id:
             lookup[place_id] = latest_value
 
     return lookup
@@ -970,9 +999,9 @@ def _serialise_trip_location(row, *, place_id: str = "", order: int = 0) -> dict
         description_candidate = str(description_raw)
         description = description_candidate if description_candidate.strip() else ''
 
-    start_date = _clean_string(get_value('Start Date', ''))
-    end_date = _clean_string(get_value('End Date', ''))
-    primary_date = _clean_string(get_value('date', '')) or start_date or end_date
+    start_date = _clean_string(format_date_value(get_value('Start Date', '')))
+    end_date = _clean_string(format_date_value(get_value('End Date', '')))
+    primary_date = _clean_string(format_date_value(get_value('date', ''))) or start_date or end_date
 
     source_type = _clean_string(get_value('Source Type', ''))
     archived = bool(get_value('Archived', False))
@@ -1412,49 +1441,60 @@ def api_google_photos_picker_media_items_list():
 
 @main.route('/api/update_timeline', methods=['POST'])
 def api_update_timeline():
-    """Process an uploaded Google Timeline JSON file and refresh the map."""
+    """Queue an uploaded Google Timeline JSON file for import.
+
+    The upload is written to a temporary file and processed by a background
+    job; the response carries the job ID to poll via
+    ``/api/import_jobs/<job_id>``.
+    """
 
     try:
         # Check if a file was uploaded in the request
         if 'file' not in request.files:
             return jsonify(status='error', message='No file uploaded.'), 400
 
-        # Parse the uploaded file as JSON
         timeline_file = request.files['file']
-        try:
-            timeline_json = json.load(timeline_file)
-        except Exception:
-            return jsonify(status='error', message='Failed to parse JSON.'), 400
-
-        #Process the timeline.json file uploaded by the user into a pandas df.
-        imported_df = unique_visits_to_df(timeline_json, "google_timeline")
-        if not imported_df.empty and "Archived" not in imported_df.columns:
-            imported_df["Archived"] = False
-        database_df = data_cache.timeline_df
-        #combine the imported data and resulting processed dataframe with the existing database info
-        dataframes = [imported_df]
-        if database_df is not None and not database_df.empty:
-            dataframes.append(database_df)
-
-        combined = pd.concat(dataframes)
-        combined = combined.drop_duplicates()
-        #update global database memory with appended information
-        data_cache.timeline_df = combined
-        data_cache.ensure_archived_column()
-
-        # Persist the updated timeline if required
-        data_cache.save_timeline_data()
-
-        #  Return success message
-        return jsonify(
-          status='success',
-          message=f"Timeline updated with data from {timeline_file.filename}!"
+        handle, upload_path = tempfile.mkstemp(prefix='timeline-import-', suffix='.json')
+        with os.fdopen(handle, 'wb') as destination:
+            shutil.copyfileobj(timeline_file.stream, destination)
+
+        job = import_jobs.submit_timeline_import(
+            upload_path, timeline_file.filename or 'upload', 'google_timeline'
         )
 
+        return jsonify(
+            status='accepted',
+            message=f"Importing {job.filename}...",
+            job_id=job.id,
+            job=job.to_dict(),
+        ), 202
+
     except Exception as e:
         print(e)
         return jsonify(status='error', message=str(e)), 500
 
+
+@main.route('/api/import_jobs/<job_id>', methods=['GET'])
+def api_import_job_status(job_id: str):
+    """Return progress for the timeline import ``job_id``."""
+
+    job = import_jobs.get_job(job_id)
+    if job is None:
+        return jsonify(status='error', message='Import job not found.'), 404
+
+    return jsonify(status='success', job=job.to_dict())
+
+
+@main.route('/api/persistence_status', methods=['GET'])
+def api_persistence_status():
+    """Report write-behind flush lag and pending mutations per store."""
+
+    return jsonify(
+        status='success',
+        timeline=data_cache.write_behind_metrics(),
+        trips=trip_store.write_behind_metrics(),
+    )
+
 @main.route('/api/clear', methods=['POST'])
 def api_clear():
     """Clear all timeline data and reset the map state."""
@@ -1471,7 +1511,7 @@ def api_clear():
                 'message': f'Failed to create backup before clearing data: {exc}'
             }), 500
 
-    data_cache.timeline_df = pd.DataFrame()
+    data_cache.replace_timeline(pd.DataFrame())
     data_cache.save_timeline_data()
 
     message = 'All timeline data cleared successfully.'
@@ -1545,13 +1585,7 @@ def api_add_point():
         }
     ])
 
-    if data_cache.timeline_df is None or data_cache.timeline_df.empty:
-        data_cache.timeline_df = new_row
-    else:
-        data_cache.timeline_df = pd.concat([data_cache.timeline_df, new_row], ignore_index=True)
-
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
+    data_cache.add_rows(new_row)
 
     return jsonify(
         status='success',
@@ -1564,22 +1598,14 @@ def api_add_point():
 def api_archive_marker(place_id: str):
     """Archive (or unarchive) a marker by ``place_id``."""
 
-    df = data_cache.timeline_df
-    if df is None or df.empty or 'Place ID' not in df.columns:
-        return jsonify(status='error', message='Data point not found.'), 404
-
-    mask = df['Place ID'] == place_id
-    if not mask.any():
+    if not data_cache.has_place(place_id):
         return jsonify(status='error', message='Data point not found.'), 404
 
     payload = request.get_json(silent=True) or {}
     archived_flag = payload.get('archived', True)
     archived_value = bool(archived_flag)
 
-    df.loc[mask, 'Archived'] = archived_value
-    data_cache.timeline_df = df
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
+    data_cache.set_archived([place_id], archived_value)
 
     action = 'archived' if archived_value else 'unarchived'
     return jsonify(status='success', message=f'Data point {action} successfully.')
@@ -1612,17 +1638,11 @@ def api_bulk_archive_markers():
     if not cleaned_ids:
         return jsonify(status='error', message='No valid place IDs were provided.'), 400
 
-    mask = df['Place ID'].isin(cleaned_ids)
-    matched_count = int(mask.sum())
+    archived_flag = bool(payload.get('archived', True))
+    matched_count = data_cache.set_archived(cleaned_ids, archived_flag)
     if matched_count == 0:
         return jsonify(status='error', message='No matching data points found.'), 404
 
-    archived_flag = bool(payload.get('archived', True))
-    df.loc[mask, 'Archived'] = archived_flag
-    data_cache.timeline_df = df
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
-
     action = 'archived' if archived_flag else 'unarchived'
     return jsonify(
         status='success',
@@ -1636,17 +1656,9 @@ def api_bulk_archive_markers():
 def api_delete_marker(place_id: str):
     """Delete a marker by ``place_id``."""
 
-    df = data_cache.timeline_df
-    if df is None or df.empty or 'Place ID' not in df.columns:
+    if data_cache.delete_rows([place_id]) == 0:
         return jsonify(status='error', message='Data point not found.'), 404
 
-    mask = df['Place ID'] == place_id
-    if not mask.any():
-        return jsonify(status='error', message='Data point not found.'), 404
-
-    data_cache.timeline_df = df.loc[~mask].reset_index(drop=True)
-    data_cache.save_timeline_data()
-
     return jsonify(status='success', message='Data point deleted successfully.')
 
 
@@ -1677,15 +1689,10 @@ def api_bulk_delete_markers():
     if not cleaned_ids:
         return jsonify(status='error', message='No valid place IDs were provided.'), 400
 
-    mask = df['Place ID'].isin(cleaned_ids)
-    matched_count = int(mask.sum())
+    matched_count = data_cache.delete_rows(cleaned_ids)
     if matched_count == 0:
         return jsonify(status='error', message='No matching data points found.'), 404
 
-    data_cache.timeline_df = df.loc[~mask].reset_index(drop=True)
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
-
     return jsonify(
         status='success',
         message=f'Deleted {matched_count} data point(s).',
@@ -1708,68 +1715,170 @@ def api_source_types():
     return jsonify(types)
 
 
+_MASTER_TIMELINE_COLUMNS = [
+    'Start Date',
+    'End Date',
+    'date',
+    'Source Type',
+    'Place Name',
+    'Latitude',
+    'Longitude',
+    'Place ID',
+    'Alias',
+    'Description',
+    'Archived',
+]
+
+# Rows serialised per batch when streaming the master timeline
+MASTER_TIMELINE_BATCH_SIZE = 1000
+MAX_MASTER_TIMELINE_PAGE_SIZE = 50000
+
+
+def _master_timeline_columns(df) -> list:
+    ordered_columns = [column for column in _MASTER_TIMELINE_COLUMNS if column in df.columns]
+    remaining_columns = [column for column in df.columns if column not in ordered_columns]
+    return ordered_columns + remaining_columns
+
+
+def _serialise_cell(value):
+    if pd.isna(value):
+        return ''
+    if isinstance(value, pd.Timestamp):
+        return format_date_value(value)
+    if hasattr(value, 'isoformat'):
+        try:
+            return value.isoformat()
+        except Exception:
+            return str(value)
+    if isinstance(value, (int, float, bool)):
+        return value
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _iter_master_timeline_rows(df, columns, start: int, stop: int):
+    """Yield serialised rows ``start`` to ``stop`` of ``df`` one at a time.
+
+    Rows are converted a batch at a time, column by column, so memory stays
+    bounded by ``MASTER_TIMELINE_BATCH_SIZE`` whatever the page size.
+    """
+
+    for batch_start in range(start, stop, MASTER_TIMELINE_BATCH_SIZE):
+        batch = df.iloc[batch_start:min(batch_start + MASTER_TIMELINE_BATCH_SIZE, stop)]
+        values = [[_serialise_cell(value) for value in batch[column].tolist()] for column in columns]
+        for cells in zip(*values):
+            yield dict(zip(columns, cells))
+
+
+def _encode_master_timeline_cursor(version: int, offset: int) -> str:
+    return f'{version}.{offset}'
+
+
+def _decode_master_timeline_cursor(cursor: str) -> tuple[int, int]:
+    version, _, offset = str(cursor).partition('.')
+    try:
+        version, offset = int(version), int(offset)
+    except ValueError:
+        raise ValueError('cursor is not valid.') from None
+    if version < 0 or offset < 0:
+        raise ValueError('cursor is not valid.')
+    return version, offset
+
+
 @main.route('/api/master_timeline', methods=['GET'])
 def api_master_timeline():
-    """Return the full master timeline dataset for the Advanced tab."""
+    """Return the master timeline dataset for the Advanced tab.
+
+    Without parameters the whole dataset is returned as one JSON document.
+    ``limit`` pages through it: the response then carries ``next_cursor``,
+    to be passed back as ``cursor`` for the following page (``null`` after
+    the last one).  A cursor is tied to the data version it was issued for;
+    once the timeline changes it is rejected with ``409 Conflict`` and the
+    client starts over.
+
+    ``format=ndjson`` (or ``Accept: application/x-ndjson``) streams the same
+    page as newline-delimited JSON: a header object with ``columns``,
+    ``total``, ``offset``, ``next_cursor`` and ``generated_at``, followed by
+    one object per row, written as the rows are serialised.
+    """
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
+    version = data_cache.data_version
+    df = data_cache.snapshot().df
     generated_at = datetime.utcnow().isoformat() + 'Z'
 
-    if df is None or df.empty:
-        return jsonify(
-            columns=[],
-            rows=[],
-            total=0,
-            generated_at=generated_at,
-        )
+    stream = (
+        request.args.get('format', '').strip().lower() == 'ndjson'
+        or request.accept_mimetypes.best == 'application/x-ndjson'
+    )
 
-    preferred_columns = [
-        'Start Date',
-        'End Date',
-        'date',
-        'Source Type',
-        'Place Name',
-        'Latitude',
-        'Longitude',
-        'Place ID',
-        'Alias',
-        'Description',
-        'Archived',
-    ]
+    try:
+        limit = request.args.get('limit')
+        if limit is not None:
+            limit = int(limit)
+            if limit <= 0:
+                raise ValueError
+            limit = min(limit, MAX_MASTER_TIMELINE_PAGE_SIZE)
+    except ValueError:
+        return jsonify(status='error', message='limit must be a positive integer.'), 400
 
-    ordered_columns = [column for column in preferred_columns if column in df.columns]
-    remaining_columns = [column for column in df.columns if column not in ordered_columns]
-    columns = ordered_columns + remaining_columns
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_version, offset = _decode_master_timeline_cursor(cursor)
+        except ValueError as exc:
+            return jsonify(status='error', message=str(exc)), 400
+        if cursor_version != version:
+            return jsonify(
+                status='error',
+                message='The timeline changed; reload from the first page.',
+            ), 409
+
+    total = 0 if df is None else len(df)
+    columns = [] if df is None or df.empty else _master_timeline_columns(df)
+    stop = total if limit is None else min(offset + limit, total)
+    next_cursor = None
+    if limit is not None and stop < total:
+        next_cursor = _encode_master_timeline_cursor(version, stop)
+    header = {
+        'columns': columns,
+        'total': total,
+        'offset': offset,
+        'next_cursor': next_cursor,
+        'generated_at': generated_at,
+    }
 
-    def _serialise_cell(value):
-        if pd.isna(value):
-            return ''
-        if isinstance(value, pd.Timestamp):
-            return value.isoformat()
-        if hasattr(value, 'isoformat'):
-            try:
-                return value.isoformat()
-            except Exception:
-                return str(value)
-        if isinstance(value, (int, float, bool)):
-            return value
-        if isinstance(value, str):
-            return value
-        return str(value)
+    if stream:
+        def generate():
+            yield json.dumps(header) + '\n'
+            if columns:
+                for row in _iter_master_timeline_rows(df, columns, offset, stop):
+                    yield json.dumps(row) + '\n'
 
-    rows = []
-    for _, row in df[columns].iterrows():
-        serialised_row = {}
-        for column in columns:
-            serialised_row[column] = _serialise_cell(row.get(column))
-        rows.append(serialised_row)
+        return Response(generate(), mimetype='application/x-ndjson')
 
-    return jsonify(
-        columns=columns,
-        rows=rows,
-        total=len(rows),
-        generated_at=generated_at,
+    rows = [] if not columns else list(_iter_master_timeline_rows(df, columns, offset, stop))
+    if limit is None:
+        return jsonify(columns=columns, rows=rows, total=len(rows), generated_at=generated_at)
+    return jsonify(rows=rows, **header)
+
+
+@main.route('/api/master_timeline/export.csv', methods=['GET'])
+def api_export_master_timeline_csv():
+    """Download the master timeline as a CSV file."""
+
+    df = data_cache.timeline_df
+    if df is None:
+        return jsonify(status='error', message='No timeline data to export.'), 404
+
+    buffer = io.StringIO()
+    data_cache.export_timeline_csv(buffer)
+
+    return Response(
+        buffer.getvalue(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename="master_timeline_data.csv"'},
     )
 
 
@@ -1778,11 +1887,8 @@ def api_list_trips():
     """Return the list of available trips."""
 
     trips = trip_store.list_trips()
-    place_ids = set()
-    for trip in trips:
-        place_ids.update(_extract_trip_place_ids(trip))
-
-    latest_dates = _build_place_date_lookup(place_ids)
+    # Every place that belongs to at least one trip is a key of the index
+    latest_dates = _build_place_date_lookup(list(trip_store.membership_index()))
 
     return jsonify([
         _serialise_trip(trip, place_date_lookup=latest_dates) for trip in trips
@@ -1811,16 +1917,16 @@ def api_get_trip(trip_id: str):
         if cleaned:
             cleaned_ids.append(cleaned)
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
+    timeline = data_cache.snapshot()
+    df = timeline.df
 
     rows_by_place_id = {}
     if df is not None and not df.empty and 'Place ID' in df.columns:
-        matches = df[df['Place ID'].isin(cleaned_ids)]
-        for _, entry in matches.iterrows():
-            pid = _clean_string(entry.get('Place ID'))
-            if pid and pid not in rows_by_place_id:
-                rows_by_place_id[pid] = entry
+        for place_id in cleaned_ids:
+            if place_id not in rows_by_place_id:
+                entry = timeline.get_place_row(place_id)
+                if entry is not None:
+                    rows_by_place_id[place_id] = entry
 
     locations = [
         _serialise_trip_location(rows_by_place_id.get(place_id), place_id=place_id, order=index)
@@ -2330,12 +2436,7 @@ def api_assign_trip():
     if not place_id:
         return jsonify(status='error', message='A valid place ID is required.'), 400
 
-    df = data_cache.timeline_df
-    if df is None or df.empty or 'Place ID' not in df.columns:
-        return jsonify(status='error', message='Data point not found.'), 404
-
-    mask = df['Place ID'] == place_id
-    if not mask.any():
+    if not data_cache.has_place(place_id):
         return jsonify(status='error', message='Data point not found.'), 404
 
     trip_id = str(payload.get('trip_id') or '').strip()
@@ -2407,19 +2508,11 @@ def api_assign_trip_bulk():
     if not cleaned_ids:
         return jsonify(status='error', message='No valid place IDs were provided.'), 400
 
-    df = data_cache.timeline_df
-    if df is None or df.empty or 'Place ID' not in df.columns:
-        return jsonify(status='error', message='Data points not found.'), 404
-
-    try:
-        existing_ids_series = df['Place ID'].dropna().astype(str).str.strip()
-    except Exception:
-        existing_ids_series = pd.Series(dtype=str)
-
-    valid_ids = {value for value in existing_ids_series if value}
     matched_ids: list[str] = []
+    seen_ids: set[str] = set()
     for identifier in cleaned_ids:
-        if identifier in valid_ids and identifier not in matched_ids:
+        if identifier not in seen_ids and data_cache.has_place(identifier):
+            seen_ids.add(identifier)
             matched_ids.append(identifier)
 
     if not matched_ids:
@@ -2551,42 +2644,132 @@ def api_clear_trip_memberships():
     )
 
 
-@main.route('/api/map_data', methods=['GET', 'POST'])
-def api_map_data():
-    """Return marker data for the current timeline.
+_MAP_DATA_FIELDS = MARKER_FIELDS + ('trips',)
 
-    The frontend calls this endpoint to retrieve simplified marker
-    dictionaries.  Optional filtering by ``Source Type`` values is
-    supported via POST or query parameters.
+_MAP_DATA_PARAMS = (
+    'source_types', 'start_date', 'end_date', 'bbox', 'zoom', 'fields', 'format', 'coordinates', 'since',
+)
+
+
+def _parse_marker_fields(value) -> Optional[tuple]:
+    """Return the requested marker fields as a tuple, or ``None`` for all.
+
+    ``value`` is a comma separated string or a list.  Raises
+    :class:`ValueError` for unknown field names.
     """
 
-    # Grab the cached timeline DataFrame held in memory
-    df = data_cache.timeline_df
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
+    if value is None or value == '' or value == []:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        raise ValueError('fields must be a list of field names.')
 
-    # If no data has been loaded yet return an empty array
-    if df is None or df.empty:
-        return jsonify([])
+    requested = {str(field).strip() for field in value} - {''}
+    unknown = sorted(requested - set(_MAP_DATA_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+    # Canonical order so equivalent requests share a cache entry.
+    return tuple(field for field in _MAP_DATA_FIELDS if field in requested) or None
+
+
+def _map_data_params() -> dict:
+    """Return the raw ``/api/map_data`` parameters of the current request."""
 
     if request.method == 'POST':
         # For POST requests, read JSON body and grab any filters
         data = request.get_json(silent=True) or {}
-        source_types = data.get('source_types')
-        source_types_provided = 'source_types' in data
-        start_date = data.get('start_date') or None
-        end_date = data.get('end_date') or None
+        params = {name: data.get(name) for name in _MAP_DATA_PARAMS}
+        params['source_types_provided'] = 'source_types' in data
     else:
         # GET requests provide the filters as query string values
-        if 'source_types' in request.args:
-            source_types = request.args.getlist('source_types')
-            source_types_provided = True
-        else:
-            source_types = None
-            source_types_provided = False
+        params = {name: request.args.get(name) for name in _MAP_DATA_PARAMS}
+        params['source_types_provided'] = 'source_types' in request.args
+        params['source_types'] = request.args.getlist('source_types') or None
+
+    params['start_date'] = params['start_date'] or None
+    params['end_date'] = params['end_date'] or None
+    return params
+
+
+def _map_filters(params: dict) -> dict:
+    """Return the :func:`_filter_map_rows` filter arguments in ``params``."""
+
+    return {
+        'source_types_provided': params['source_types_provided'],
+        'source_types': params['source_types'],
+        'start_date': params['start_date'],
+        'end_date': params['end_date'],
+    }
+
+
+def _map_filters_key(filters: dict) -> tuple:
+    """Return a hashable cache key part for :func:`_map_filters` output."""
+
+    source_types_key = (
+        json.dumps(filters['source_types'], sort_keys=True, default=str)
+        if filters['source_types_provided']
+        else None
+    )
+    return source_types_key, filters['start_date'], filters['end_date']
+
+
+def _format_data_version(versions) -> str:
+    return '.'.join(str(version) for version in versions)
+
+
+def _parse_data_version(value) -> tuple[int, int]:
+    """Parse an ``X-Data-Version`` token (timeline and trips versions)."""
+
+    parts = str(value or '').split('.')
+    try:
+        versions = tuple(int(part) for part in parts)
+    except ValueError:
+        versions = ()
+    if len(versions) != 2 or min(versions) < 0:
+        raise ValueError('since must be a data version from /api/map_data.')
+    return versions
 
-        start_date = request.args.get('start_date') or None
-        end_date = request.args.get('end_date') or None
+
+def _filter_map_rows(
+    df,
+    *,
+    source_types_provided,
+    source_types,
+    start_date,
+    end_date,
+    viewport=None,
+    narrow=True,
+    include_archived=False,
+):
+    """Return the visible timeline rows matching the map filters.
+
+    ``viewport`` is an optional ``(west, south, east, north)`` box; only
+    rows inside it are returned.  ``df`` must be the whole timeline unless
+    ``narrow`` is false, which skips the index lookups.  Archived rows are
+    dropped unless ``include_archived`` is true.
+    """
+
+    if narrow and viewport is not None:
+        # The spatial index narrows the rows to the viewport before any
+        # other filter runs.
+        current = data_cache.snapshot()
+        if current.df is None:
+            return None
+        df = current.df.iloc[data_cache.spatial_index(current).query(viewport)]
+    elif narrow and (start_date or end_date):
+        # Indexed storage narrows a date range first; the filters below still
+        # run on the (much smaller) result so both paths return the same
+        # markers.  Source types alone rarely narrow the frame enough to beat
+        # the vectorised filters.
+        candidates = data_cache.query_timeline_rows(
+            source_types=(source_types or []) if source_types_provided else None,
+            start_date=start_date,
+            end_date=end_date,
+            include_archived=False,
+        )
+        if candidates is not None:
+            df = candidates
 
     # Apply filtering when specific source types are requested
     if source_types_provided:
@@ -2594,45 +2777,465 @@ def api_map_data():
         df = df[df.get('Source Type').isin(source_types)]
 
     # Exclude archived entries
-    if 'Archived' in df.columns:
+    if 'Archived' in df.columns and not include_archived:
         df = df[df['Archived'] != True]
 
     # Apply optional date filtering
-    df = filter_dataframe_by_date_range(df, start_date=start_date, end_date=end_date)
+    return filter_dataframe_by_date_range(df, start_date=start_date, end_date=end_date)
 
-    # Convert the filtered DataFrame into simple marker dictionaries
-    markers = dataframe_to_markers(df)
 
-    if markers:
-        trips = trip_store.list_trips()
-        place_memberships: dict[str, list[dict]] = {}
+def _marker_columns(df, fields, *, include_archived: bool = False) -> dict:
+    """Return parallel marker value lists for ``fields``, trips included."""
 
-        for trip in trips:
-            if not isinstance(trip, dict):
-                continue
+    fields = fields or _MAP_DATA_FIELDS
+    marker_fields = [field for field in fields if field != 'trips']
+    if 'trips' in fields and 'id' not in marker_fields:
+        marker_fields.append('id')
+    columns = dataframe_to_marker_columns(df, include_archived=include_archived, fields=marker_fields)
+    if 'trips' in fields:
+        # Read-only place ID -> trips index maintained by ``trip_store``
+        place_memberships = trip_store.membership_index()
+        columns['trips'] = [
+            place_memberships.get(str(place_id or '').strip(), []) for place_id in columns['id']
+        ]
+    return {field: columns[field] for field in fields}
 
-            trip_id = str(trip.get('id') or '').strip()
-            if not trip_id:
-                continue
 
-            trip_name = str(trip.get('name') or '').strip() or 'Untitled Trip'
-            place_ids = trip.get('place_ids') or []
+def _build_map_markers(df, *, fields=None) -> list[dict]:
+    """Return marker dictionaries annotated with trip memberships.
 
-            if not isinstance(place_ids, list):
-                continue
+    ``fields`` limits the keys of each marker (all of them by default).
+    """
+
+    columns = _marker_columns(df, fields)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _pack_float32(values) -> str:
+    """Return ``values`` as base64 encoded little-endian Float32 bytes."""
+
+    return base64.b64encode(np.asarray(values, dtype='<f4').tobytes()).decode('ascii')
+
+
+def _build_map_columns(df, *, fields=None, packed=False) -> dict:
+    """Return markers in the columnar wire format.
+
+    The payload is ``{"format": "columnar", "count": n, "fields": [...],
+    "columns": {field: [...]}}``: one array per field, all of length ``n``.
+    With ``packed`` the ``lat``/``lng`` arrays are replaced by base64
+    strings of little-endian Float32 values (about a metre of precision)
+    and listed in ``"encoding"``.
+    """
+
+    columns = _marker_columns(df, fields)
+    payload = {
+        'format': 'columnar',
+        'count': len(next(iter(columns.values()))),
+        'fields': list(columns),
+        'columns': columns,
+    }
+    if packed:
+        encoding = {}
+        for field in ('lat', 'lng'):
+            if field in columns:
+                columns[field] = _pack_float32(columns[field])
+                encoding[field] = 'float32-base64'
+        payload['encoding'] = encoding
+    return payload
+
+
+def _versioned_json_response(cache: PayloadCache, key: tuple, build) -> Response:
+    """Return cached JSON bytes for ``key``, building them with ``build``.
+
+    See :func:`_versioned_response`; ``build`` returns the data to encode.
+    """
+
+    return _versioned_response(
+        cache, key, lambda: current_app.json.dumps(build()).encode('utf-8'), 'application/json'
+    )
+
+
+def _versioned_response(cache: PayloadCache, key: tuple, build, mimetype: str) -> Response:
+    """Return cached bytes for ``key``, building them with ``build``.
+
+    ``key`` must include the data versions the payload depends on.  The ETag
+    is derived from the full key so clients revalidating an unchanged
+    payload receive ``304 Not Modified`` without any dataframe work.
+    """
+
+    etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = cache.get(key)
+        if body is None:
+            body = build()
+            cache.put(key, body)
+        response = Response(body, mimetype=mimetype)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@main.route('/api/map_data', methods=['GET', 'POST'])
+def api_map_data():
+    """Return marker data for the current timeline.
+
+    The frontend calls this endpoint to retrieve simplified marker
+    dictionaries.  Optional filtering by ``Source Type`` values is
+    supported via POST or query parameters.  Encoded responses are cached
+    per data version and filter combination.
+
+    ``bbox`` (``west,south,east,north``) limits the response to markers in
+    the viewport.  With ``zoom`` the box is first grown to the edges of the
+    map tiles it touches at that zoom, so small pans reuse cached payloads.
+
+    ``fields`` (a list, or comma separated in query strings) projects the
+    markers onto the given keys.  ``format=columnar`` returns one array per
+    field instead of one object per marker, and ``coordinates=float32``
+    additionally packs ``lat``/``lng`` as base64 encoded little-endian
+    Float32 arrays (see :func:`_build_map_columns`).
+
+    The ``X-Data-Version`` response header carries the version token to
+    pass to ``/api/map_data/changes`` later.
+    """
+
+    # Capture the versions before reading the data so a concurrent edit can
+    # only make a cached payload newer than its key, never older.
+    versions = (data_cache.data_version, trip_store.data_version)
+
+    # Grab the cached timeline DataFrame held in memory
+    df = data_cache.timeline_df
+
+    params = _map_data_params()
+    source_types = params['source_types']
+    source_types_provided = params['source_types_provided']
+    start_date = params['start_date']
+    end_date = params['end_date']
+    wire_format = params['format']
+    coordinates = params['coordinates']
+
+    try:
+        viewport = parse_bbox(params['bbox'])
+        zoom = parse_zoom(params['zoom'])
+        fields = _parse_marker_fields(params['fields'])
+    except ValueError as exc:
+        return jsonify(status='error', message=str(exc)), 400
+    if viewport is not None and zoom is not None:
+        viewport = snap_bbox(viewport, zoom)
+
+    wire_format = str(wire_format or 'rows').strip().lower()
+    if wire_format not in ('rows', 'columnar'):
+        return jsonify(status='error', message="format must be 'rows' or 'columnar'."), 400
+    coordinates = str(coordinates or 'json').strip().lower()
+    if coordinates not in ('json', 'float32'):
+        return jsonify(status='error', message="coordinates must be 'json' or 'float32'."), 400
+    if wire_format == 'rows' and coordinates != 'json':
+        return jsonify(status='error', message='coordinates=float32 requires format=columnar.'), 400
+
+    # If no data has been loaded yet return an empty payload
+    if df is None or df.empty:
+        if wire_format == 'columnar':
+            response = jsonify(_build_map_columns(None, fields=fields, packed=coordinates == 'float32'))
+        else:
+            response = jsonify([])
+        response.headers['X-Data-Version'] = _format_data_version(versions)
+        return response
+
+    source_types_key = (
+        json.dumps(source_types, sort_keys=True, default=str)
+        if source_types_provided
+        else None
+    )
+    cache_key = (
+        'map_data', *versions, source_types_key, start_date, end_date, viewport,
+        fields, wire_format, coordinates,
+    )
+
+    def build():
+        rows = _filter_map_rows(
+            df,
+            source_types_provided=source_types_provided,
+            source_types=source_types,
+            start_date=start_date,
+            end_date=end_date,
+            viewport=viewport,
+        )
+        if wire_format == 'columnar':
+            return _build_map_columns(rows, fields=fields, packed=coordinates == 'float32')
+        return _build_map_markers(rows, fields=fields)
+
+    response = _versioned_json_response(_map_data_cache, cache_key, build)
+    response.headers['X-Data-Version'] = _format_data_version(versions)
+    return response
+
+
+@main.route('/api/map_data/changes', methods=['GET', 'POST'])
+def api_map_data_changes():
+    """Return the marker changes since a version of ``/api/map_data``.
+
+    ``since`` is the ``X-Data-Version`` of the client's last marker payload
+    (or the ``version`` of its last changes response).  The filters
+    (``source_types``, ``start_date``, ``end_date``) and ``fields`` must
+    match that request.  The response lists
+
+    ``markers``
+        the current markers of every changed place, including trip
+        membership changes; they replace all markers with the same ``id``;
+    ``removed``
+        the IDs of changed places no longer shown (deleted, archived or
+        filtered out).
+
+    When the changes are no longer known (the version is too old, or the
+    timeline was replaced by an import) ``reset`` is ``true`` and the
+    client must fetch ``/api/map_data`` again.
+    """
+
+    params = _map_data_params()
+    try:
+        since = _parse_data_version(params['since'])
+        fields = _parse_marker_fields(params['fields'])
+    except ValueError as exc:
+        return jsonify(status='error', message=str(exc)), 400
+
+    timeline_version, changed_places = data_cache.changed_place_ids_since(since[0])
+    trips_version, changed_memberships = trip_store.changed_memberships_since(since[1])
+    version = _format_data_version((timeline_version, trips_version))
+    if changed_places is None or changed_memberships is None:
+        return jsonify(version=version, reset=True, markers=[], removed=[])
+
+    changed = changed_places | changed_memberships
+    markers = []
+    shown = set()
+    rows = data_cache.get_place_rows(sorted(changed)) if changed else None
+    if rows is not None and not rows.empty:
+        rows = _filter_map_rows(
+            rows,
+            source_types_provided=params['source_types_provided'],
+            source_types=params['source_types'],
+            start_date=params['start_date'],
+            end_date=params['end_date'],
+            narrow=False,
+        )
+        markers = _build_map_markers(rows, fields=fields)
+        shown = {str(place_id) for place_id in rows['Place ID']}
 
-            for raw_place_id in place_ids:
-                place_identifier = str(raw_place_id or '').strip()
-                if not place_identifier:
-                    continue
-                membership = place_memberships.setdefault(place_identifier, [])
-                membership.append({'id': trip_id, 'name': trip_name})
+    return jsonify(
+        version=version,
+        reset=False,
+        markers=markers,
+        removed=sorted(changed - shown),
+    )
+
+
+def _filters_active(filters: dict) -> bool:
+    return bool(filters['source_types_provided'] or filters['start_date'] or filters['end_date'])
+
+
+def _cluster_rows(area, zoom: int, filters: dict):
+    """Cluster the visible markers in ``area`` matching ``filters`` on the fly."""
+
+    current = data_cache.snapshot()
+    rows = None
+    if current.df is not None:
+        rows = current.df.iloc[data_cache.spatial_index(current).query(area)]
+        if _filters_active(filters):
+            rows = _filter_map_rows(rows, narrow=False, **filters)
+    _, world_x, world_y = visible_points(rows)
+    return cluster_points(world_x, world_y, zoom)
+
+
+def _build_clusters(viewport, zoom: int, filters: dict) -> dict:
+    """Return the clusters in ``viewport`` at ``zoom`` as GeoJSON.
+
+    ``filters`` holds the ``/api/map_data`` filter keyword arguments.  The
+    precomputed index only covers the unfiltered timeline, so filtered
+    requests (and deep zoom viewports, which hold few markers) group the
+    matching markers on the fly.
+    """
+
+    if zoom <= PRECLUSTER_MAX_ZOOM and not _filters_active(filters):
+        latitudes, longitudes, counts = _cluster_index.clusters(viewport, zoom)
+    else:
+        latitudes, longitudes, counts = _cluster_rows(viewport, zoom, filters)
+
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+            'properties': {'cluster': count > 1, 'point_count': count},
+        }
+        for lat, lng, count in zip(latitudes.tolist(), longitudes.tolist(), counts.tolist())
+    ]
+    return {'type': 'FeatureCollection', 'zoom': zoom, 'features': features}
 
-        for marker in markers:
-            place_id = str(marker.get('id') or '').strip()
-            marker['trips'] = place_memberships.get(place_id, [])
 
-    return jsonify(markers)
+@main.route('/api/clusters', methods=['GET'])
+def api_clusters():
+    """Return server-side marker clusters for a zoom level and viewport.
+
+    Query parameters are ``zoom`` (required) and ``bbox``
+    (``west,south,east,north``, default the whole world), plus the
+    ``source_types``, ``start_date`` and ``end_date`` filters of
+    ``/api/map_data``.  The response is a GeoJSON ``FeatureCollection``
+    with one point per cluster at the centroid of its markers and a
+    ``point_count`` property.  Archived markers are excluded.
+    """
+
+    versions = (data_cache.data_version,)
+
+    try:
+        zoom = parse_zoom(request.args.get('zoom'))
+        viewport = parse_bbox(request.args.get('bbox')) or (-180.0, -90.0, 180.0, 90.0)
+    except ValueError as exc:
+        return jsonify(status='error', message=str(exc)), 400
+    if zoom is None:
+        return jsonify(status='error', message='zoom is required.'), 400
+    viewport = snap_bbox(viewport, zoom)
+
+    filters = _map_filters(_map_data_params())
+    cache_key = ('clusters', *versions, zoom, viewport, *_map_filters_key(filters))
+
+    return _versioned_json_response(
+        _clusters_cache,
+        cache_key,
+        lambda: _build_clusters(viewport, zoom, filters),
+    )
+
+
+def _tile_area(x: int, y: int, zoom: int, margin: float):
+    """Return the bounding box of tile ``zoom/x/y`` grown by ``margin`` tiles."""
+
+    scale = 1 << zoom
+    west = tile_longitude(max(x - margin, 0.0), zoom)
+    east = tile_longitude(min(x + 1 + margin, scale), zoom)
+    north = tile_latitude(max(y - margin, 0.0), zoom)
+    south = tile_latitude(min(y + 1 + margin, scale), zoom)
+    return west, south, east, north
+
+
+def _build_vector_tile(zoom: int, x: int, y: int, *, cluster: bool, include_archived: bool, filters: dict) -> bytes:
+    """Encode the markers (or clusters) of tile ``zoom/x/y`` as MVT bytes.
+
+    ``filters`` holds the ``/api/map_data`` filter keyword arguments.
+    """
+
+    margin = DEFAULT_BUFFER / DEFAULT_EXTENT
+
+    if cluster:
+        layer = Layer('clusters')
+        if not _filters_active(filters):
+            latitudes, longitudes, counts = _cluster_index.clusters(_tile_area(x, y, zoom, margin), zoom)
+        else:
+            # Cover every cluster cell overlapping the buffered tile so
+            # edge clusters match those of the neighbouring tiles.
+            area = _tile_area(x, y, zoom, margin + DEFAULT_RADIUS_PIXELS / DEFAULT_TILE_SIZE)
+            latitudes, longitudes, counts = _cluster_rows(area, zoom, filters)
+        tile_x, tile_y, inside = tile_pixels(latitudes, longitudes, x, y, zoom)
+        for point_x, point_y, count in zip(tile_x[inside].tolist(), tile_y[inside].tolist(), counts[inside].tolist()):
+            layer.add_point(point_x, point_y, {'cluster': count > 1, 'point_count': count})
+        return encode_tile([layer])
+
+    layer = Layer('markers')
+    current = data_cache.snapshot()
+    if current.df is None:
+        return b''
+    rows = current.df.iloc[data_cache.spatial_index(current).query(_tile_area(x, y, zoom, margin))]
+    rows = _filter_map_rows(rows, narrow=False, include_archived=include_archived, **filters)
+    markers = _marker_columns(
+        rows,
+        ('id', 'lat', 'lng', 'display_name', 'source_type', 'archived', 'trips'),
+        include_archived=include_archived,
+    )
+    tile_x, tile_y, inside = tile_pixels(markers['lat'], markers['lng'], x, y, zoom)
+    for index in np.flatnonzero(inside).tolist():
+        layer.add_point(tile_x[index], tile_y[index], {
+            'id': markers['id'][index],
+            'display_name': markers['display_name'][index],
+            'source_type': markers['source_type'][index],
+            'archived': bool(markers['archived'][index]),
+            'trips': ','.join(entry['id'] for entry in markers['trips'][index]),
+        })
+    return encode_tile([layer])
+
+
+@main.route('/tiles/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+def vector_tile(z, x, y):
+    """Return the markers of one map tile as a Mapbox Vector Tile.
+
+    Up to ``PRECLUSTER_MAX_ZOOM`` the tile has a ``clusters`` layer with
+    ``point_count`` properties (``cluster=0`` asks for markers instead);
+    deeper tiles have a ``markers`` layer with the ``id``,
+    ``display_name``, ``source_type``, ``archived`` and comma separated
+    ``trips`` IDs of each marker.  ``source_types``, ``start_date`` and
+    ``end_date`` filter like ``/api/map_data``; ``include_archived=1``
+    keeps archived markers.  Tiles are cached per data version.
+    """
+
+    versions = (data_cache.data_version, trip_store.data_version)
+
+    if z > MAX_ZOOM or x >= (1 << z) or y >= (1 << z):
+        abort(404)
+
+    filters = _map_filters(_map_data_params())
+    cluster = z <= PRECLUSTER_MAX_ZOOM and request.args.get('cluster', '1').strip().lower() not in ('0', 'false')
+    include_archived = request.args.get('include_archived', '').strip().lower() in ('1', 'true')
+
+    cache_key = ('tile', *versions, z, x, y, *_map_filters_key(filters), cluster, include_archived)
+
+    return _versioned_response(
+        _vector_tile_cache,
+        cache_key,
+        lambda: _build_vector_tile(
+            z, x, y, cluster=cluster, include_archived=include_archived, filters=filters
+        ),
+        MVT_CONTENT_TYPE,
+    )
+
+
+@main.route('/api/events', methods=['GET'])
+def api_events():
+    """Stream timeline and trip changes as Server-Sent Events.
+
+    ``timeline`` events carry the mutation (``add``, ``archive``, ``alias``,
+    ``description``, ``delete`` or ``reset``) and the affected
+    ``place_ids``; ``trips`` events carry the changed trips and the places
+    whose memberships changed.  Clients should then sync through
+    ``/api/map_data/changes``.  A client too slow to keep up receives a
+    ``reset`` event and is disconnected; the browser reconnects on its own.
+    """
+
+    subscription = _event_broker.subscribe(request.headers.get('Last-Event-ID'))
+    shared_state = bool(current_app.config.get('SHARED_STATE'))
+    timeout = EVENT_STREAM_SHARED_POLL_SECONDS if shared_state else EVENT_STREAM_HEARTBEAT_SECONDS
+
+    def generate():
+        yield 'retry: 3000\n\n'
+        idle_since = time.monotonic()
+        while True:
+            if shared_state:
+                # Changes made by other workers reach this process's
+                # listeners only when it catches up.
+                data_cache.refresh_shared_state()
+                trip_store.refresh_shared_state()
+            events = subscription.wait(timeout)
+            if events is None:
+                yield 'event: reset\ndata: {"op":"dropped"}\n\n'
+                return
+            if events:
+                yield ''.join(format_event(event) for event in events)
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= EVENT_STREAM_HEARTBEAT_SECONDS:
+                yield ': keep-alive\n\n'
+                idle_since = time.monotonic()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @main.route('/api/archived_markers', methods=['GET'])
@@ -2643,14 +3246,11 @@ def api_archived_markers():
     if df is None or df.empty:
         return jsonify([])
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
     archived_series = df.get('Archived')
     if archived_series is None:
         return jsonify([])
 
-    archived_mask = archived_series.fillna(False).astype(str).str.lower() == 'true'
-    archived_df = df[archived_mask]
+    archived_df = df[archived_series]
 
     if archived_df.empty:
         return jsonify([])
@@ -2666,11 +3266,7 @@ def api_update_alias(place_id: str):
     if df is None or df.empty or 'Place ID' not in df.columns:
         return jsonify(status='error', message='Data point not found.'), 404
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
-
-    mask = df['Place ID'] == place_id
-    if not mask.any():
+    if not data_cache.has_place(place_id):
         return jsonify(status='error', message='Data point not found.'), 404
 
     payload = request.get_json(silent=True) or {}
@@ -2687,15 +3283,13 @@ def api_update_alias(place_id: str):
             message=f'Alias must be {MAX_ALIAS_LENGTH} characters or fewer.'
         ), 400
 
-    df.loc[mask, 'Alias'] = alias_value
-    data_cache.timeline_df = df
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
+    data_cache.set_alias(place_id, alias_value)
 
     place_name = ''
-    if 'Place Name' in df.columns:
+    row = data_cache.get_place_row(place_id)
+    if row is not None and 'Place Name' in row.index:
         try:
-            place_name = str(df.loc[mask, 'Place Name'].iloc[0])
+            place_name = str(row['Place Name'])
         except Exception:
             place_name = ''
 
@@ -2719,11 +3313,7 @@ def api_update_marker_description(place_id: str):
     if df is None or df.empty or 'Place ID' not in df.columns:
         return jsonify(status='error', message='Data point not found.'), 404
 
-    data_cache.ensure_archived_column()
-    df = data_cache.timeline_df
-
-    mask = df['Place ID'] == place_id
-    if not mask.any():
+    if not data_cache.has_place(place_id):
         return jsonify(status='error', message='Data point not found.'), 404
 
     payload = request.get_json(silent=True) or {}
@@ -2746,10 +3336,7 @@ def api_update_marker_description(place_id: str):
 
     final_description = description_value if description_value.strip() else ''
 
-    df.loc[mask, 'Description'] = final_description
-    data_cache.timeline_df = df
-    data_cache.ensure_archived_column()
-    data_cache.save_timeline_data()
+    data_cache.set_description(place_id, final_description)
 
     message = (
         'Description saved successfully.'
@@ -0,0 +1,86 @@
+"""Cross-process coordination for multi-worker deployments.
+
+Each worker process (for example under ``gunicorn -w 4``) keeps its own
+in-memory copy of the timeline and trips.  With ``SHARED_STATE`` enabled,
+:mod:`app.data_cache` and :mod:`app.trip_store` guard every change with a
+:class:`SharedStamp`: an exclusive ``flock`` on ``<base>.lock`` serialises
+writers across processes, and ``<base>.version`` holds a version number that
+the writer raises after each change.  Other workers compare the number with
+the one they last saw before serving a request and, when it moved, catch up
+from disk instead of reloading everything.
+
+Only POSIX systems provide ``fcntl``; elsewhere the mode is unavailable.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+try:  # pragma: no cover - depends on the platform
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+def is_shared_state_available() -> bool:
+    """Return ``True`` when cross-process file locks are supported."""
+
+    return fcntl is not None
+
+
+class SharedStamp:
+    """File lock and version counter shared by every worker process.
+
+    :meth:`locked` is re-entrant within a thread; it yields ``True`` only for
+    the outermost acquisition so callers know when to synchronise.
+    """
+
+    def __init__(self, base_path: str):
+        self.lock_path = base_path + ".lock"
+        self.stamp_path = base_path + ".version"
+        self._thread_lock = threading.RLock()
+        self._local = threading.local()
+
+    def read(self) -> int:
+        """Return the current shared version (``0`` before the first write)."""
+
+        try:
+            with open(self.stamp_path, "r", encoding="utf-8") as handle:
+                return int(handle.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def write(self, version: int) -> None:
+        """Publish ``version``; the caller must hold the exclusive lock."""
+
+        temp_path = f"{self.stamp_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            handle.write(str(int(version)))
+        os.replace(temp_path, self.stamp_path)
+
+    @contextmanager
+    def locked(self, exclusive: bool = True) -> Iterator[bool]:
+        """Hold the cross-process lock (shared or exclusive) for a block."""
+
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth = depth + 1
+            try:
+                yield False
+            finally:
+                self._local.depth = depth
+            return
+
+        with self._thread_lock:
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            with open(self.lock_path, "a+") as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._local.depth = 1
+                try:
+                    yield True
+                finally:
+                    self._local.depth = 0
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
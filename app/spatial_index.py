@@ -0,0 +1,268 @@
+"""Spatial index over the timeline coordinates for viewport queries.
+
+:class:`GridIndex` buckets the rows of the timeline into a fixed
+latitude/longitude grid, so a bounding-box query from ``/api/map_data`` only
+visits the cells overlapping the viewport and checks the exact coordinates
+of the rows in those cells.
+
+The index is built with NumPy in one pass and is immutable, like the
+:class:`app.data_cache.TimelineSnapshot` it belongs to.
+:meth:`GridIndex.matches` lets the next snapshot reuse it when the
+coordinate columns are unchanged.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Edge length of a grid cell in degrees.
+DEFAULT_CELL_DEGREES = 0.5
+
+# Deepest zoom level accepted by viewport queries (Mapbox GL's maximum).
+MAX_ZOOM = 22
+
+# Web Mercator cannot show the poles; tiles stop at this latitude.
+MAX_MERCATOR_LATITUDE = 85.0511287798066
+
+BoundingBox = Tuple[float, float, float, float]
+
+
+def _wrap_longitude(value: float) -> float:
+    wrapped = (value + 180.0) % 360.0 - 180.0
+    return 180.0 if wrapped == -180.0 and value > 0 else wrapped
+
+
+def parse_bbox(value: Any) -> Optional[BoundingBox]:
+    """Return ``(west, south, east, north)`` parsed from ``value``.
+
+    ``value`` may be a ``"west,south,east,north"`` string or a sequence of
+    four numbers, as produced by Mapbox GL's ``map.getBounds().toArray()``
+    flattened.  Longitudes outside ``[-180, 180]`` (a map panned across the
+    antimeridian) are wrapped, so ``west`` may end up greater than ``east``.
+    Returns ``None`` when ``value`` is empty and raises :class:`ValueError`
+    when it is malformed.
+    """
+
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, str):
+        parts = value.split(",")
+    elif isinstance(value, (list, tuple)):
+        parts = list(value)
+    else:
+        raise ValueError("bbox must be 'west,south,east,north'.")
+    if len(parts) != 4:
+        raise ValueError("bbox must contain exactly four numbers.")
+
+    try:
+        west, south, east, north = (float(part) for part in parts)
+    except (TypeError, ValueError):
+        raise ValueError("bbox values must be numbers.") from None
+    if not all(math.isfinite(number) for number in (west, south, east, north)):
+        raise ValueError("bbox values must be finite numbers.")
+    if south > north:
+        raise ValueError("bbox south must not be greater than north.")
+
+    south = max(-90.0, south)
+    north = min(90.0, north)
+    if east - west >= 360.0:
+        west, east = -180.0, 180.0
+    else:
+        west, east = _wrap_longitude(west), _wrap_longitude(east)
+    return west, south, east, north
+
+
+def parse_zoom(value: Any) -> Optional[int]:
+    """Return ``value`` as a zoom level in ``[0, MAX_ZOOM]`` or ``None``.
+
+    Fractional zooms are rounded down.  Raises :class:`ValueError` for
+    values that are not numbers.
+    """
+
+    if value is None or value == "":
+        return None
+    try:
+        zoom = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("zoom must be a number.") from None
+    if not math.isfinite(zoom):
+        raise ValueError("zoom must be a finite number.")
+    return int(min(max(math.floor(zoom), 0), MAX_ZOOM))
+
+
+def tile_longitude(x: float, zoom: int) -> float:
+    """Return the longitude of the western edge of tile column ``x``."""
+
+    return x / (1 << zoom) * 360.0 - 180.0
+
+
+def tile_latitude(y: float, zoom: int) -> float:
+    """Return the latitude of the northern edge of tile row ``y``."""
+
+    n = math.pi - 2.0 * math.pi * y / (1 << zoom)
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def tile_coordinates(longitude: float, latitude: float, zoom: int) -> Tuple[float, float]:
+    """Return the fractional tile column and row containing a point."""
+
+    latitude = min(max(latitude, -MAX_MERCATOR_LATITUDE), MAX_MERCATOR_LATITUDE)
+    scale = 1 << zoom
+    x = (longitude + 180.0) / 360.0 * scale
+    radians = math.radians(latitude)
+    y = (1.0 - math.log(math.tan(radians) + 1.0 / math.cos(radians)) / math.pi) / 2.0 * scale
+    return x, y
+
+
+def tile_bounds(x: int, y: int, zoom: int) -> BoundingBox:
+    """Return ``(west, south, east, north)`` of the tile ``zoom/x/y``."""
+
+    return (
+        tile_longitude(x, zoom),
+        tile_latitude(y + 1, zoom),
+        tile_longitude(x + 1, zoom),
+        tile_latitude(y, zoom),
+    )
+
+
+def snap_bbox(bbox: BoundingBox, zoom: int) -> BoundingBox:
+    """Grow ``bbox`` outwards to the edges of the tiles it touches at ``zoom``.
+
+    Nearby viewports then share one snapped box, which keeps response
+    caches effective while the user pans a little.
+    """
+
+    west, south, east, north = bbox
+    scale = 1 << zoom
+
+    def snap_x(longitude: float, upper: bool) -> float:
+        x = (longitude + 180.0) / 360.0 * scale
+        edge = math.ceil(x) if upper else math.floor(x)
+        return tile_longitude(min(max(edge, 0), scale), zoom)
+
+    if (west, east) != (-180.0, 180.0):
+        west, east = snap_x(west, False), snap_x(east, True)
+    _, top = tile_coordinates(0.0, north, zoom)
+    _, bottom = tile_coordinates(0.0, south, zoom)
+    if north < MAX_MERCATOR_LATITUDE:
+        north = tile_latitude(max(math.floor(top), 0), zoom)
+    if south > -MAX_MERCATOR_LATITUDE:
+        south = tile_latitude(min(math.ceil(bottom), scale), zoom)
+    return west, south, east, north
+
+
+def _coordinate_arrays(df: Optional[pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+    if df is None or "Latitude" not in df.columns or "Longitude" not in df.columns:
+        empty = np.empty(0, dtype="float64")
+        return empty, empty
+    return (
+        df["Latitude"].to_numpy(dtype="float64", copy=False),
+        df["Longitude"].to_numpy(dtype="float64", copy=False),
+    )
+
+
+def _same_buffer(first: np.ndarray, second: np.ndarray) -> bool:
+    return (
+        first.shape == second.shape
+        and first.__array_interface__["data"][0] == second.__array_interface__["data"][0]
+        and first.strides == second.strides
+    )
+
+
+class GridIndex:
+    """Row positions of a timeline frame bucketed by coordinate grid cell.
+
+    Rows without valid coordinates are left out.  :meth:`query` returns
+    positions (``iloc``) into the frame the index was built from.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        # Keeping the arrays referenced also keeps their buffers (and so the
+        # addresses compared by :meth:`matches`) alive.
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.cell_degrees = float(cell_degrees)
+        self._rows = int(math.ceil(180.0 / self.cell_degrees))
+        self._columns = int(math.ceil(360.0 / self.cell_degrees))
+
+        with np.errstate(invalid="ignore"):
+            valid = (
+                np.isfinite(latitudes)
+                & np.isfinite(longitudes)
+                & (np.abs(latitudes) <= 90.0)
+                & (np.abs(longitudes) <= 180.0)
+            )
+        positions = np.flatnonzero(valid)
+        keys = self._cell_keys(latitudes[positions], longitudes[positions])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._positions = positions[order]
+
+    @classmethod
+    def from_frame(cls, df: Optional[pd.DataFrame]) -> "GridIndex":
+        latitudes, longitudes = _coordinate_arrays(df)
+        return cls(latitudes, longitudes)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def matches(self, df: Optional[pd.DataFrame]) -> bool:
+        """Return ``True`` if ``df`` has exactly the coordinates indexed here."""
+
+        latitudes, longitudes = _coordinate_arrays(df)
+        return _same_buffer(latitudes, self.latitudes) and _same_buffer(longitudes, self.longitudes)
+
+    def _cell_row(self, latitude):
+        return np.clip(
+            np.floor((np.asarray(latitude) + 90.0) / self.cell_degrees).astype(np.int64), 0, self._rows - 1
+        )
+
+    def _cell_column(self, longitude):
+        return np.clip(
+            np.floor((np.asarray(longitude) + 180.0) / self.cell_degrees).astype(np.int64), 0, self._columns - 1
+        )
+
+    def _cell_keys(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        return self._cell_row(latitudes) * self._columns + self._cell_column(longitudes)
+
+    def _query_range(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        first_row, last_row = int(self._cell_row(south)), int(self._cell_row(north))
+        first_column, last_column = int(self._cell_column(west)), int(self._cell_column(east))
+
+        rows = np.arange(first_row, last_row + 1, dtype=np.int64) * self._columns
+        starts = np.searchsorted(self._keys, rows + first_column, side="left")
+        ends = np.searchsorted(self._keys, rows + last_column, side="right")
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate([
+            self._positions[start:end] for start, end in zip(starts, ends) if end > start
+        ] or [np.empty(0, dtype=np.int64)])
+
+        latitudes = self.latitudes[candidates]
+        longitudes = self.longitudes[candidates]
+        inside = (
+            (latitudes >= south) & (latitudes <= north)
+            & (longitudes >= west) & (longitudes <= east)
+        )
+        return candidates[inside]
+
+    def query(self, bbox: BoundingBox) -> np.ndarray:
+        """Return the sorted positions of rows inside ``bbox`` (edges included).
+
+        ``bbox`` is ``(west, south, east, north)``; a ``west`` greater than
+        ``east`` denotes a box crossing the antimeridian.
+        """
+
+        west, south, east, north = bbox
+        if west > east:
+            found = np.concatenate([
+                self._query_range(west, south, 180.0, north),
+                self._query_range(-180.0, south, east, north),
+            ])
+        else:
+            found = self._query_range(west, south, east, north)
+        return np.sort(found)
@@ -0,0 +1,432 @@
+"""Embedded SQLite database for the timeline and trips.
+
+With ``TIMELINE_STORAGE=sqlite`` the master timeline and every trip live in
+one SQLite file instead of snapshot files.  Each timeline mutation updates
+only the affected rows (see
+:class:`app.timeline_storage.SqliteTimelineStorage`), trips are stored row by
+row with their places in a ``trip_places`` join table, and the columns the
+map filters on are indexed so :meth:`SqliteDatabase.query_timeline_place_ids`
+can answer a filter without scanning the whole timeline.
+
+Tables
+------
+``timeline``
+    One row per timeline entry, in timeline order (``rowid``).  Columns
+    mirror the dataframe; dates are stored as ISO 8601 text so they compare
+    correctly as strings, ``Archived`` as ``0``/``1``.  Indexed on
+    ``Place ID``, ``Source Type``, ``Archived`` and ``Start Date``.
+``trips`` / ``trip_places``
+    Trip metadata (JSON) and its ordered place IDs, indexed by place ID.
+``meta``
+    Small key/value settings such as the timeline generation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TIMELINE_TABLE = "timeline"
+
+# Columns the map filters on; each gets its own index.
+INDEXED_COLUMNS = ("Place ID", "Source Type", "Archived", "Start Date")
+
+# Stay well below SQLite's bound parameter limit.
+_PARAMETER_CHUNK = 500
+
+
+def _quote(name: str) -> str:
+    """Return ``name`` quoted as an SQL identifier."""
+
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def format_timestamp(value: Any) -> Optional[str]:
+    """Return ``value`` as the sortable text stored in date columns."""
+
+    timestamp = pd.to_datetime(value, errors="coerce")
+    if pd.isna(timestamp):
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return np.datetime_as_string(np.datetime64(timestamp.to_datetime64(), "us"))
+
+
+def _column_type(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series.dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _column_values(series: pd.Series) -> List[Any]:
+    """Return the values of ``series`` converted to SQLite types."""
+
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_convert(None)
+        values = np.datetime_as_string(series.to_numpy(dtype="datetime64[us]"))
+        return [None if value == "NaT" else value for value in values.tolist()]
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.astype(int).tolist()
+
+    values = series.astype(object)
+    values = values.where(values.notna(), None).tolist()
+    return [
+        value if value is None or isinstance(value, (str, int, float)) else str(value)
+        for value in values
+    ]
+
+
+class SqliteDatabase:
+    """Thread-safe access to the WanderLog SQLite database.
+
+    A single connection is shared by the threads of a process and guarded
+    by a lock, like :class:`app.utils.geocoding.GeocodeCache`.  Worker
+    processes open their own connections; SQLite's WAL mode lets them read
+    while one of them writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Transactions are managed explicitly by :meth:`_transaction`.
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS trips ("
+                " id TEXT PRIMARY KEY,"
+                " name TEXT NOT NULL,"
+                " created_at TEXT,"
+                " updated_at TEXT,"
+                " data TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS trip_places ("
+                " trip_id TEXT NOT NULL REFERENCES trips(id) ON DELETE CASCADE,"
+                " place_id TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " PRIMARY KEY (trip_id, place_id))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trip_places_place_id ON trip_places(place_id)"
+            )
+            self._connection = connection
+        return self._connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block as one write transaction, rolled back on error."""
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # -- meta ---------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, connection: sqlite3.Connection, key: str, value: Any) -> None:
+        connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._transaction() as connection:
+            self._set_meta(connection, key, value)
+
+    # -- timeline -------------------------------------------------------------
+
+    def _columns(self, connection: sqlite3.Connection) -> List[str]:
+        """Return the timeline table's columns (empty when it is missing).
+
+        Not cached: another worker process may have altered the table.
+        """
+
+        rows = connection.execute(f"PRAGMA table_info({_quote(TIMELINE_TABLE)})").fetchall()
+        return [row[1] for row in rows]
+
+    def has_timeline(self) -> bool:
+        """Return ``True`` once a timeline has been stored."""
+
+        if not os.path.exists(self.path):
+            return False
+        with self._lock:
+            return bool(self._columns(self._connect()))
+
+    def timeline_generation(self) -> int:
+        """Return a counter raised by every full :meth:`save_timeline`."""
+
+        return int(self.get_meta("timeline_generation") or 0)
+
+    def _create_indexes(self, connection: sqlite3.Connection) -> None:
+        columns = self._columns(connection)
+        for column in INDEXED_COLUMNS:
+            if column not in columns:
+                continue
+            index_name = "idx_timeline_" + column.lower().replace(" ", "_")
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(index_name)}"
+                f" ON {_quote(TIMELINE_TABLE)} ({_quote(column)})"
+            )
+
+    def _add_missing_columns(self, connection: sqlite3.Connection, df: pd.DataFrame) -> None:
+        columns = self._columns(connection)
+        if not columns:
+            definitions = ", ".join(
+                f"{_quote(column)} {_column_type(df[column])}" for column in df.columns
+            )
+            connection.execute(f"CREATE TABLE {_quote(TIMELINE_TABLE)} ({definitions})")
+            self._create_indexes(connection)
+            return
+
+        missing = [column for column in df.columns if column not in columns]
+        for column in missing:
+            connection.execute(
+                f"ALTER TABLE {_quote(TIMELINE_TABLE)}"
+                f" ADD COLUMN {_quote(column)} {_column_type(df[column])}"
+            )
+        if missing:
+            self._create_indexes(connection)
+
+    def _insert_rows(self, connection: sqlite3.Connection, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        columns = list(df.columns)
+        placeholders = ", ".join("?" * len(columns))
+        names = ", ".join(_quote(column) for column in columns)
+        values = zip(*(_column_values(df[column]) for column in columns))
+        connection.executemany(
+            f"INSERT INTO {_quote(TIMELINE_TABLE)} ({names}) VALUES ({placeholders})",
+            values,
+        )
+
+    def save_timeline(self, df: pd.DataFrame) -> None:
+        """Replace the stored timeline with ``df`` in one transaction."""
+
+        with self._transaction() as connection:
+            connection.execute(f"DROP TABLE IF EXISTS {_quote(TIMELINE_TABLE)}")
+            self._add_missing_columns(connection, df)
+            self._insert_rows(connection, df)
+            # Statistics let the planner pick the most selective index (for
+            # example a narrow date range over a common source type).
+            connection.execute(f"ANALYZE {_quote(TIMELINE_TABLE)}")
+            generation = connection.execute(
+                "SELECT value FROM meta WHERE key = 'timeline_generation'"
+            ).fetchone()
+            self._set_meta(connection, "timeline_generation", int(generation[0] if generation else 0) + 1)
+
+    def load_timeline(self) -> pd.DataFrame:
+        """Return the stored timeline in its original row order."""
+
+        with self._lock:
+            connection = self._connect()
+            columns = self._columns(connection)
+            if not columns:
+                raise OSError(f"No timeline stored in {self.path}")
+            names = ", ".join(_quote(column) for column in columns)
+            return pd.read_sql_query(
+                f"SELECT {names} FROM {_quote(TIMELINE_TABLE)} ORDER BY rowid", connection
+            )
+
+    def append_timeline_rows(self, df: pd.DataFrame) -> None:
+        """Append ``df`` after the stored rows, adding any new columns."""
+
+        if df is None or df.empty:
+            return
+        with self._transaction() as connection:
+            self._add_missing_columns(connection, df)
+            self._insert_rows(connection, df)
+
+    def update_timeline_values(self, place_ids: Sequence[str], column: str, value: Any) -> None:
+        """Set ``column`` to ``value`` on every row of ``place_ids``."""
+
+        if isinstance(value, bool):
+            value = int(value)
+        with self._transaction() as connection:
+            if column not in self._columns(connection):
+                connection.execute(
+                    f"ALTER TABLE {_quote(TIMELINE_TABLE)} ADD COLUMN {_quote(column)}"
+                    f" {'INTEGER' if isinstance(value, int) else 'TEXT'}"
+                )
+            for chunk in _chunks(place_ids):
+                connection.execute(
+                    f"UPDATE {_quote(TIMELINE_TABLE)} SET {_quote(column)} = ?"
+                    f" WHERE {_quote('Place ID')} IN ({', '.join('?' * len(chunk))})",
+                    [value, *chunk],
+                )
+
+    def delete_timeline_places(self, place_ids: Sequence[str]) -> None:
+        """Delete every row whose ``Place ID`` is in ``place_ids``."""
+
+        with self._transaction() as connection:
+            for chunk in _chunks(place_ids):
+                connection.execute(
+                    f"DELETE FROM {_quote(TIMELINE_TABLE)}"
+                    f" WHERE {_quote('Place ID')} IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+
+    def query_timeline_place_ids(
+        self,
+        *,
+        source_types: Optional[Sequence[str]] = None,
+        start: Any = None,
+        end: Any = None,
+        include_archived: bool = True,
+    ) -> Optional[List[str]]:
+        """Return the ``Place ID`` of every row matching the filters.
+
+        ``source_types`` of ``None`` matches every type; ``start`` and
+        ``end`` are inclusive bounds on ``Start Date``.  IDs of duplicated
+        rows may be returned more than once.  Returns ``None`` when the
+        result cannot be expressed as place IDs (rows without one match).
+        """
+
+        conditions: List[str] = []
+        parameters: List[Any] = []
+
+        with self._lock:
+            connection = self._connect()
+            columns = self._columns(connection)
+            if "Place ID" not in columns:
+                return None
+
+            if source_types is not None and "Source Type" in columns:
+                if not source_types:
+                    return []
+                conditions.append(
+                    f"{_quote('Source Type')} IN ({', '.join('?' * len(source_types))})"
+                )
+                parameters.extend(source_types)
+            if not include_archived and "Archived" in columns:
+                conditions.append(f"COALESCE({_quote('Archived')}, 0) = 0")
+            if "Start Date" in columns:
+                for bound, operator in ((start, ">="), (end, "<=")):
+                    text = format_timestamp(bound) if bound is not None else None
+                    if text is not None:
+                        conditions.append(f"{_quote('Start Date')} {operator} ?")
+                        parameters.append(text)
+
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            place_ids = [
+                row[0]
+                for row in connection.execute(
+                    f"SELECT {_quote('Place ID')} FROM {_quote(TIMELINE_TABLE)}{where}",
+                    parameters,
+                )
+            ]
+
+        if any(not isinstance(place_id, str) for place_id in place_ids):
+            return None
+        return place_ids
+
+    # -- trips ----------------------------------------------------------------
+
+    def load_trips(self) -> List[Dict[str, Any]]:
+        """Return every stored trip as a dictionary, in creation order."""
+
+        with self._lock:
+            connection = self._connect()
+            trips = [
+                dict(json.loads(data), id=trip_id, place_ids=[])
+                for trip_id, data in connection.execute("SELECT id, data FROM trips ORDER BY rowid")
+            ]
+            by_id = {trip["id"]: trip for trip in trips}
+            for trip_id, place_id in connection.execute(
+                "SELECT trip_id, place_id FROM trip_places ORDER BY trip_id, position"
+            ):
+                trip = by_id.get(trip_id)
+                if trip is not None:
+                    trip["place_ids"].append(place_id)
+        return trips
+
+    def write_trips(
+        self,
+        trips: Iterable[Dict[str, Any]] = (),
+        removed_ids: Iterable[str] = (),
+        *,
+        replace: bool = False,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Insert or update ``trips`` and delete ``removed_ids`` atomically.
+
+        With ``replace`` every other stored trip is deleted first, so the
+        stored order becomes the order of ``trips``.  ``meta`` entries are
+        written in the same transaction.
+        """
+
+        with self._transaction() as connection:
+            if replace:
+                connection.execute("DELETE FROM trip_places")
+                connection.execute("DELETE FROM trips")
+            for trip_id in removed_ids:
+                connection.execute("DELETE FROM trip_places WHERE trip_id = ?", (trip_id,))
+                connection.execute("DELETE FROM trips WHERE id = ?", (trip_id,))
+            for trip in trips:
+                data = {key: value for key, value in trip.items() if key != "place_ids"}
+                connection.execute(
+                    "INSERT INTO trips (id, name, created_at, updated_at, data)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET name = excluded.name,"
+                    " created_at = excluded.created_at, updated_at = excluded.updated_at,"
+                    " data = excluded.data",
+                    (
+                        trip["id"],
+                        trip.get("name") or "",
+                        trip.get("created_at"),
+                        trip.get("updated_at"),
+                        json.dumps(data),
+                    ),
+                )
+                connection.execute("DELETE FROM trip_places WHERE trip_id = ?", (trip["id"],))
+                connection.executemany(
+                    "INSERT INTO trip_places (trip_id, place_id, position) VALUES (?, ?, ?)",
+                    (
+                        (trip["id"], place_id, position)
+                        for position, place_id in enumerate(trip.get("place_ids") or [])
+                    ),
+                )
+            for key, value in (meta or {}).items():
+                self._set_meta(connection, key, value)
+
+
+def _chunks(values: Sequence[Any]) -> Iterator[List[Any]]:
+    values = list(values)
+    for start in range(0, len(values), _PARAMETER_CHUNK):
+        yield values[start:start + _PARAMETER_CHUNK]
@@ -28,6 +28,12 @@ const MAPBOX_UNCLUSTERED_LAYER_ID = 'wanderlog-marker-points-layer';
 const MAPBOX_TRIP_SOURCE_ID = 'wanderlog-trip-source';
 const MAPBOX_TRIP_LAYER_ID = 'wanderlog-trip-layer';
 const MAPBOX_CLUSTER_RADIUS = 70;
+const MAPBOX_SERVER_CLUSTER_SOURCE_ID = 'wanderlog-server-clusters';
+const MAPBOX_SERVER_CLUSTER_LAYER_ID = 'wanderlog-server-clusters-layer';
+const MAPBOX_SERVER_CLUSTER_COUNT_LAYER_ID = 'wanderlog-server-cluster-count';
+// Deepest zoom clustered by /api/clusters (PRECLUSTER_MAX_ZOOM on the
+// server).  Up to it the browser does not cluster the markers itself.
+const SERVER_CLUSTER_MAX_ZOOM = 10;
 const MAP_STYLE_MODE_DAY = 'day';
 const MAP_STYLE_MODE_NIGHT = 'night';
 const MAP_STYLE_STORAGE_KEY = 'wanderlog.map.style';
@@ -210,6 +216,22 @@ let isClusteringEnabled = false;
 let activePopup = null;
 let loadMarkersAbortController = null;
 let loadMarkersRequestToken = 0;
+// Markers last loaded for a filter combination and their data version, so
+// later reloads only fetch what changed (see fetchMarkerChanges).
+let markerSyncState = { key: null, version: null, markers: [] };
+// Filters of the last marker load, the /api/clusters request currently
+// shown and the marker features not yet handed to the hidden sources.
+let markerFilterParams = null;
+let serverClusterKey = null;
+let serverClusterAbortController = null;
+let pendingMarkerSourceFeatures = null;
+// Server-Sent Events stream of timeline and trip changes (see
+// initialiseLiveUpdates) and the refresh it has scheduled.
+const LIVE_UPDATES_ENDPOINT = '/api/events';
+const LIVE_UPDATE_DELAY_MS = 400;
+let liveUpdatesSource = null;
+let liveUpdateTimer = null;
+let liveUpdateNeedsTrips = false;
 let googleAuthRefreshHandler = null;
 let googleAuthRequestToken = 0;
 let googlePhotosPickerButton = null;
@@ -343,6 +365,8 @@ const TRIP_LOCATION_SORT_FIELD_DATE = 'date';
 const TRIP_LOCATION_SORT_FIELD_NAME = 'name';
 const MASTER_DATA_OVERLAY_ID = 'masterDataOverlay';
 const MASTER_DATA_API_ENDPOINT = '/api/master_timeline';
+const MASTER_DATA_PAGE_SIZE = 5000;
+const MASTER_DATA_MAX_RESTARTS = 3;
 const MASTER_DATA_EMPTY_DEFAULT_MESSAGE = 'No master data found. Import your Google Timeline to populate this table.';
 const MASTER_DATA_EMPTY_FILTER_MESSAGE = 'No rows match your current search.';
 
@@ -2219,11 +2243,92 @@ function initialiseMapboxMarkerLayers() {
         },
     });
 
-    map.on('mouseenter', MAPBOX_CLUSTER_LAYER_ID, () => {
-        map.getCanvas().style.cursor = 'pointer';
+    map.addSource(MAPBOX_SERVER_CLUSTER_SOURCE_ID, {
+        type: 'geojson',
+        data: { type: 'FeatureCollection', features: [] },
     });
-    map.on('mouseleave', MAPBOX_CLUSTER_LAYER_ID, () => {
-        map.getCanvas().style.cursor = '';
+
+    map.addLayer({
+        id: MAPBOX_SERVER_CLUSTER_LAYER_ID,
+        type: 'circle',
+        source: MAPBOX_SERVER_CLUSTER_SOURCE_ID,
+        layout: { visibility: 'none' },
+        paint: {
+            'circle-color': [
+                'step',
+                ['get', 'point_count'],
+                '#15803d',
+                2,
+                '#14532d',
+                25,
+                '#166534',
+                50,
+                '#1f6f43',
+                200,
+                '#254e2c',
+            ],
+            'circle-radius': [
+                'step',
+                ['get', 'point_count'],
+                6,
+                2,
+                16,
+                25,
+                22,
+                50,
+                28,
+                200,
+                34,
+            ],
+            'circle-opacity': 0.85,
+            'circle-stroke-color': '#fff',
+            'circle-stroke-width': ['case', ['>', ['get', 'point_count'], 1], 0, 1.5],
+        },
+    });
+
+    map.addLayer({
+        id: MAPBOX_SERVER_CLUSTER_COUNT_LAYER_ID,
+        type: 'symbol',
+        source: MAPBOX_SERVER_CLUSTER_SOURCE_ID,
+        filter: ['>', ['get', 'point_count'], 1],
+        layout: {
+            'text-field': ['number-format', ['get', 'point_count'], { locale: 'en', 'max-fraction-digits': 0 }],
+            'text-font': ['Open Sans Semibold', 'Arial Unicode MS Bold'],
+            'text-size': 14,
+            'visibility': 'none',
+        },
+        paint: {
+            'text-color': '#fff',
+        },
+    });
+
+    // Sources were (re)created empty, so everything must be sent again.
+    serverClusterKey = null;
+    pendingMarkerSourceFeatures = null;
+
+    [MAPBOX_CLUSTER_LAYER_ID, MAPBOX_SERVER_CLUSTER_LAYER_ID].forEach((layerId) => {
+        map.on('mouseenter', layerId, () => {
+            map.getCanvas().style.cursor = 'pointer';
+        });
+        map.on('mouseleave', layerId, () => {
+            map.getCanvas().style.cursor = '';
+        });
+    });
+
+    map.on('click', MAPBOX_SERVER_CLUSTER_LAYER_ID, (event) => {
+        const feature = event.features && event.features[0];
+        if (!feature) { return; }
+        // Zoom in two levels, and at least far enough for the browser to
+        // show the individual markers of small clusters.
+        const pointCount = Number(feature.properties && feature.properties.point_count) || 1;
+        const targetZoom = pointCount > 25
+            ? map.getZoom() + 2
+            : Math.max(map.getZoom() + 2, SERVER_CLUSTER_MAX_ZOOM + 1);
+        map.easeTo({
+            center: feature.geometry.coordinates,
+            zoom: Math.min(targetZoom, MAP_TILE_MAX_ZOOM),
+            duration: 600,
+        });
     });
 
     registerMarkerLayerInteractions();
@@ -2262,6 +2367,70 @@ function initialiseMapboxMarkerLayers() {
 
 }
 
+// Apply the changes since the last load to the cached markers.  Returns
+// ``null`` when the server cannot list them and a full reload is needed.
+async function fetchMarkerChanges(payload, signal) {
+    try {
+        const response = await fetch('/api/map_data/changes', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...payload, since: markerSyncState.version }),
+            signal,
+        });
+        if (!response.ok) { return null; }
+        const changes = await response.json();
+        if (!changes || changes.reset) { return null; }
+
+        const updated = Array.isArray(changes.markers) ? changes.markers : [];
+        const replaced = new Set(Array.isArray(changes.removed) ? changes.removed : []);
+        updated.forEach((marker) => replaced.add(marker.id));
+        const markers = markerSyncState.markers
+            .filter((marker) => !replaced.has(marker.id))
+            .concat(updated);
+        return { markers, version: changes.version };
+    } catch (error) {
+        if (error && error.name === 'AbortError') { throw error; }
+        console.warn('Failed to fetch marker changes; reloading all markers.', error);
+        return null;
+    }
+}
+
+function decodeFloat32Column(encoded) {
+    const binary = atob(encoded || '');
+    const bytes = new Uint8Array(binary.length);
+    for (let index = 0; index < binary.length; index += 1) {
+        bytes[index] = binary.charCodeAt(index);
+    }
+    const view = new DataView(bytes.buffer);
+    const values = new Array(bytes.length / 4);
+    for (let index = 0; index < values.length; index += 1) {
+        values[index] = view.getFloat32(index * 4, true);
+    }
+    return values;
+}
+
+// Convert a ``format=columnar`` /api/map_data payload into marker objects.
+function markersFromColumnarPayload(payload) {
+    if (!payload || payload.format !== 'columnar') {
+        return Array.isArray(payload) ? payload : [];
+    }
+    const fields = Array.isArray(payload.fields) ? payload.fields : [];
+    const encoding = payload.encoding || {};
+    const columns = fields.map((field) => {
+        const column = payload.columns ? payload.columns[field] : null;
+        return encoding[field] === 'float32-base64' ? decodeFloat32Column(column) : (column || []);
+    });
+    const markers = new Array(payload.count || 0);
+    for (let row = 0; row < markers.length; row += 1) {
+        const marker = {};
+        fields.forEach((field, index) => {
+            marker[field] = columns[index][row];
+        });
+        markers[row] = marker;
+    }
+    return markers;
+}
+
 function buildMarkerFeatures(markerRecords) {
     const features = [];
     markerFeatureIdLookup.clear();
@@ -2320,19 +2489,33 @@ function buildMarkerFeatures(markerRecords) {
 }
 
 function setMarkerSourceData(features) {
+    pendingMarkerSourceFeatures = { features, cluster: true, unclustered: true };
+    flushMarkerSourceData();
+}
+
+// Hand the pending marker features to the sources that are currently shown.
+// Hidden sources receive them once they become visible, so at low zoom the
+// clustered source does not have to index every marker (see
+// isServerClusteringActive).
+function flushMarkerSourceData() {
+    const pending = pendingMarkerSourceFeatures;
+    if (!pending) { return; }
     const clusterSource = getMarkerSource();
     const unclusteredSource = getUnclusteredSource();
     if (!clusterSource && !unclusteredSource) {
         console.warn('Marker sources are not ready; skipping data update.');
         return;
     }
-    if (clusterSource) {
+    const { features } = pending;
+    const clusteredVisible = isClusteringEnabled && !isTripMapModeActive;
+    if (clusterSource && pending.cluster && clusteredVisible && !isServerClusteringActive()) {
         clusterSource.setData({
             type: 'FeatureCollection',
             features,
         });
+        pending.cluster = false;
     }
-    if (unclusteredSource) {
+    if (unclusteredSource && pending.unclustered && !clusteredVisible) {
         const unclusteredFeatures = features
             .map((feature) => {
                 const coords = feature.geometry && Array.isArray(feature.geometry.coordinates)
@@ -2354,9 +2537,81 @@ function setMarkerSourceData(features) {
             type: 'FeatureCollection',
             features: unclusteredFeatures,
         });
+        pending.unclustered = false;
+    }
+    if (!pending.cluster && !pending.unclustered) {
+        pendingMarkerSourceFeatures = null;
+    }
+}
+
+// Below SERVER_CLUSTER_MAX_ZOOM clustered maps show /api/clusters results.
+function isServerClusteringActive() {
+    return Boolean(map)
+        && isClusteringEnabled
+        && !isTripMapModeActive
+        && Math.floor(map.getZoom()) <= SERVER_CLUSTER_MAX_ZOOM;
+}
+
+function serverClusterUrl() {
+    const params = new URLSearchParams();
+    params.set('zoom', String(Math.floor(map.getZoom())));
+    const bounds = map.getBounds();
+    if (bounds && map.getZoom() >= 3) {
+        params.set('bbox', [
+            bounds.getWest(),
+            bounds.getSouth(),
+            bounds.getEast(),
+            bounds.getNorth(),
+        ].map((value) => value.toFixed(6)).join(','));
+    }
+    const filters = markerFilterParams || {};
+    if (Array.isArray(filters.source_types)) {
+        if (filters.source_types.length === 0) {
+            params.append('source_types', '');
+        }
+        filters.source_types.forEach((value) => params.append('source_types', value));
+    }
+    if (filters.start_date) { params.set('start_date', filters.start_date); }
+    if (filters.end_date) { params.set('end_date', filters.end_date); }
+    return `/api/clusters?${params.toString()}`;
+}
+
+async function loadServerClusters() {
+    if (!isServerClusteringActive() || !markerFilterParams) { return; }
+    const source = map.getSource(MAPBOX_SERVER_CLUSTER_SOURCE_ID);
+    if (!source) { return; }
+    const url = serverClusterUrl();
+    if (url === serverClusterKey) { return; }
+
+    if (serverClusterAbortController) {
+        serverClusterAbortController.abort();
+    }
+    const abortController = new AbortController();
+    serverClusterAbortController = abortController;
+    try {
+        const response = await fetch(url, { signal: abortController.signal });
+        if (!response.ok) {
+            throw new Error(`Failed to load marker clusters. (${response.status})`);
+        }
+        const collection = await response.json();
+        source.setData(collection);
+        serverClusterKey = url;
+    } catch (error) {
+        if (error && error.name === 'AbortError') { return; }
+        console.warn('Failed to load server-side marker clusters', error);
+    } finally {
+        if (serverClusterAbortController === abortController) {
+            serverClusterAbortController = null;
+        }
     }
 }
 
+function handleMarkerViewChange() {
+    applyClusterLayerVisibility();
+    flushMarkerSourceData();
+    loadServerClusters();
+}
+
 function getActiveTripMarkerIds() {
     const selectedTrip = getSelectedTripContext();
     const selectedTripId = selectedTrip ? selectedTrip.id : '';
@@ -2540,8 +2795,11 @@ function setLayerVisibility(layerId, visible) {
 
 function applyClusterLayerVisibility() {
     if (!map) { return; }
-    const showClusters = isClusteringEnabled && !isTripMapModeActive;
+    const showServerClusters = isServerClusteringActive();
+    const showClusters = isClusteringEnabled && !isTripMapModeActive && !showServerClusters;
     const showUnclustered = !isClusteringEnabled || isTripMapModeActive;
+    setLayerVisibility(MAPBOX_SERVER_CLUSTER_LAYER_ID, showServerClusters);
+    setLayerVisibility(MAPBOX_SERVER_CLUSTER_COUNT_LAYER_ID, showServerClusters);
     setLayerVisibility(MAPBOX_CLUSTER_LAYER_ID, showClusters);
     setLayerVisibility(MAPBOX_CLUSTER_COUNT_LAYER_ID, showClusters);
     setLayerVisibility(MAPBOX_CLUSTER_SYMBOL_LAYER_ID, showClusters);
@@ -2552,7 +2810,7 @@ function setClusteringEnabled(enabled) {
     pendingClusterToggleState = enabled;
     isClusteringEnabled = enabled;
     if (!map) { return; }
-    applyClusterLayerVisibility();
+    handleMarkerViewChange();
 }
 
 function registerMarkerLayerInteractions() {
@@ -3525,27 +3783,45 @@ async function loadMasterData() {
     setMasterDataLoading(true);
 
     try {
-        const response = await fetch(MASTER_DATA_API_ENDPOINT, {
-            headers: {
-                Accept: 'application/json',
-            },
-        });
-        const payload = await response.json().catch(() => ({}));
-        if (!response.ok) {
-            const message = payload && payload.message ? payload.message : 'Failed to load the master database.';
-            throw new Error(message);
-        }
+        // Load page by page so the table renders while the rest arrives.
+        let cursor = null;
+        let restarts = 0;
+        masterDataState.rows = [];
+        while (true) {
+            const params = new URLSearchParams({ limit: String(MASTER_DATA_PAGE_SIZE) });
+            if (cursor) { params.set('cursor', cursor); }
+            const response = await fetch(`${MASTER_DATA_API_ENDPOINT}?${params.toString()}`, {
+                headers: {
+                    Accept: 'application/json',
+                },
+            });
+            const payload = await response.json().catch(() => ({}));
+            if (response.status === 409 && restarts < MASTER_DATA_MAX_RESTARTS) {
+                // The timeline changed between pages; start over.
+                restarts += 1;
+                cursor = null;
+                masterDataState.rows = [];
+                continue;
+            }
+            if (!response.ok) {
+                const message = payload && payload.message ? payload.message : 'Failed to load the master database.';
+                throw new Error(message);
+            }
 
-        masterDataState.columns = Array.isArray(payload.columns) ? payload.columns : [];
-        masterDataState.rows = Array.isArray(payload.rows) ? payload.rows : [];
-        if (payload.generated_at) {
-            const parsed = new Date(payload.generated_at);
-            masterDataState.lastLoadedAt = Number.isNaN(parsed.getTime()) ? new Date() : parsed;
-        } else {
-            masterDataState.lastLoadedAt = new Date();
-        }
+            masterDataState.columns = Array.isArray(payload.columns) ? payload.columns : [];
+            const pageRows = Array.isArray(payload.rows) ? payload.rows : [];
+            masterDataState.rows = masterDataState.rows.concat(pageRows);
+            if (payload.generated_at) {
+                const parsed = new Date(payload.generated_at);
+                masterDataState.lastLoadedAt = Number.isNaN(parsed.getTime()) ? new Date() : parsed;
+            } else {
+                masterDataState.lastLoadedAt = new Date();
+            }
+            cursor = payload.next_cursor || null;
 
-        filterMasterDataRows();
+            filterMasterDataRows();
+            if (!cursor) { break; }
+        }
     } catch (error) {
         console.error('Failed to load master data', error);
         showMasterDataError(error.message || 'Failed to load the master database.');
@@ -7092,6 +7368,35 @@ async function loadTripDetailData(tripId, requestId) {
     }
 }
 
+// Coalesce bursts of change events into one marker (and trips) refresh.
+function scheduleLiveUpdate(includeTrips) {
+    liveUpdateNeedsTrips = liveUpdateNeedsTrips || includeTrips;
+    if (liveUpdateTimer) { return; }
+    liveUpdateTimer = setTimeout(async () => {
+        const refreshTrips = liveUpdateNeedsTrips;
+        liveUpdateTimer = null;
+        liveUpdateNeedsTrips = false;
+        if (refreshTrips) {
+            await loadTripsPanelData();
+        }
+        await loadMarkers();
+    }, LIVE_UPDATE_DELAY_MS);
+}
+
+function initialiseLiveUpdates() {
+    if (liveUpdatesSource || typeof EventSource === 'undefined') { return; }
+    liveUpdatesSource = new EventSource(LIVE_UPDATES_ENDPOINT);
+    let connectedBefore = false;
+    liveUpdatesSource.addEventListener('open', () => {
+        // Changes may have been missed while disconnected.
+        if (connectedBefore) { scheduleLiveUpdate(true); }
+        connectedBefore = true;
+    });
+    liveUpdatesSource.addEventListener('timeline', () => scheduleLiveUpdate(false));
+    liveUpdatesSource.addEventListener('trips', () => scheduleLiveUpdate(true));
+    liveUpdatesSource.addEventListener('reset', () => scheduleLiveUpdate(true));
+}
+
 async function loadTripsPanelData() {
     if (!tripListState.initialised) { initTripsPanel(); }
     setTripListLoading(true);
@@ -7571,7 +7876,7 @@ function activateTripMapMode() {
     tripMarkerLookup.clear();
 
     setLayerVisibility(MAPBOX_TRIP_LAYER_ID, true);
-    applyClusterLayerVisibility();
+    handleMarkerViewChange();
 
     return true;
 }
@@ -7589,7 +7894,7 @@ function deactivateTripMapMode(options = {}) {
     }
     tripMarkerLookup.clear();
     setLayerVisibility(MAPBOX_TRIP_LAYER_ID, false);
-    applyClusterLayerVisibility();
+    handleMarkerViewChange();
 
     if (map && previousMapView) {
         try {
@@ -7882,6 +8187,7 @@ async function initMap() {
 
     map.on('moveend', persistMapViewState);
     map.on('zoomend', persistMapViewState);
+    map.on('moveend', handleMarkerViewChange);
 }
 
 async function loadMarkers() {
@@ -7924,28 +8230,48 @@ async function loadMarkers() {
         document.querySelectorAll('#sourceTypeFilters input:checked')
     ).map((cb) => cb.value);
 
-    const payload = { source_types: checked };
+    // The columnar format omits the repeated keys of every marker.
+    const payload = { source_types: checked, format: 'columnar' };
     if (startDate) { payload.start_date = startDate; }
     if (endDate) { payload.end_date = endDate; }
 
     persistFilterState(startDate, endDate, checked);
 
     try {
-        const response = await fetch('/api/map_data', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(payload),
-            signal: abortController.signal,
-        });
-
-        if (!response.ok) {
-            throw new Error(`Failed to load map data. (${response.status})`);
+        const syncKey = JSON.stringify(payload);
+        let markers = null;
+        let version = null;
+        if (markerSyncState.key === syncKey && markerSyncState.version) {
+            const changes = await fetchMarkerChanges(payload, abortController.signal);
+            if (changes) {
+                markers = changes.markers;
+                version = changes.version;
+            }
         }
 
-        const markers = await response.json();
+        if (!markers) {
+            const response = await fetch('/api/map_data', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload),
+                signal: abortController.signal,
+            });
+
+            if (!response.ok) {
+                throw new Error(`Failed to load map data. (${response.status})`);
+            }
+
+            markers = markersFromColumnarPayload(await response.json());
+            version = response.headers.get('X-Data-Version');
+        }
         if (requestToken !== loadMarkersRequestToken) {
             return;
         }
+        markerSyncState = { key: syncKey, version, markers };
+        markerFilterParams = { source_types: checked, start_date: startDate, end_date: endDate };
+        // The data or the filters may have changed; fetch fresh clusters.
+        serverClusterKey = null;
+        loadServerClusters();
 
         const markerSource = getMarkerSource();
         if (!markerSource) {
@@ -7984,6 +8310,31 @@ async function loadMarkers() {
     }
 }
 
+const IMPORT_JOB_POLL_INTERVAL_MS = 1000;
+
+function describeImportJob(job) {
+    if (!job) { return 'Importing timeline...'; }
+    if (job.state === 'queued') { return `Waiting to import ${job.filename}...`; }
+    const failed = job.places_failed ? `, ${job.places_failed} lookups failed` : '';
+    return `Importing ${job.filename}: ${job.segments_parsed} segments parsed, `
+        + `${job.places_geocoded} places geocoded${failed}`;
+}
+
+async function waitForImportJob(jobId) {
+    while (true) {
+        await new Promise((resolve) => setTimeout(resolve, IMPORT_JOB_POLL_INTERVAL_MS));
+        const response = await fetch(`/api/import_jobs/${encodeURIComponent(jobId)}`);
+        const result = await response.json();
+        if (!response.ok || result.status === 'error') {
+            throw new Error(result.message || 'Failed to check import progress.');
+        }
+
+        const job = result.job;
+        if (job.state === 'completed' || job.state === 'failed') { return job; }
+        showStatus(describeImportJob(job));
+    }
+}
+
 async function updateMap() {
     const fileInput = document.getElementById('timelineFile');
     if (!fileInput.files.length) { showStatus('No file selected!', true); return; }
@@ -7993,9 +8344,17 @@ async function updateMap() {
     try {
         const response = await fetch('/api/update_timeline', { method: 'POST', body: formData });
         const result = await response.json();
+        if (result.status !== 'accepted') {
+            hideLoading();
+            showStatus(result.message, result.status === 'error');
+            return;
+        }
+
+        showStatus(describeImportJob(result.job));
+        const job = await waitForImportJob(result.job_id);
         hideLoading();
-        showStatus(result.message, result.status === 'error');
-        if (result.status === 'success') { loadMarkers(); }
+        showStatus(job.message, job.state === 'failed');
+        if (job.state === 'completed') { loadMarkers(); }
     } catch(err) {
         hideLoading();
         showStatus('Error: ' + err.message, true);
@@ -9449,6 +9808,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     initManageModeControls();
     initTripsPanel();
     await loadTripsPanelData();
+    initialiseLiveUpdates();
     const storedMapState = loadStoredMapState();
     const storedFilterState = (storedMapState && typeof storedMapState.filters === 'object')
         ? storedMapState.filters
@@ -0,0 +1,197 @@
+"""Append-only journal of timeline mutations.
+
+:mod:`app.data_cache` appends a compact JSON record for every mutation to
+this journal instead of rewriting the master timeline snapshot, and
+periodically folds the journal back into the snapshot.  On startup the
+journal is replayed on top of the snapshot so no acknowledged edit is lost.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class TimelineJournal:
+    """JSON-lines journal stored next to the timeline snapshot.
+
+    While a compaction is in progress the active journal is renamed to
+    ``<path>.compacting`` so new records can keep flowing into a fresh file.
+    Both files are replayed on startup, which is safe because every journal
+    operation is idempotent.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.compacting_path = f"{path}.compacting"
+        self._lock = threading.Lock()
+        self._record_count = None
+
+    @property
+    def record_count(self) -> int:
+        """Return the number of records in the active journal file."""
+
+        with self._lock:
+            if self._record_count is None:
+                self._record_count = sum(1 for _ in self._iter_file(self.path))
+            return self._record_count
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append ``record`` and fsync it to disk before returning."""
+
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]) -> None:
+        """Append ``records`` in order with a single fsync."""
+
+        if not records:
+            return
+        lines = "".join(
+            json.dumps(record, separators=(",", ":"), default=str) + "\n"
+            for record in records
+        )
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(lines)
+                handle.flush()
+                os.fsync(handle.fileno())
+            if self._record_count is not None:
+                self._record_count += len(records)
+
+    def _iter_file(self, path: str) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line is the only expected corruption; the
+                    # mutation was never acknowledged so it is safe to skip.
+                    print(f"Skipping unreadable journal record in {path}")
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Return every pending record, oldest first."""
+
+        with self._lock:
+            records = list(self._iter_file(self.compacting_path))
+            records.extend(self._iter_file(self.path))
+            return records
+
+    @staticmethod
+    def _read_lines(path: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the complete records of ``path`` after byte ``offset``."""
+
+        with open(path, "rb") as handle:
+            handle.seek(offset)
+            data = handle.read()
+        # Ignore a record another process is still writing.
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"Skipping unreadable journal record in {path}")
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        return records, offset + end
+
+    def position(self) -> Tuple[Optional[int], int]:
+        """Return ``(inode, size)`` of the active journal file.
+
+        Pass the result to :meth:`read_since` to read only later records.
+        """
+
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return None, 0
+            return stat.st_ino, stat.st_size
+
+    def read_since(
+        self, position: Tuple[Optional[int], int]
+    ) -> Optional[Tuple[List[Dict[str, Any]], Tuple[Optional[int], int]]]:
+        """Return records appended after ``position`` and the new position.
+
+        Follows the file across one rotation for compaction.  Returns
+        ``None`` when the journal was replaced in a way that cannot be
+        followed (for example reset after a full save); the caller must
+        then reload the snapshot.
+        """
+
+        inode, offset = position
+        with self._lock:
+            try:
+                active = os.stat(self.path)
+            except FileNotFoundError:
+                active = None
+            try:
+                compacting = os.stat(self.compacting_path)
+            except FileNotFoundError:
+                compacting = None
+
+            if active is not None and active.st_ino == inode:
+                if active.st_size < offset:
+                    return None
+                records, offset = self._read_lines(self.path, offset)
+                return records, (inode, offset)
+
+            records: List[Dict[str, Any]] = []
+            if inode is not None:
+                if compacting is None or compacting.st_ino != inode:
+                    return None
+                records, _ = self._read_lines(self.compacting_path, offset)
+            elif compacting is not None:
+                # Unknown whether the rotated file was already read.
+                return None
+            if active is None:
+                return records, (None, 0)
+            newer, offset = self._read_lines(self.path, 0)
+            return records + newer, (active.st_ino, offset)
+
+    def has_pending_compaction(self) -> bool:
+        return os.path.exists(self.compacting_path)
+
+    def rotate(self) -> bool:
+        """Move the active journal aside so it can be compacted.
+
+        Returns ``False`` when there is nothing to compact or an earlier
+        compaction has not finished yet.
+        """
+
+        with self._lock:
+            if os.path.exists(self.compacting_path):
+                return False
+            if not os.path.exists(self.path):
+                return False
+            os.replace(self.path, self.compacting_path)
+            self._record_count = 0
+            return True
+
+    def discard_compacted(self) -> None:
+        """Delete the journal file folded into the snapshot by compaction."""
+
+        with self._lock:
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+
+    def reset(self) -> None:
+        """Remove every journal file after a full snapshot has been written."""
+
+        with self._lock:
+            for path in (self.compacting_path, self.path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._record_count = 0
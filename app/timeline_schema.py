@@ -0,0 +1,210 @@
+"""Column schema for the master timeline dataframe.
+
+:func:`apply_schema` converts the dataframe once when it is loaded and
+:func:`conform_rows` types newly added rows, so the cached frame always
+satisfies the schema below and request handlers can filter on its columns
+without re-parsing them.
+
+=================  ==========================================================
+Column             Type
+=================  ==========================================================
+``Latitude``       ``float64``
+``Longitude``      ``float64``
+``Start Date``     ``datetime64[ns]`` (``NaT`` when missing or unparseable)
+``End Date``       ``datetime64[ns]`` (only when present)
+``date``           ``datetime64[ns]`` (only when present)
+``Source Type``    ``category``
+``Archived``       ``bool``
+``Alias``          ``str`` (empty string when missing)
+``Description``    ``str`` (empty string when missing or blank)
+=================  ==========================================================
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+COORDINATE_COLUMNS = ("Latitude", "Longitude")
+DATE_COLUMNS = ("Start Date", "End Date", "date")
+CATEGORY_COLUMNS = ("Source Type",)
+
+# Management columns that are always present, with their default values.
+REQUIRED_COLUMN_DEFAULTS = {
+    "Archived": False,
+    "Alias": "",
+    "Description": "",
+}
+
+_TRUE_STRINGS = ["true", "t", "1", "1.0", "yes", "y", "on"]
+
+
+def _to_datetime(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_convert(None)
+
+    try:
+        parsed = pd.to_datetime(series, errors="coerce", format="ISO8601")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(series, errors="coerce", format="mixed", utc=True)
+
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        parsed = parsed.dt.tz_convert(None)
+    return parsed.astype("datetime64[ns]")
+
+
+def _to_bool(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series.dtype) and not series.hasnans:
+        return series.astype(bool)
+    lowered = series.astype(str).str.strip().str.lower()
+    return lowered.isin(_TRUE_STRINGS)
+
+
+def _to_text(series: pd.Series) -> pd.Series:
+    return series.where(series.notna(), "").astype(str)
+
+
+def _to_description(series: pd.Series) -> pd.Series:
+    text = _to_text(series)
+    return text.where(text.str.strip() != "", "")
+
+
+def _coerce_column(df: pd.DataFrame, column: str) -> None:
+    series = df[column]
+    if column in COORDINATE_COLUMNS:
+        if series.dtype != "float64":
+            df[column] = pd.to_numeric(series, errors="coerce").astype("float64")
+    elif column in DATE_COLUMNS:
+        df[column] = _to_datetime(series)
+    elif column in CATEGORY_COLUMNS:
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            df[column] = series.astype("category")
+    elif column == "Archived":
+        if series.dtype != bool:
+            df[column] = _to_bool(series)
+    elif column == "Alias":
+        df[column] = _to_text(series)
+    elif column == "Description":
+        df[column] = _to_description(series)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert ``df`` in place to the timeline schema and return it."""
+
+    for column, default in REQUIRED_COLUMN_DEFAULTS.items():
+        if column not in df.columns:
+            df[column] = default
+
+    for column in (*COORDINATE_COLUMNS, *DATE_COLUMNS, *CATEGORY_COLUMNS, *REQUIRED_COLUMN_DEFAULTS):
+        if column in df.columns:
+            _coerce_column(df, column)
+
+    return df
+
+
+def conform_rows(rows: pd.DataFrame, reference: pd.DataFrame) -> pd.DataFrame:
+    """Return ``rows`` typed to match ``reference`` before they are appended.
+
+    Missing schema columns are filled with their defaults.  Category columns
+    get the categories of ``reference`` plus any new values of ``rows``;
+    ``reference`` itself is left untouched, so pass the frame the rows are
+    combined with through :func:`widen_categories` first.
+    """
+
+    rows = rows.copy()
+
+    for column in reference.columns:
+        if column in rows.columns:
+            continue
+        if column in REQUIRED_COLUMN_DEFAULTS:
+            rows[column] = REQUIRED_COLUMN_DEFAULTS[column]
+        elif column in DATE_COLUMNS:
+            rows[column] = pd.NaT
+        elif column in CATEGORY_COLUMNS:
+            rows[column] = None
+
+    apply_schema(rows)
+
+    for column in CATEGORY_COLUMNS:
+        if column not in rows.columns or column not in reference.columns:
+            continue
+        reference_dtype = reference[column].dtype
+        if not isinstance(reference_dtype, pd.CategoricalDtype):
+            continue
+        new_values = [
+            value for value in rows[column].dropna().unique()
+            if value not in reference_dtype.categories
+        ]
+        dtype = reference_dtype
+        if new_values:
+            dtype = pd.CategoricalDtype([*reference_dtype.categories, *new_values])
+        rows[column] = rows[column].astype(dtype)
+
+    return rows
+
+
+def widen_categories(frame: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """Return ``frame`` with the category dtypes of conformed ``rows``.
+
+    Columns that need new categories are replaced on a shallow copy, so
+    ``frame`` is never modified and may be a published snapshot.
+    """
+
+    widened = frame
+    for column in CATEGORY_COLUMNS:
+        if column not in frame.columns or column not in rows.columns:
+            continue
+        dtype = rows[column].dtype
+        if not isinstance(dtype, pd.CategoricalDtype) or frame[column].dtype == dtype:
+            continue
+        if widened is frame:
+            widened = frame.copy(deep=False)
+        widened[column] = frame[column].astype(dtype)
+    return widened
+
+
+def format_date_value(value: Any) -> Any:
+    """Return ``value`` from a date column formatted for API responses.
+
+    Dates without a time component are rendered as ``YYYY-MM-DD`` (the format
+    the CSV historically stored); anything else uses ISO 8601.  Missing
+    values become an empty string.  Non-date values are returned unchanged.
+    """
+
+    if value is None:
+        return ""
+    if isinstance(value, pd.Timestamp):
+        if pd.isna(value):
+            return ""
+        if value == value.normalize():
+            return value.date().isoformat()
+        return value.isoformat()
+    if value is pd.NaT:
+        return ""
+    return value
+
+
+def format_date_series(series: pd.Series) -> pd.Series:
+    """Vectorised :func:`format_date_value` for a whole date column."""
+
+    if not pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.map(format_date_value)
+
+    values = series.to_numpy()
+    formatted = pd.Series(
+        np.datetime_as_string(values, unit="D"),
+        index=series.index,
+        dtype=object,
+    )
+
+    missing = series.isna()
+    with_time = ~missing & (series != series.dt.normalize())
+    if with_time.any():
+        formatted[with_time] = series[with_time].map(lambda value: value.isoformat())
+    if missing.any():
+        formatted[missing] = ""
+    return formatted
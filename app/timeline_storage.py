@@ -0,0 +1,261 @@
+"""Storage backends used to persist the master timeline dataframe.
+
+Historically the timeline lived in ``data/master_timeline_data.csv`` and was
+parsed from text on every start.  The backends in this module keep the same
+dataframe in a typed columnar format instead so loading and saving no longer
+spend their time formatting and parsing CSV text.  ``pyarrow`` is optional:
+when it is not installed WanderLog keeps using the CSV backend.  The
+``sqlite`` backend stores the timeline in an embedded database that is
+updated row by row (see :mod:`app.sqlite_store`).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Optional, Type
+
+import pandas as pd
+
+from .durable_io import PREVIOUS_SUFFIX, atomic_write, readable_candidates
+from .sqlite_store import SqliteDatabase
+
+try:  # pragma: no cover - exercised implicitly depending on the environment
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pa_feather = None
+    pa_parquet = None
+
+
+def is_columnar_storage_available() -> bool:
+    """Return ``True`` when ``pyarrow`` is installed."""
+
+    return pa is not None
+
+
+def _prepare_for_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with object columns coerced into Arrow friendly values.
+
+    CSV files produced by older versions occasionally contain columns where
+    numbers and strings are mixed (for example place names that look like
+    numbers).  Arrow requires a single type per column so those values are
+    stored as strings while missing values are preserved.
+    """
+
+    prepared = df
+    for column in df.columns:
+        series = df[column]
+        if series.dtype != object:
+            continue
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        if inferred in {"string", "empty", "boolean", "floating", "integer"}:
+            continue
+        if prepared is df:
+            prepared = df.copy()
+        prepared[column] = series.where(series.isna(), series.astype(str))
+    return prepared
+
+
+class TimelineStorage:
+    """Base class describing how the timeline dataframe is persisted.
+
+    Snapshots are written through :func:`app.durable_io.atomic_write`, which
+    keeps the previous snapshot as ``<path>.prev`` and records a checksum.
+    :meth:`load` reads the newest intact file, so a snapshot truncated by a
+    crash falls back to the last good one.  Subclasses implement
+    :meth:`_read` and :meth:`_write` and may set ``magic`` to the bytes their
+    format starts and ends with for a quick truncation check.
+
+    Backends that set ``incremental`` apply each mutation to the stored data
+    directly (see :class:`SqliteTimelineStorage`); the others only change
+    through :meth:`save`.
+    """
+
+    name = ""
+    extension = ""
+    magic: Optional[bytes] = None
+    incremental = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        """Return ``True`` when a stored snapshot is available."""
+
+        return os.path.exists(self.path) or os.path.exists(self.path + PREVIOUS_SUFFIX)
+
+    def load(self) -> pd.DataFrame:
+        """Return the newest intact stored dataframe.
+
+        Raises :class:`OSError` when neither the snapshot nor its last good
+        copy is readable.
+        """
+
+        for path in readable_candidates(self.path, self.magic):
+            try:
+                return self._read(path)
+            except Exception as exc:
+                print(f"Failed to read timeline snapshot {path}: {exc}")
+        raise OSError(f"No intact timeline snapshot at {self.path}")
+
+    def save(self, df: pd.DataFrame) -> None:
+        """Persist ``df`` durably, replacing the existing snapshot."""
+
+        atomic_write(self.path, lambda temp_path: self._write(df, temp_path), magic=self.magic)
+
+    def identity(self):
+        """Return a value that changes whenever :meth:`save` replaces the data."""
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read(self, path: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        raise NotImplementedError
+
+
+class CsvTimelineStorage(TimelineStorage):
+    """Plain CSV storage kept for compatibility and exports."""
+
+    name = "csv"
+    extension = ".csv"
+
+    def _read(self, path: str) -> pd.DataFrame:
+        return pd.read_csv(path)
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        df.to_csv(path, index=False)
+
+
+class ParquetTimelineStorage(TimelineStorage):
+    """Columnar storage using a Parquet file."""
+
+    name = "parquet"
+    extension = ".parquet"
+    magic = b"PAR1"
+
+    def _read(self, path: str) -> pd.DataFrame:
+        table = pa_parquet.read_table(path, memory_map=True)
+        return table.to_pandas()
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        table = pa.Table.from_pandas(_prepare_for_arrow(df), preserve_index=False)
+        pa_parquet.write_table(table, path)
+
+
+class ArrowTimelineStorage(TimelineStorage):
+    """Columnar storage using an uncompressed Arrow IPC file.
+
+    The file is memory-mapped on load which lets the operating system page
+    the columns in lazily and share them between processes.  This is the
+    recommended backend for multi-process deployments (``SHARED_STATE``).
+    """
+
+    name = "arrow"
+    extension = ".arrow"
+    magic = b"ARROW1"
+
+    def _read(self, path: str) -> pd.DataFrame:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        # ``split_blocks`` keeps null-free numeric columns as read-only views
+        # of the mapped file instead of copying them into pandas blocks, so
+        # worker processes share those pages through the OS page cache.
+        return table.to_pandas(split_blocks=True)
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        table = pa.Table.from_pandas(_prepare_for_arrow(df), preserve_index=False)
+        pa_feather.write_feather(table, path, compression="uncompressed")
+
+
+class SqliteTimelineStorage(TimelineStorage):
+    """Embedded SQLite database updated in place by every mutation.
+
+    Instead of rewriting a snapshot, :mod:`app.data_cache` mirrors each
+    applied mutation with :meth:`append_rows`, :meth:`update_values` or
+    :meth:`delete_places`, and map filters are answered from indexed
+    columns by :meth:`query_place_ids`.  The same database also stores the
+    trips (see :func:`app.trip_store.configure_database`).  SQLite's own
+    journal makes every write atomic, so no ``.prev`` copy is kept.
+    """
+
+    name = "sqlite"
+    extension = ".sqlite3"
+    incremental = True
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.database = SqliteDatabase(path)
+
+    def exists(self) -> bool:
+        return self.database.has_timeline()
+
+    def load(self) -> pd.DataFrame:
+        return self.database.load_timeline()
+
+    def save(self, df: pd.DataFrame) -> None:
+        self.database.save_timeline(df)
+
+    def identity(self):
+        # Row updates are tracked through the journal; only full saves count.
+        if not os.path.exists(self.path):
+            return None
+        return self.database.timeline_generation()
+
+    def append_rows(self, rows: pd.DataFrame) -> None:
+        self.database.append_timeline_rows(rows)
+
+    def update_values(self, place_ids, column: str, value) -> None:
+        self.database.update_timeline_values(place_ids, column, value)
+
+    def delete_places(self, place_ids) -> None:
+        self.database.delete_timeline_places(place_ids)
+
+    def query_place_ids(self, **filters):
+        """See :meth:`app.sqlite_store.SqliteDatabase.query_timeline_place_ids`."""
+
+        return self.database.query_timeline_place_ids(**filters)
+
+
+STORAGE_BACKENDS: Dict[str, Type[TimelineStorage]] = {
+    CsvTimelineStorage.name: CsvTimelineStorage,
+    ParquetTimelineStorage.name: ParquetTimelineStorage,
+    ArrowTimelineStorage.name: ArrowTimelineStorage,
+    SqliteTimelineStorage.name: SqliteTimelineStorage,
+}
+
+# Backends that work without ``pyarrow``
+_BUILTIN_BACKENDS = (CsvTimelineStorage, SqliteTimelineStorage)
+
+
+def default_backend_name() -> str:
+    """Return the preferred backend for this environment."""
+
+    return ParquetTimelineStorage.name if is_columnar_storage_available() else CsvTimelineStorage.name
+
+
+def create_storage(name: Optional[str], base_path: str) -> TimelineStorage:
+    """Return a storage backend called ``name`` rooted at ``base_path``.
+
+    ``base_path`` is the storage path without an extension; each backend adds
+    its own.  Unknown names and columnar backends requested without
+    ``pyarrow`` fall back to CSV so the application can still start.
+    """
+
+    cleaned = (name or "").strip().lower() or default_backend_name()
+    backend_cls = STORAGE_BACKENDS.get(cleaned)
+    if backend_cls is None:
+        print(f"Unknown timeline storage backend '{name}'. Falling back to CSV.")
+        backend_cls = CsvTimelineStorage
+    elif backend_cls not in _BUILTIN_BACKENDS and not is_columnar_storage_available():
+        print(f"pyarrow is not installed; '{cleaned}' storage unavailable. Falling back to CSV.")
+        backend_cls = CsvTimelineStorage
+
+    return backend_cls(f"{base_path}{backend_cls.extension}")
@@ -1,22 +1,46 @@
 """Utilities for persisting and retrieving trip information.
 
 The application stores trips separately from the main timeline data so that
-users can group locations into itineraries. Trips are persisted to a JSON
-file on disk and cached in memory for quick access during a single process
-lifetime. Each trip keeps track of the place identifiers that belong to it
-so that the frontend can associate timeline markers with the selected trip.
+users can group locations into itineraries. Each trip is persisted to its own
+JSON file under ``data/trips`` next to a small manifest, so a mutation only
+rewrites the trip it touched. With the SQLite timeline storage trips are kept
+in the same database instead (see :func:`configure_database`). Trips are
+cached in memory for quick access during a single process lifetime. Each trip
+keeps track of the place identifiers that belong to it so that the frontend
+can associate timeline markers with the selected trip.
 """
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import os
-from dataclasses import dataclass, field, asdict
+import re
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 from uuid import uuid4
 
+from .change_log import ChangeLog
+from .durable_io import PREVIOUS_SUFFIX, atomic_write, readable_candidates, remove_with_history
+from .shared_state import SharedStamp, is_shared_state_available
+from .sqlite_store import SqliteDatabase
+from .write_behind import WriteBehindFlusher
+
+# Legacy single-file store, migrated to TRIPS_DIR on first load.
 TRIPS_PATH = os.path.join("data", "trips.json")
+# One JSON file per trip plus a manifest listing them in order.
+TRIPS_DIR = os.path.join("data", "trips")
+MANIFEST_PATH = os.path.join(TRIPS_DIR, "manifest.json")
+MANIFEST_VERSION = 1
+TRIP_LOAD_WORKERS = 8
+
+_SAFE_TRIP_ID = re.compile(r"[A-Za-z0-9_-]{1,128}")
 
 
 def _utcnow_iso() -> str:
@@ -270,21 +294,271 @@ def _normalise_trip_photos(raw_photos: Any) -> List[Dict[str, Any]]:
     return normalised
 
 
+class PlaceIdSet(list):
+    """Ordered, duplicate-free list of place IDs with O(1) membership tests.
+
+    It is still a ``list`` so callers and JSON serialisation are unaffected,
+    but a companion ``set`` answers ``in`` checks and rejects duplicates.
+    """
+
+    def __init__(self, iterable: Iterable[str] = ()):
+        super().__init__()
+        self._members: set = set()
+        self.extend(iterable)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def copy(self) -> "PlaceIdSet":
+        clone = self.__class__.__new__(self.__class__)
+        list.__init__(clone, self)
+        clone._members = set(self._members)
+        return clone
+
+    def __contains__(self, place_id: object) -> bool:
+        return place_id in self._members
+
+    def append(self, place_id: str) -> None:
+        if place_id in self._members:
+            return
+        self._members.add(place_id)
+        super().append(place_id)
+
+    def extend(self, place_ids: Iterable[str]) -> None:
+        self.extend_new(place_ids)
+
+    def extend_new(self, place_ids: Iterable[str]) -> List[str]:
+        """Append the IDs that are not present yet and return them."""
+
+        members = self._members
+        added = []
+        for place_id in place_ids:
+            if place_id not in members:
+                members.add(place_id)
+                added.append(place_id)
+        super().extend(added)
+        return added
+
+    def __iadd__(self, place_ids: Iterable[str]) -> "PlaceIdSet":
+        self.extend(place_ids)
+        return self
+
+    def insert(self, index: int, place_id: str) -> None:
+        if place_id in self._members:
+            return
+        self._members.add(place_id)
+        super().insert(index, place_id)
+
+    def remove(self, place_id: str) -> None:
+        if place_id not in self._members:
+            raise ValueError(f"{place_id!r} is not in the trip")
+        self._members.discard(place_id)
+        super().remove(place_id)
+
+    def pop(self, index: int = -1) -> str:
+        place_id = super().pop(index)
+        self._members.discard(place_id)
+        return place_id
+
+    def clear(self) -> None:
+        self._members.clear()
+        super().clear()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._rebuild()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        unique = list(dict.fromkeys(self))
+        if len(unique) != len(self):
+            super().__init__(unique)
+        self._members = set(unique)
+
+    def difference_update(self, place_ids: Iterable[str]) -> List[str]:
+        """Remove every ID in ``place_ids`` and return those actually removed."""
+
+        removing = self._members.intersection(place_ids)
+        if not removing:
+            return []
+        removed = [place_id for place_id in self if place_id in removing]
+        super().__init__([place_id for place_id in self if place_id not in removing])
+        self._members.difference_update(removing)
+        return removed
+
+
 @dataclass
 class Trip:
     """Dataclass representing a stored trip."""
 
     id: str
     name: str
-    place_ids: List[str] = field(default_factory=list)
+    place_ids: List[str] = field(default_factory=PlaceIdSet)
     description: str = ""
     google_photos_url: str = ""
     photos: List[Dict[str, Any]] = field(default_factory=list)
     created_at: str = field(default_factory=_utcnow_iso)
     updated_at: str = field(default_factory=_utcnow_iso)
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.place_ids, PlaceIdSet):
+            self.place_ids = PlaceIdSet(self.place_ids or [])
+
+
+# Trips keyed by ID, in creation order.
+_trips_cache: Optional[Dict[str, Trip]] = None
+
+# Incremented by every mutation so callers can detect (and cache against)
+# changes to trips or their memberships.
+data_version = 0
+
+# Inverted membership index: place ID -> list of {"id", "name"} entries for
+# the trips containing it.  It is maintained incrementally by every function
+# that changes memberships or trip names.
+_place_memberships: Dict[str, List[Dict[str, str]]] = {}
+
+# Place IDs whose memberships changed per data version (see
+# :func:`changed_memberships_since`).
+_membership_log = ChangeLog()
+
+# Callables notified of every trip change (see add_change_listener).
+_change_listeners: List[Any] = []
+
+# Optional write-behind mode (see :func:`configure_write_behind`): trips,
+# manifest changes and deletions waiting for the background flusher.
+_write_behind: Optional[WriteBehindFlusher] = None
+_pending_lock = threading.Lock()
+_pending_trip_ids: Dict[str, None] = {}
+_pending_removed: Dict[str, Trip] = {}
+_pending_manifest = False
+
+# Database holding the trips instead of JSON files (see
+# :func:`configure_database`).
+_database: Optional[SqliteDatabase] = None
+
+# Multi-process mode (see :func:`configure_shared_state`): the shared
+# version this process last caught up with and the identity of every trip
+# file it has read or written, so only changed files are re-read.
+_shared: Optional[SharedStamp] = None
+_synced_stamp = 0
+_shard_identity: Dict[str, Tuple[int, int, int]] = {}
+
+# Mutations are serialised by ``_write_lock``.  Published trips, their lists,
+# ``_trips_cache`` and the membership lists are never modified in place:
+# writers change a private copy (see :func:`_editable_trip`) and publish it
+# through :func:`_commit`, so readers need no lock and never observe a
+# half-applied change.
+_write_lock = threading.RLock()
+
+
+@contextmanager
+def _shared_write():
+    """Serialise a change with other worker processes in shared mode.
+
+    Changes made elsewhere are applied first; the shared version is raised
+    afterwards if this process changed anything.
+    """
+
+    global data_version, _synced_stamp
+
+    if _shared is None:
+        yield
+        return
+
+    with _shared.locked() as outermost:
+        if outermost:
+            with _write_lock:
+                _catch_up()
+        version = data_version
+        try:
+            yield
+        finally:
+            if outermost and data_version != version:
+                with _write_lock:
+                    # Workers compare versions only, so equal versions must
+                    # mean equal trips in every process.
+                    stamp = max(data_version, _shared.read() + 1)
+                    _shared.write(stamp)
+                    _membership_log.defer(version, stamp - 1)
+                    data_version = _synced_stamp = stamp
+
+
+def _serialised(func):
+    """Run ``func`` while holding the (shared and local) writer locks."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _shared_write(), _write_lock:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _membership_entry(trip: Trip) -> Dict[str, str]:
+    return {"id": trip.id, "name": (trip.name or "").strip() or "Untitled Trip"}
+
+
+def _index_memberships(trip: Trip, place_ids: Iterable[str], *, new: bool = False) -> None:
+    """Record (or refresh) that ``trip`` contains each ID in ``place_ids``.
+
+    Pass ``new=True`` when none of ``place_ids`` was in ``trip`` before; the
+    existing entries then need not be searched for the trip.
+    """
+
+    entry = _membership_entry(trip)
+    place_ids = list(place_ids)
+    _membership_log.note(data_version, place_ids)
+    if new:
+        for place_id in place_ids:
+            entries = _place_memberships.get(place_id)
+            _place_memberships[place_id] = [entry] if entries is None else [*entries, entry]
+        return
+    for place_id in place_ids:
+        entries = _place_memberships.get(place_id)
+        if entries is None:
+            _place_memberships[place_id] = [entry]
+            continue
+        # Build a new list instead of editing ``entries``; readers may hold it.
+        updated = []
+        found = False
+        for existing in entries:
+            if existing["id"] == trip.id:
+                existing, found = entry, True
+            updated.append(existing)
+        if not found:
+            updated.append(entry)
+        _place_memberships[place_id] = updated
+
+
+def _unindex_memberships(trip_id: str, place_ids: Iterable[str]) -> None:
+    """Forget that the trip ``trip_id`` contains each ID in ``place_ids``."""
+
+    place_ids = list(place_ids)
+    _membership_log.note(data_version, place_ids)
+    for place_id in place_ids:
+        entries = _place_memberships.get(place_id)
+        if not entries:
+            continue
+        remaining = [entry for entry in entries if entry["id"] != trip_id]
+        if remaining:
+            _place_memberships[place_id] = remaining
+        else:
+            del _place_memberships[place_id]
+
 
-_trips_cache: Optional[List[Trip]] = None
+def _rebuild_membership_index() -> None:
+    global _place_memberships
+
+    memberships: Dict[str, List[Dict[str, str]]] = {}
+    for trip in (_trips_cache or {}).values():
+        entry = _membership_entry(trip)
+        for place_id in trip.place_ids:
+            memberships.setdefault(place_id, []).append(entry)
+    _place_memberships = memberships
+    _membership_log.note_reset(data_version)
 
 
 def _ensure_cache() -> None:
@@ -347,22 +621,91 @@ def _normalise_trip_data(raw: dict) -> Optional[Trip]:
     )
 
 
-def load_trips() -> None:
-    """Populate the in-memory cache from :data:`TRIPS_PATH`."""
+def _trip_filename(trip_id: str) -> str:
+    """Return the shard file name used for ``trip_id``."""
 
-    global _trips_cache
+    if _SAFE_TRIP_ID.fullmatch(trip_id):
+        return f"{trip_id}.json"
+    # Imported IDs may contain characters that are unsafe in file names.
+    return f"{hashlib.sha1(trip_id.encode('utf-8')).hexdigest()}.json"
 
-    if not os.path.exists(TRIPS_PATH):
-        _trips_cache = []
-        return
 
-    try:
-        with open(TRIPS_PATH, "r", encoding="utf-8") as handle:
-            data = json.load(handle)
-    except Exception as exc:  # pragma: no cover - best effort logging
-        print(f"Failed to load trips from {TRIPS_PATH}: {exc}")
-        _trips_cache = []
-        return
+def _write_json_atomic(
+    path: str, payload: Any, *, checksum: bool = False, keep_previous: bool = False
+) -> None:
+    """Durably replace ``path`` with ``payload``.
+
+    ``keep_previous`` keeps the last good copy as ``<path>.prev``.
+    """
+
+    def write(temp_path: str) -> None:
+        with open(temp_path, "w", encoding="utf-8") as stream:
+            json.dump(payload, stream, indent=2)
+
+    atomic_write(path, write, checksum=checksum, keep_previous=keep_previous)
+
+
+def _read_json_with_fallback(path: str) -> Any:
+    """Return the parsed contents of ``path`` or of its last good copy.
+
+    Returns ``None`` when neither file exists or can be parsed.
+    """
+
+    for candidate in readable_candidates(path):
+        try:
+            with open(candidate, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except Exception as exc:
+            print(f"Failed to read {candidate}: {exc}")
+    return None
+
+
+def _read_trip_shard(filename: str) -> Optional[Trip]:
+    data = _read_json_with_fallback(os.path.join(TRIPS_DIR, filename))
+    if data is None:
+        print(f"Failed to load trip {filename}")
+        return None
+    return _normalise_trip_data(data)
+
+
+def _load_sharded_trips() -> Dict[str, Trip]:
+    """Load every trip listed in the manifest, reading shards in parallel.
+
+    If the manifest and its last good copy are both unreadable the shards in
+    :data:`TRIPS_DIR` are loaded instead and the manifest is rewritten, so no
+    trip is silently dropped.
+    """
+
+    manifest = _read_json_with_fallback(MANIFEST_PATH)
+    if isinstance(manifest, dict):
+        filenames = [
+            entry.get("file") or _trip_filename(str(entry.get("id") or ""))
+            for entry in manifest.get("trips", [])
+            if isinstance(entry, dict) and entry.get("id")
+        ]
+    else:
+        print(f"Trip manifest {MANIFEST_PATH} is unreadable; rebuilding it from {TRIPS_DIR}")
+        filenames = [
+            name for name in os.listdir(TRIPS_DIR)
+            if name.endswith(".json") and name != os.path.basename(MANIFEST_PATH)
+        ]
+
+    with ThreadPoolExecutor(max_workers=TRIP_LOAD_WORKERS) as executor:
+        loaded = [trip for trip in executor.map(_read_trip_shard, filenames) if trip]
+
+    if not isinstance(manifest, dict):
+        loaded.sort(key=lambda trip: trip.created_at)
+        trips = {trip.id: trip for trip in loaded}
+        _write_manifest(trips)
+        return trips
+    return {trip.id: trip for trip in loaded}
+
+
+def _load_legacy_trips() -> Dict[str, Trip]:
+    """Load trips from the single-file :data:`TRIPS_PATH` format."""
+
+    with open(TRIPS_PATH, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
 
     if isinstance(data, dict):
         trips_raw = data.get("trips", [])
@@ -371,48 +714,507 @@ def load_trips() -> None:
     else:
         trips_raw = []
 
-    trips: List[Trip] = []
+    trips: Dict[str, Trip] = {}
     for entry in trips_raw:
         trip = _normalise_trip_data(entry)
         if trip is not None:
-            trips.append(trip)
+            trips[trip.id] = trip
+    return trips
+
+
+def _has_manifest() -> bool:
+    return os.path.exists(MANIFEST_PATH) or os.path.exists(MANIFEST_PATH + PREVIOUS_SUFFIX)
+
+
+def _load_database_trips() -> Dict[str, Trip]:
+    """Load the trips stored in :data:`_database`.
+
+    The first time the database is used, the trip files (sharded or legacy)
+    are copied into it; the files are left in place.
+    """
+
+    if not _database.get_meta("trips_migrated"):
+        if _has_manifest():
+            trips = _load_sharded_trips()
+        elif os.path.exists(TRIPS_PATH):
+            trips = _load_legacy_trips()
+        else:
+            trips = {}
+        _database.write_trips(
+            (_trip_record(trip) for trip in trips.values()),
+            replace=True,
+            meta={"trips_migrated": 1},
+        )
+        if trips:
+            print(f"Migrated {len(trips)} trips to {_database.path}")
+        return trips
+
+    trips: Dict[str, Trip] = {}
+    for raw in _database.load_trips():
+        trip = _normalise_trip_data(raw)
+        if trip is not None:
+            trips[trip.id] = trip
+    return trips
+
+
+def load_trips() -> None:
+    """Populate the in-memory cache from the trip shards or the database.
+
+    A legacy :data:`TRIPS_PATH` file is migrated to the sharded layout the
+    first time it is found; the original is kept as ``trips.json.migrated``.
+    """
+
+    global data_version, _synced_stamp
+
+    if _shared is None:
+        with _write_lock:
+            _load_all_trips()
+        return
+
+    # Workers starting together take turns so only one migrates.
+    with _shared.locked(), _write_lock:
+        _load_all_trips()
+        _synced_stamp = _shared.read()
+        data_version = max(data_version, _synced_stamp)
+        _membership_log.note_reset(data_version - 1)
+        _shard_identity.clear()
+        for trip in (_trips_cache or {}).values():
+            _remember_shard(trip.id)
+
+
+def _load_all_trips() -> None:
+    global _trips_cache, data_version
+
+    try:
+        if _database is not None:
+            trips = _load_database_trips()
+        elif _has_manifest():
+            trips = _load_sharded_trips()
+        elif os.path.exists(TRIPS_PATH):
+            trips = _load_legacy_trips()
+            _trips_cache = trips
+            save_trips()
+            os.replace(TRIPS_PATH, TRIPS_PATH + ".migrated")
+            print(f"Migrated {len(trips)} trips from {TRIPS_PATH} to {TRIPS_DIR}")
+        else:
+            trips = {}
+    except Exception as exc:  # pragma: no cover - best effort logging
+        print(f"Failed to load trips: {exc}")
+        trips = {}
 
     _trips_cache = trips
+    _rebuild_membership_index()
+    data_version += 1
+    _notify_listeners({"op": "reset"})
+
+
+def configure_database(database: Optional[SqliteDatabase]) -> None:
+    """Store trips in ``database`` instead of JSON files.
+
+    Each trip is a row in the ``trips`` table and its places are rows of the
+    ``trip_places`` join table.  Existing trip files are imported on the
+    first load.  ``None`` restores the file based storage.  Call before
+    :func:`load_trips`.
+    """
+
+    global _database
+
+    _database = database
 
 
+def configure_shared_state(enabled: bool) -> bool:
+    """Keep trips consistent across several worker processes.
+
+    See :func:`app.data_cache.configure_shared_state`.  Returns ``True``
+    when the mode is active.
+    """
+
+    global _shared
+
+    _shared = None
+    if not enabled:
+        return False
+    if not is_shared_state_available():
+        print("Shared state mode requires fcntl; running single-process.")
+        return False
+    _shared = SharedStamp(os.path.join(TRIPS_DIR, "trips"))
+    return True
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _remember_shard(trip_id: str) -> None:
+    filename = _trip_filename(trip_id)
+    _shard_identity[filename] = _file_identity(os.path.join(TRIPS_DIR, filename))
+
+
+def _catch_up() -> bool:
+    """Re-read the trips other processes changed; caller holds the locks.
+
+    Only shards whose file changed since this process last read or wrote
+    them are loaded; memberships are re-indexed for those trips only.  Trips
+    stored in a database are all re-read.
+    """
+
+    global _trips_cache, data_version, _synced_stamp
+
+    stamp = _shared.read()
+    if stamp == _synced_stamp:
+        return False
+
+    first_version = data_version
+    manifest = None if _database is not None else _read_json_with_fallback(MANIFEST_PATH)
+    if not isinstance(manifest, dict):
+        _load_all_trips()
+    else:
+        current = _trips_cache or {}
+        trips: Dict[str, Trip] = {}
+        for entry in manifest.get("trips", []):
+            if not isinstance(entry, dict) or not entry.get("id"):
+                continue
+            trip_id = str(entry["id"])
+            filename = entry.get("file") or _trip_filename(trip_id)
+            identity = _file_identity(os.path.join(TRIPS_DIR, filename))
+            trip = current.get(trip_id)
+            if trip is None or _shard_identity.get(filename) != identity:
+                trip = _read_trip_shard(filename)
+                _shard_identity[filename] = identity
+                if trip is None:
+                    continue
+                if trip_id in current:
+                    _unindex_memberships(trip_id, current[trip_id].place_ids)
+                _index_memberships(trip, trip.place_ids)
+            trips[trip.id] = trip
+
+        for trip_id, trip in current.items():
+            if trip_id not in trips:
+                _unindex_memberships(trip_id, trip.place_ids)
+                _shard_identity.pop(_trip_filename(trip_id), None)
+        _trips_cache = trips
+
+    _synced_stamp = stamp
+    data_version = max(data_version + 1, stamp)
+    # Clients may have synchronised with other workers at any version up
+    # to the new one without these changes.
+    _membership_log.defer(first_version, data_version - 1)
+    if isinstance(manifest, dict):
+        _notify_listeners({"op": "reset"})
+    return True
+
+
+def refresh_shared_state() -> bool:
+    """Apply trip changes made by other worker processes.
+
+    Cheap when nothing changed (one small file read).  Returns ``True`` when
+    the cached trips were updated.
+    """
+
+    if _shared is None or _shared.read() == _synced_stamp:
+        return False
+    with _shared.locked(exclusive=False), _write_lock:
+        return _catch_up()
+
+
+def _write_manifest(trips: Optional[Dict[str, Trip]] = None) -> None:
+    if trips is None:
+        trips = _trips_cache or {}
+    _write_json_atomic(MANIFEST_PATH, {
+        "version": MANIFEST_VERSION,
+        "trips": [
+            {"id": trip.id, "file": _trip_filename(trip.id)}
+            for trip in trips.values()
+        ],
+    }, checksum=True, keep_previous=True)
+
+
+def _write_trip(trip: Trip) -> None:
+    # Shards are small and rewritten on every edit, so they get neither a
+    # ``.prev`` copy nor a checksum sidecar; the manifest keeps both.
+    _write_json_atomic(os.path.join(TRIPS_DIR, _trip_filename(trip.id)), asdict(trip))
+    if _shared is not None:
+        _remember_shard(trip.id)
+
+
+def _trip_record(trip: Trip) -> Dict[str, Any]:
+    record = asdict(trip)
+    record["place_ids"] = list(trip.place_ids)
+    return record
+
+
+def _persist(
+    trips: Iterable[Trip] = (),
+    *,
+    manifest: bool = False,
+    removed: Iterable[Trip] = (),
+) -> None:
+    """Write the shards of ``trips`` and, if needed, the manifest.
+
+    Shards are written before the manifest so that it never lists a trip
+    whose file does not exist yet; files of ``removed`` trips are deleted
+    only after the manifest no longer references them.  With a database
+    all of it is one transaction.
+    """
+
+    if _database is not None:
+        _database.write_trips(
+            [_trip_record(trip) for trip in trips], [trip.id for trip in removed]
+        )
+        return
+
+    for trip in trips:
+        _write_trip(trip)
+    if manifest:
+        _write_manifest()
+    for trip in removed:
+        remove_with_history(os.path.join(TRIPS_DIR, _trip_filename(trip.id)))
+
+
+@_serialised
 def save_trips() -> None:
-    """Persist the cached trips to :data:`TRIPS_PATH`."""
+    """Persist every cached trip and the manifest to :data:`TRIPS_DIR`."""
 
     _ensure_cache()
+    if _database is not None:
+        _database.write_trips(
+            [_trip_record(trip) for trip in (_trips_cache or {}).values()], replace=True
+        )
+        return
+    _persist((_trips_cache or {}).values(), manifest=True)
+
+
+def configure_write_behind(interval: Optional[float]) -> None:
+    """Persist changed trips in the background at most once per ``interval``.
+
+    ``None`` or ``0`` restores the default of writing each change before the
+    mutating call returns.  Pending trips are flushed at interpreter exit.
+    """
+
+    global _write_behind
+
+    if _write_behind is not None:
+        _write_behind.stop()
+        _write_behind = None
+
+    if interval and interval > 0 and _shared is not None:
+        print("Trip write-behind is unavailable in shared state mode")
+    elif interval and interval > 0:
+        _write_behind = WriteBehindFlusher("trips", _flush_pending, interval)
+        _write_behind.start()
+        print(f"Trip write-behind enabled (flush interval {interval:g}s)")
+
+
+def flush_pending_changes() -> int:
+    """Write buffered trip changes now.  Returns the mutations flushed."""
+
+    if _write_behind is None:
+        return 0
+    return _write_behind.flush()
 
-    os.makedirs(os.path.dirname(TRIPS_PATH), exist_ok=True)
-    payload = {"trips": [asdict(trip) for trip in _trips_cache or []]}
 
-    with open(TRIPS_PATH, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
+def write_behind_metrics() -> Dict[str, Any]:
+    """Return pending mutation and flush lag figures for the trip store."""
+
+    if _write_behind is None:
+        return {"enabled": False, "pending_mutations": 0, "flush_lag_seconds": 0.0}
+    return _write_behind.metrics()
+
+
+def _flush_pending() -> None:
+    global _pending_manifest
+
+    with _pending_lock:
+        trip_ids = list(_pending_trip_ids)
+        removed = list(_pending_removed.values())
+        manifest = _pending_manifest
+        _pending_trip_ids.clear()
+        _pending_removed.clear()
+        _pending_manifest = False
+
+    try:
+        # Holding the writer lock keeps file writes in the order of the
+        # in-memory changes and away from a concurrent :func:`save_trips`.
+        with _write_lock:
+            cache = _trips_cache or {}
+            trips = [cache[trip_id] for trip_id in trip_ids if trip_id in cache]
+            _persist(trips, manifest=manifest, removed=removed)
+    except Exception:
+        with _pending_lock:
+            for trip_id in trip_ids:
+                _pending_trip_ids.setdefault(trip_id, None)
+            for trip in removed:
+                _pending_removed.setdefault(trip.id, trip)
+            _pending_manifest = _pending_manifest or manifest
+        raise
+
+
+def _commit(
+    *trips: Trip,
+    manifest: bool = False,
+    removed: Iterable[Trip] = (),
+) -> None:
+    """Publish the new versions of ``trips`` and persist only those trips.
+
+    ``removed`` trips are dropped from the cache.  In write-behind mode the
+    changes are queued for the background flusher; repeated edits of the
+    same trip are written once.
+    """
+
+    global _trips_cache, data_version, _pending_manifest
+
+    removed = list(removed)
+    previous = _trips_cache or {}
+    cache = dict(previous)
+    for trip in trips:
+        cache[trip.id] = trip
+    for trip in removed:
+        cache.pop(trip.id, None)
+    _trips_cache = cache
+
+    data_version += 1
+    if _change_listeners:
+        _notify_listeners({
+            "op": "trips",
+            "trip_ids": [trip.id for trip in trips],
+            "removed_trip_ids": [trip.id for trip in removed],
+            "place_ids": sorted(_membership_changes(previous, trips, removed)),
+        })
+    if _write_behind is None:
+        _persist(trips, manifest=manifest, removed=removed)
+        return
+
+    with _pending_lock:
+        for trip in trips:
+            _pending_trip_ids[trip.id] = None
+        for trip in removed:
+            _pending_trip_ids.pop(trip.id, None)
+            _pending_removed[trip.id] = trip
+        _pending_manifest = _pending_manifest or manifest
+    _write_behind.mark_dirty()
+
+
+def add_change_listener(listener) -> None:
+    """Call ``listener(change)`` after every change to the trips.
+
+    ``change`` is a dictionary whose ``op`` is ``'trips'`` for changes made
+    by this process, with the ``trip_ids`` saved, the ``removed_trip_ids``
+    and the ``place_ids`` whose memberships changed, or ``'reset'`` when the
+    trips were reloaded (including changes made by other workers).
+
+    Listeners run while the writer lock is held: they must be quick and
+    must not modify trips.  Exceptions are printed and ignored.
+    """
+
+    with _write_lock:
+        if listener not in _change_listeners:
+            _change_listeners.append(listener)
+
+
+def remove_change_listener(listener) -> None:
+    with _write_lock:
+        if listener in _change_listeners:
+            _change_listeners.remove(listener)
+
+
+def _notify_listeners(change: Dict[str, Any]) -> None:
+    for listener in list(_change_listeners):
+        try:
+            listener(change)
+        except Exception as exc:
+            print(f"Trip change listener {listener!r} failed: {exc}")
+
+
+def _membership_changes(previous: Mapping[str, Trip], trips: Iterable[Trip], removed: Iterable[Trip]) -> set:
+    """Return the place IDs whose trip list differs after a commit."""
+
+    changed = set()
+    for trip in trips:
+        old = previous.get(trip.id)
+        if old is None:
+            changed.update(trip.place_ids)
+        elif _membership_entry(old) != _membership_entry(trip):
+            changed.update(old.place_ids)
+            changed.update(trip.place_ids)
+        else:
+            changed.update(set(old.place_ids) ^ set(trip.place_ids))
+    for trip in removed:
+        changed.update(trip.place_ids)
+    return changed
 
 
 def list_trips() -> List[dict]:
     """Return the cached trips as dictionaries."""
 
     _ensure_cache()
-    return [asdict(trip) for trip in _trips_cache or []]
+    return [asdict(trip) for trip in (_trips_cache or {}).values()]
+
+
+def membership_index() -> Mapping[str, List[Dict[str, str]]]:
+    """Return a read-only mapping of place ID to the trips containing it.
+
+    Each value is a list of ``{"id": ..., "name": ...}`` dictionaries that
+    can be serialised directly.  The mapping reflects later changes; callers
+    must not mutate the lists or dictionaries.  Writers replace lists instead
+    of editing them, so a list once fetched stays consistent, but keys may
+    come and go: copy them (``list(index)``) before iterating.
+    """
+
+    _ensure_cache()
+    return MappingProxyType(_place_memberships)
+
+
+def changed_memberships_since(version: int) -> Tuple[int, Optional[set]]:
+    """Return ``(data_version, place_ids)`` whose trips changed after ``version``.
+
+    ``place_ids`` is ``None`` when the changes are no longer known (see
+    :func:`app.data_cache.changed_place_ids_since`).
+    """
+
+    _ensure_cache()
+    with _write_lock:
+        return data_version, _membership_log.since(int(version), data_version)
+
+
+def get_place_trips(place_id: str) -> Tuple[Dict[str, str], ...]:
+    """Return the membership entries for ``place_id``."""
+
+    _ensure_cache()
+    return tuple(_place_memberships.get((place_id or "").strip(), ()))
 
 
 def get_trip(trip_id: str) -> Optional[Trip]:
-    """Return the trip matching ``trip_id`` if available."""
+    """Return the trip matching ``trip_id`` if available.
+
+    The returned trip must be treated as read-only.
+    """
 
     _ensure_cache()
 
     if not trip_id:
         return None
 
-    for trip in _trips_cache or []:
-        if trip.id == trip_id:
-            return trip
-    return None
+    return (_trips_cache or {}).get(trip_id)
+
 
+def _editable_trip(trip_id: str) -> Optional[Trip]:
+    """Return a private copy of the trip ``trip_id`` for a mutator to change.
 
+    The copy has its own place ID and photo lists; it becomes visible to
+    readers once passed to :func:`_commit`.
+    """
+
+    trip = get_trip(trip_id)
+    if trip is None:
+        return None
+    return replace(trip, place_ids=trip.place_ids.copy(), photos=list(trip.photos))
+
+
+@_serialised
 def create_trip(
     name: str,
     *,
@@ -436,11 +1238,11 @@ def create_trip(
         google_photos_url="",
         photos=[],
     )
-    _trips_cache.append(trip)
-    save_trips()
+    _commit(trip, manifest=True)
     return trip
 
 
+@_serialised
 def add_places_to_trip(trip_id: str, place_ids: Iterable[str]) -> Tuple[Trip, int]:
     """Associate each ID in ``place_ids`` with the trip ``trip_id``.
 
@@ -450,28 +1252,23 @@ def add_places_to_trip(trip_id: str, place_ids: Iterable[str]) -> Tuple[Trip, in
 
     _ensure_cache()
 
-    trip = get_trip((trip_id or "").strip())
+    trip = _editable_trip((trip_id or "").strip())
     if trip is None:
         raise KeyError("Trip not found.")
 
-    added = 0
-
     if place_ids is None:
         place_ids_iterable: Iterable[str] = []
     else:
         place_ids_iterable = place_ids
 
-    for raw_place_id in place_ids_iterable:
-        place_id_clean = (raw_place_id or "").strip()
-        if not place_id_clean:
-            continue
-        if place_id_clean not in trip.place_ids:
-            trip.place_ids.append(place_id_clean)
-            added += 1
+    cleaned_ids = [(raw_place_id or "").strip() for raw_place_id in place_ids_iterable]
+    added_ids = trip.place_ids.extend_new(filter(None, cleaned_ids))
+    added = len(added_ids)
 
     if added:
+        _index_memberships(trip, added_ids, new=True)
         trip.updated_at = _utcnow_iso()
-        save_trips()
+        _commit(trip)
 
     return trip, added
 
@@ -483,12 +1280,13 @@ def add_place_to_trip(trip_id: str, place_id: str) -> Trip:
     return trip
 
 
+@_serialised
 def remove_place_from_trip(trip_id: str, place_id: str) -> Trip:
     """Remove ``place_id`` from the trip identified by ``trip_id``."""
 
     _ensure_cache()
 
-    trip = get_trip((trip_id or "").strip())
+    trip = _editable_trip((trip_id or "").strip())
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -500,17 +1298,18 @@ def remove_place_from_trip(trip_id: str, place_id: str) -> Trip:
     if original_length == 0:
         raise ValueError("This trip does not contain the specified location.")
 
-    filtered = [pid for pid in trip.place_ids if pid != place_id_clean]
-    if len(filtered) == original_length:
+    if place_id_clean not in trip.place_ids:
         raise ValueError("This trip does not contain the specified location.")
 
-    trip.place_ids = filtered
+    trip.place_ids.remove(place_id_clean)
     trip.updated_at = _utcnow_iso()
-    save_trips()
+    _unindex_memberships(trip.id, [place_id_clean])
+    _commit(trip)
 
     return trip
 
 
+@_serialised
 def delete_trip(trip_id: str) -> Trip:
     """Remove the trip identified by ``trip_id`` from storage."""
 
@@ -520,18 +1319,16 @@ def delete_trip(trip_id: str) -> Trip:
     if not identifier:
         raise ValueError("A valid trip ID is required.")
 
-    if not _trips_cache:
+    removed_trip = get_trip(identifier)
+    if removed_trip is None:
         raise KeyError("Trip not found.")
 
-    for index, trip in enumerate(_trips_cache):
-        if trip.id == identifier:
-            removed_trip = _trips_cache.pop(index)
-            save_trips()
-            return removed_trip
-
-    raise KeyError("Trip not found.")
+    _unindex_memberships(removed_trip.id, removed_trip.place_ids)
+    _commit(manifest=True, removed=[removed_trip])
+    return removed_trip
 
 
+@_serialised
 def remove_places_from_all_trips(place_ids: Iterable[str]) -> dict:
     """Remove every ``place_id`` in ``place_ids`` from all trips.
 
@@ -559,34 +1356,38 @@ def remove_places_from_all_trips(place_ids: Iterable[str]) -> dict:
 
     cleaned_set = set(cleaned_ids)
     removed_memberships = 0
-    updated_trips = 0
-    save_required = False
+    changed_trips: List[Trip] = []
 
-    for trip in _trips_cache or []:
-        if not trip.place_ids:
-            continue
+    # Only visit the trips that the membership index says are affected.
+    affected_trip_ids = dict.fromkeys(
+        entry["id"]
+        for place_id in cleaned_set
+        for entry in _place_memberships.get(place_id, ())
+    )
 
-        original_length = len(trip.place_ids)
-        filtered = [pid for pid in trip.place_ids if pid not in cleaned_set]
+    for trip_id in affected_trip_ids:
+        trip = _editable_trip(trip_id)
+        if trip is None:
+            continue
 
-        if len(filtered) != original_length:
-            removed_count = original_length - len(filtered)
-            trip.place_ids = filtered
+        removed = trip.place_ids.difference_update(cleaned_set)
+        if removed:
+            _unindex_memberships(trip.id, removed)
             trip.updated_at = _utcnow_iso()
-            removed_memberships += removed_count
-            updated_trips += 1
-            save_required = True
+            removed_memberships += len(removed)
+            changed_trips.append(trip)
 
-    if save_required:
-        save_trips()
+    if changed_trips:
+        _commit(*changed_trips)
 
     return {
         "removed_memberships": removed_memberships,
-        "updated_trips": updated_trips,
+        "updated_trips": len(changed_trips),
         "processed_ids": cleaned_ids,
     }
 
 
+@_serialised
 def update_trip_metadata(
     trip_id: str,
     *,
@@ -598,7 +1399,7 @@ def update_trip_metadata(
 
     _ensure_cache()
 
-    trip = get_trip((trip_id or "").strip())
+    trip = _editable_trip((trip_id or "").strip())
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -608,6 +1409,8 @@ def update_trip_metadata(
         cleaned = name.strip()
         if cleaned and cleaned != trip.name:
             trip.name = cleaned
+            # Membership entries carry the trip name, so refresh them.
+            _index_memberships(trip, trip.place_ids)
             updated = True
 
     if description is not None:
@@ -625,17 +1428,18 @@ def update_trip_metadata(
 
     if updated:
         trip.updated_at = _utcnow_iso()
-        save_trips()
+        _commit(trip)
 
     return trip
 
 
+@_serialised
 def update_trip_photos(trip_id: str, photos: Any) -> Trip:
     """Replace the stored photos for ``trip_id`` with ``photos``."""
 
     _ensure_cache()
 
-    trip = get_trip((trip_id or "").strip())
+    trip = _editable_trip((trip_id or "").strip())
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -653,11 +1457,12 @@ def update_trip_photos(trip_id: str, photos: Any) -> Trip:
         raise ValueError("Unable to import the selected Google Photos items.")
     trip.photos = normalised_photos
     trip.updated_at = _utcnow_iso()
-    save_trips()
+    _commit(trip)
 
     return trip
 
 
+@_serialised
 def remove_trip_photo(trip_id: str, photo_index: int) -> Trip:
     """Remove the photo at ``photo_index`` from the trip identified by ``trip_id``."""
 
@@ -670,7 +1475,7 @@ def remove_trip_photo(trip_id: str, photo_index: int) -> Trip:
     if not isinstance(photo_index, int):
         raise ValueError("A valid photo index is required.")
 
-    trip = get_trip(identifier)
+    trip = _editable_trip(identifier)
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -684,11 +1489,12 @@ def remove_trip_photo(trip_id: str, photo_index: int) -> Trip:
     photos.pop(photo_index)
     trip.photos = photos
     trip.updated_at = _utcnow_iso()
-    save_trips()
+    _commit(trip)
 
     return trip
 
 
+@_serialised
 def remove_trip_photos(trip_id: str, photo_indices: Iterable[int]) -> tuple[Trip, list[int]]:
     """Remove the photos with the given indices from the specified trip."""
 
@@ -698,7 +1504,7 @@ def remove_trip_photos(trip_id: str, photo_indices: Iterable[int]) -> tuple[Trip
     if not identifier:
         raise ValueError("A valid trip ID is required.")
 
-    trip = get_trip(identifier)
+    trip = _editable_trip(identifier)
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -725,11 +1531,12 @@ def remove_trip_photos(trip_id: str, photo_indices: Iterable[int]) -> tuple[Trip
 
     trip.photos = photos
     trip.updated_at = _utcnow_iso()
-    save_trips()
+    _commit(trip)
 
     return trip, list(reversed(unique_sorted))
 
 
+@_serialised
 def update_trip_photo_entry(trip_id: str, photo_index: int, photo_entry: Any) -> Trip:
     """Replace the stored photo entry for the given trip and index."""
 
@@ -739,7 +1546,7 @@ def update_trip_photo_entry(trip_id: str, photo_index: int, photo_entry: Any) ->
     if not identifier:
         raise ValueError("A valid trip ID is required.")
 
-    trip = get_trip(identifier)
+    trip = _editable_trip(identifier)
     if trip is None:
         raise KeyError("Trip not found.")
 
@@ -757,6 +1564,6 @@ def update_trip_photo_entry(trip_id: str, photo_index: int, photo_entry: Any) ->
     photos[photo_index] = normalised
     trip.photos = photos
     trip.updated_at = _utcnow_iso()
-    save_trips()
+    _commit(trip)
 
     return trip
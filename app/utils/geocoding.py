@@ -0,0 +1,295 @@
+"""Concurrent reverse geocoding with a persistent result cache.
+
+:class:`ReverseGeocoder` sends requests with a timeout from a small thread
+pool through a pooled :class:`requests.Session`, throttles them to a
+configurable rate, retries rate limited or failed requests with exponential
+backoff and stores every answer in an SQLite cache keyed by rounded
+coordinates.  Re-imports and points within a few metres of a known place
+never reach the network.
+
+Configuration is read from the environment:
+
+``GEOCODING_BASE_URL``
+    Base URL of the Mapbox compatible endpoint.  Point this at a local stub
+    server (for example ``http://127.0.0.1:8765``) to test imports offline;
+    the geocoder requests ``{base}/{lon},{lat}.json``.
+``GEOCODING_RATE_LIMIT``
+    Maximum requests per second (default 10, ``0`` disables throttling).
+``GEOCODING_MAX_WORKERS``
+    Number of concurrent requests (default 8).
+``GEOCODING_CACHE_PATH``
+    Location of the SQLite cache (default ``data/geocode_cache.sqlite3``).
+``GEOCODING_CACHE_PRECISION``
+    Decimal places used for cache keys (default 4, roughly 11 metres).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+DEFAULT_BASE_URL = "https://api.mapbox.com/geocoding/v5/mapbox.places"
+DEFAULT_CACHE_PATH = os.path.join("data", "geocode_cache.sqlite3")
+PLACE_TYPES = "poi,address,place"
+
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _env_number(name: str, default, cast=float):
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"Ignoring invalid {name} value {value!r}")
+        return default
+
+
+class RateLimiter:
+    """Spread calls evenly so that at most ``rate`` happen per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class GeocodeCache:
+    """SQLite-backed mapping of rounded coordinates to place names."""
+
+    def __init__(self, path: str, precision: int = 4):
+        self.path = path
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS reverse_geocode ("
+                " coord_key TEXT PRIMARY KEY,"
+                " place_name TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def key(self, lat: float, lon: float) -> str:
+        # ``+ 0.0`` folds negative zero into zero so both share a key.
+        lat = round(float(lat), self.precision) + 0.0
+        lon = round(float(lon), self.precision) + 0.0
+        return f"{lat:.{self.precision}f},{lon:.{self.precision}f}"
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        """Return cached place names for whichever ``keys`` are known."""
+
+        found: Dict[str, str] = {}
+        if not keys:
+            return found
+        with self._lock:
+            connection = self._connect()
+            # Stay well below SQLite's bound parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start:start + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(
+                    "SELECT coord_key, place_name FROM reverse_geocode"
+                    f" WHERE coord_key IN ({placeholders})",
+                    chunk,
+                )
+                found.update(rows)
+        return found
+
+    def put(self, key: str, place_name: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO reverse_geocode VALUES (?, ?, ?)",
+                (key, place_name, time.time()),
+            )
+            connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class ReverseGeocoder:
+    """Resolve coordinates to place names using a Mapbox style API."""
+
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        rate_limit: float = 10.0,
+        max_workers: int = 8,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        cache_precision: int = 4,
+        timeout: float = REQUEST_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.access_token = access_token
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.cache = GeocodeCache(cache_path, cache_precision)
+        self._rate_limiter = RateLimiter(rate_limit)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers, pool_maxsize=self.max_workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_env(cls) -> "ReverseGeocoder":
+        return cls(
+            access_token=os.getenv("MAPBOX_ACCESS_TOKEN"),
+            base_url=os.getenv("GEOCODING_BASE_URL", "").strip() or DEFAULT_BASE_URL,
+            rate_limit=_env_number("GEOCODING_RATE_LIMIT", 10.0),
+            max_workers=_env_number("GEOCODING_MAX_WORKERS", 8, int),
+            cache_path=os.getenv("GEOCODING_CACHE_PATH", "").strip() or DEFAULT_CACHE_PATH,
+            cache_precision=_env_number("GEOCODING_CACHE_PRECISION", 4, int),
+        )
+
+    def _fetch(self, lat: float, lon: float) -> Tuple[str, bool]:
+        """Query the API and return ``(place_name, cacheable)``."""
+
+        url = f"{self.base_url}/{lon},{lat}.json"
+        params = {"access_token": self.access_token or "", "types": PLACE_TYPES}
+
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.wait()
+            retry_after = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as exc:
+                result = f"Error {exc.__class__.__name__}"
+            else:
+                if response.status_code == 200:
+                    try:
+                        features = response.json().get("features", [])
+                    except ValueError:
+                        return "Error invalid response", False
+                    if features:
+                        return features[0].get("place_name", "Unknown"), True
+                    return "No result", True
+
+                result = f"Error {response.status_code}"
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return result, False
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt == self.max_retries:
+                return result, False
+
+            delay = BACKOFF_SECONDS * (2 ** attempt)
+            try:
+                delay = max(delay, float(retry_after)) if retry_after else delay
+            except ValueError:
+                pass
+            time.sleep(delay)
+
+        return "Error", False
+
+    def _resolve(self, key: str, lat: float, lon: float) -> str:
+        place_name, cacheable = self._fetch(lat, lon)
+        if cacheable:
+            self.cache.put(key, place_name)
+        return place_name
+
+    def lookup(self, lat: float, lon: float) -> str:
+        """Return the place name for a single coordinate pair."""
+
+        return self.lookup_many([(lat, lon)])[0]
+
+    def lookup_many(self, coordinates: Iterable[Tuple[float, float]]) -> List[str]:
+        """Return place names for ``coordinates`` in the same order.
+
+        Cached coordinates are answered from disk; the remaining unique keys
+        are fetched concurrently.  Failed lookups yield an ``"Error ..."``
+        string, as the original helper did, and are not cached.
+        """
+
+        coordinates = [(float(lat), float(lon)) for lat, lon in coordinates]
+        keys = [self.cache.key(lat, lon) for lat, lon in coordinates]
+        resolved = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        pending: Dict[str, Tuple[float, float]] = {}
+        for key, coordinate in zip(keys, coordinates):
+            if key not in resolved and key not in pending:
+                pending[key] = coordinate
+
+        if len(pending) == 1 or self.max_workers == 1:
+            for key, (lat, lon) in pending.items():
+                resolved[key] = self._resolve(key, lat, lon)
+        elif pending:
+            workers = min(self.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    key: executor.submit(self._resolve, key, lat, lon)
+                    for key, (lat, lon) in pending.items()
+                }
+                for key, future in futures.items():
+                    resolved[key] = future.result()
+
+        return [resolved[key] for key in keys]
+
+
+def is_lookup_error(place_name: str) -> bool:
+    """Return ``True`` if ``place_name`` is a failed lookup's ``"Error ..."`` string."""
+
+    return place_name == "Error" or place_name.startswith("Error ")
+
+
+_geocoder: Optional[ReverseGeocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> ReverseGeocoder:
+    """Return the process wide geocoder, creating it on first use."""
+
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            _geocoder = ReverseGeocoder.from_env()
+        return _geocoder
+
+
+def reverse_geocode_many(coordinates: Iterable[Tuple[float, float]]) -> List[str]:
+    """Shortcut for ``get_geocoder().lookup_many(coordinates)``."""
+
+    return get_geocoder().lookup_many(coordinates)
@@ -3,17 +3,19 @@
 The functions in this module are used to read Timeline JSON files, extract
 visits, and enrich those visits with human readable addresses via the Mapbox
 API.  A valid ``MAPBOX_ACCESS_TOKEN`` is expected to be provided in the
-environment (usually loaded from a ``.env`` file).
+environment (usually loaded from a ``.env`` file).  Lookups go through
+:mod:`app.utils.geocoding`, which caches results and batches requests.
 """
 
 import json
 import os
 from datetime import datetime
+from typing import Iterable, Iterator
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from .. import data_cache
+from .geocoding import get_geocoder, reverse_geocode_many
 
 load_dotenv()
 
@@ -36,19 +38,7 @@ def reverse_geocode_api_call_helper(lat: float, lon: float) -> str:
         lookup fails.
     """
 
-    url = (
-        "https://api.mapbox.com/geocoding/v5/mapbox.places/"
-        f"{lon},{lat}.json?access_token={MAPBOX_ACCESS_TOKEN}&types=poi,address,place"
-    )
-
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        features = response.json().get("features", [])
-        if features:
-            return features[0].get("place_name", "Unknown")
-        return "No result"
-    return f"Error {response.status_code}"
+    return get_geocoder().lookup(lat, lon)
 
 def load_json_file(filepath: str) -> dict:
     """Load a JSON file from ``filepath`` and return the parsed data."""
@@ -108,16 +98,80 @@ def extract_locations_by_place_id(json_data: dict, place_id: str) -> list:
 
     return filtered_visits
 
-def unique_visits_to_df(json_data: dict, source_type: str = "") -> pd.DataFrame:
-    """Return a :class:`pandas.DataFrame` of unique visits."""
-    existing_df = data_cache.timeline_df
-    # --- Create a set of existing placeIds for fast lookups
-    existing_place_ids = set(existing_df['Place ID']) if not existing_df.empty else set()
-    place_id_map = {}
+VISIT_BATCH_SIZE = 500
+
+def _segment_date(segment: dict, key: str) -> str:
+    """Return the date of ``segment[key]`` as ``YYYY-MM-DD`` or ``""``."""
+
+    time_str = segment.get(key)
+    if not time_str:
+        return ""
+    try:
+        return datetime.fromisoformat(time_str.replace("Z", "")).date().isoformat()
+    except Exception:
+        return ""
+
+def _visit_record(pid: str, candidate: dict, segment: dict, source_type: str) -> dict | None:
+    """Return a timeline row for ``candidate`` or ``None`` if it is invalid."""
+
+    latlng = candidate.get("placeLocation", {}).get("latLng", "")
+    if not latlng:
+        return None
+
+    try:
+        lat_str, lon_str = latlng.replace("°", "").split(",")
+        lat = float(lat_str.strip())
+        lon = float(lon_str.strip())
+    except Exception:
+        return None
+
+    return {
+        "Place ID": pid,
+        "Latitude": lat,
+        "Longitude": lon,
+        "Start Date": _segment_date(segment, "startTime"),
+        "End Date": _segment_date(segment, "endTime"),
+        "Source Type": source_type,
+        "Place Name": "",
+        "Archived": False,
+        "Alias": "",
+    }
+
+def iter_visit_batches(
+    segments: Iterable[dict],
+    source_type: str = "",
+    batch_size: int = VISIT_BATCH_SIZE,
+    include_existing: bool = False,
+) -> Iterator[list[dict]]:
+    """Yield lists of at most ``batch_size`` new visit records.
+
+    ``segments`` may be any iterable of ``semanticSegments`` entries, such as
+    the generator returned by :func:`app.utils.json_stream.iter_semantic_segments`,
+    so an export never has to be held in memory as a whole.  Places that
+    already exist in the master timeline are skipped unless
+    ``include_existing`` is set; they are then yielded without a Place Name
+    so that :func:`app.data_cache.merge_timeline_rows` can update their dates
+    without geocoding them again.  Later visits of a place seen earlier in
+    the same import are yielded as records holding only ``Place ID``,
+    ``Start Date`` and ``End Date``.  New places in each batch are reverse
+    geocoded concurrently before the batch is yielded.
+    """
+
+    def geocoded(records: list[dict]) -> list[dict]:
+        pending = [record for record in records if record.pop("_geocode", True)]
+        names = reverse_geocode_many(
+            (record["Latitude"], record["Longitude"]) for record in pending
+        )
+        for record, name in zip(pending, names):
+            record["Place Name"] = name
+        return records
+
+    seen_place_ids = set()
+    batch = []
     counter = 0
 
-    for segment in json_data.get("semanticSegments", []):
-        visit = segment.get("visit")
+    for segment in segments:
+        visit = segment.get("visit") if isinstance(segment, dict) else None
         if not visit:
             continue
 
@@ -129,60 +183,52 @@ def unique_visits_to_df(json_data: dict, source_type: str = "") -> pd.DataFrame:
         for candidate in candidates:
             pid = candidate.get("placeId")
             if not pid:
-                #print("No place ID found")
-                counter += 1
-                continue
-            if pid in existing_place_ids:
-                #print(f"Place ID {pid} already in Timeline Database. Skipping entry.")
-                counter += 1
-                continue
-            if pid in place_id_map:
-                #print("Duplicate detected within this run. Skipping entry.")
                 counter += 1
                 continue
 
-            latlng = candidate.get("placeLocation", {}).get("latLng", "")
-            if not latlng:
-                continue
+            if pid in seen_place_ids:
+                # Later visits only contribute their dates, which
+                # :func:`app.data_cache.fold_repeated_places` combines.
+                record = {
+                    "Place ID": pid,
+                    "Start Date": _segment_date(segment, "startTime"),
+                    "End Date": _segment_date(segment, "endTime"),
+                    "_geocode": False,
+                }
+                if not record["Start Date"] and not record["End Date"]:
+                    continue
+            else:
+                existing = data_cache.has_place(pid)
+                if existing and not include_existing:
+                    # Already in the Timeline Database.
+                    counter += 1
+                    continue
+
+                record = _visit_record(pid, candidate, segment, source_type)
+                if record is None:
+                    continue
+                if existing:
+                    record["_geocode"] = False
+                seen_place_ids.add(pid)
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield geocoded(batch)
+                batch = []
+
+    if batch:
+        yield geocoded(batch)
 
-            try:
-                start_time_str = segment.get("startTime")
-                if start_time_str:
-                    try:
-                        start_date = datetime.fromisoformat(
-                            start_time_str.replace("Z", "")
-                        ).date().isoformat()
-                    except Exception:
-                        start_date = ""
-                else:
-                    start_date = ""
-
-                lat_str, lon_str = latlng.replace("°", "").split(",")
-                lat = float(lat_str.strip())
-                lon = float(lon_str.strip())
-                place_name = reverse_geocode_api_call_helper(lat, lon)
-                place_id_map[pid] = (lat, lon, start_date, place_name)
-            except Exception:
-                continue
-    
     print('Skipped processing of ', counter, ' entries (duplicates or invalid values).')
-    # (You'll want to convert place_id_map to a DataFrame before returning...)
-
-    records = [
-        {
-            "Place ID": pid,
-            "Latitude": vals[0],
-            "Longitude": vals[1],
-            "Start Date": vals[2],
-            "Source Type": source_type,
-            "Place Name": vals[3],
-            "Archived": False,
-            "Alias": "",
-        }
-        for pid, vals in place_id_map.items()
-    ]
-
-    return pd.DataFrame(records)
+
+def unique_visits_to_df(json_data: dict, source_type: str = "") -> pd.DataFrame:
+    """Return a :class:`pandas.DataFrame` of unique visits."""
+
+    records = []
+    for batch in iter_visit_batches(json_data.get("semanticSegments", []), source_type):
+        records.extend(batch)
+
+    return data_cache.fold_repeated_places(pd.DataFrame(records))
 
 def print_unique_visits_to_csv(
     json_data: dict, output_file: str | None = None, source_type: str = ""
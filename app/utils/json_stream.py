@@ -0,0 +1,227 @@
+"""Incremental reader for Google Timeline JSON exports.
+
+Timeline exports can be hundreds of megabytes, almost all of it inside the
+top level ``semanticSegments`` and ``rawSignals`` arrays.  Instead of loading
+the whole document with :func:`json.load`, :func:`iter_semantic_segments`
+reads the upload in fixed size chunks and yields one segment at a time.
+Other top level values are skipped without being materialised, so memory use
+depends on the size of a single segment rather than the size of the file.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterator
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^,\]}\s]*")
+
+# A value cut off by a chunk boundary fails to decode within the length of
+# the longest JSON token (``-Infinity``) of the end of the buffer.
+_TRUNCATION_MARGIN = len("-Infinity")
+
+
+class _JsonStreamReader:
+    """Buffered cursor over a text or binary stream containing JSON."""
+
+    def __init__(self, stream, chunk_size: int = CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; return ``False`` at EOF."""
+
+        if self._eof:
+            return False
+
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        while True:
+            chunk = self._stream.read(self._chunk_size)
+            if not chunk:
+                self._eof = True
+                tail = self._utf8.decode(b"", final=True)
+                self._buffer += tail
+                return bool(tail)
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            if chunk:
+                self._buffer += chunk
+                return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def consume_if(self, char: str) -> bool:
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def expect(self, char: str) -> None:
+        if not self.consume_if(char):
+            raise self._error(f"Expecting {char!r}")
+
+    def read_value(self) -> Any:
+        """Decode and return the next object, array or string."""
+
+        if self.peek() == "":
+            raise self._error("Unexpected end of data")
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as exc:
+                # Only a value cut off by the end of the buffer may continue
+                # in the next chunk; other errors are malformed input.
+                if not self._truncated(exc) or not self._grow():
+                    raise
+                continue
+            self._pos = end
+            return value
+
+    def _truncated(self, exc: json.JSONDecodeError) -> bool:
+        # Unterminated strings are reported at their opening quote.
+        return (
+            exc.pos >= len(self._buffer) - _TRUNCATION_MARGIN
+            or exc.msg.startswith("Unterminated string")
+        )
+
+    def _grow(self) -> bool:
+        """Read until the unread text has doubled; return ``False`` at EOF.
+
+        Growing geometrically keeps a value spanning many chunks from being
+        decoded again from its start for every chunk.
+        """
+
+        target = 2 * (len(self._buffer) - self._pos)
+        if not self._fill():
+            return False
+        while len(self._buffer) - self._pos < target and self._fill():
+            pass
+        return True
+
+    def _skip_string_tail(self) -> None:
+        while True:
+            match = _STRING_TAIL.match(self._buffer, self._pos)
+            if match:
+                self._pos = match.end()
+                return
+            if not self._fill():
+                raise self._error("Unterminated string")
+
+    def skip_value(self) -> None:
+        """Consume the next value without building Python objects for it."""
+
+        char = self.peek()
+        if char == "":
+            raise self._error("Unexpected end of data")
+
+        if char == '"':
+            self._pos += 1
+            self._skip_string_tail()
+            return
+
+        if char not in "{[":
+            consumed = 0
+            while True:
+                end = _SCALAR.match(self._buffer, self._pos).end()
+                consumed += end - self._pos
+                self._pos = end
+                if self._pos < len(self._buffer) or not self._fill():
+                    break
+            if not consumed:
+                raise self._error("Expecting value")
+            return
+
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                if not self._fill():
+                    raise self._error("Unexpected end of data")
+                continue
+
+            self._pos = match.end()
+            token = match.group()
+            if token == '"':
+                self._skip_string_tail()
+            elif token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+
+def iter_semantic_segments(stream, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield each entry of ``semanticSegments`` from a Timeline export.
+
+    Parameters
+    ----------
+    stream:
+        File-like object opened in text or binary mode.  Binary input is
+        decoded as UTF-8.
+    chunk_size: int, optional
+        Number of bytes or characters read from ``stream`` at a time.
+
+    Raises
+    ------
+    json.JSONDecodeError
+        If the document is not valid JSON.  Segments that were already
+        yielded before the error are not rolled back.
+    """
+
+    reader = _JsonStreamReader(stream, chunk_size)
+    reader.expect("{")
+    if reader.consume_if("}"):
+        return
+
+    while True:
+        key = reader.read_value()
+        if not isinstance(key, str):
+            raise reader._error("Expecting property name")
+        reader.expect(":")
+
+        if key == "semanticSegments" and reader.peek() == "[":
+            reader.expect("[")
+            if not reader.consume_if("]"):
+                while True:
+                    segment = reader.read_value()
+                    if isinstance(segment, dict):
+                        yield segment
+                    if reader.consume_if(","):
+                        continue
+                    reader.expect("]")
+                    break
+        else:
+            reader.skip_value()
+
+        if reader.consume_if(","):
+            continue
+        reader.expect("}")
+        return
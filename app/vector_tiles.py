@@ -0,0 +1,154 @@
+"""Mapbox Vector Tile (MVT 2.1) encoding of timeline markers.
+
+``/tiles/{z}/{x}/{y}.mvt`` lets a map fetch only the markers of the tiles
+it shows, as compact protobuf, instead of one GeoJSON document with every
+marker.  Tiles hold point features only, so the few protobuf messages
+involved (``Tile``, ``Layer``, ``Feature`` and ``Value``) are encoded by
+hand here rather than through a protobuf dependency.
+
+Coordinates are tile-local integers in ``[0, extent)`` measured from the
+north-west corner; points within ``buffer`` units outside the tile are kept
+so icons and labels crossing a tile edge are not cut off.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .clustering import project
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+DEFAULT_EXTENT = 4096
+# Extent units kept around each tile (1/16 of a tile).
+DEFAULT_BUFFER = 256
+
+_POINT = 1
+_MOVE_TO_ONE = (1 & 0x7) | (1 << 3)
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _key(field_number: int, wire_type: int) -> bytes:
+    return _varint((field_number << 3) | wire_type)
+
+
+def _message(field_number: int, payload: bytes) -> bytes:
+    return _key(field_number, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed(field_number: int, values) -> bytes:
+    return _message(field_number, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return _key(7, _VARINT) + _varint(int(value))
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        if value >= 0:
+            return _key(5, _VARINT) + _varint(value)
+        return _key(6, _VARINT) + _varint(_zigzag(value))
+    if isinstance(value, (float, np.floating)):
+        return _key(3, _FIXED64) + struct.pack("<d", float(value))
+    return _message(1, str(value).encode("utf-8"))
+
+
+class Layer:
+    """Point features of one tile layer, encoded by :meth:`encode`."""
+
+    def __init__(self, name: str, extent: int = DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._features: List[bytes] = []
+        self._keys: Dict[str, int] = {}
+        self._values: Dict[Tuple[type, Any], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def _tag(self, table: dict, key) -> int:
+        index = table.get(key)
+        if index is None:
+            index = table[key] = len(table)
+        return index
+
+    def add_point(self, x: int, y: int, properties: Dict[str, Any]) -> None:
+        """Add a point at tile coordinates ``x``/``y``.
+
+        ``None`` and empty string properties are left out.
+        """
+
+        tags = []
+        for name, value in properties.items():
+            if value is None or value == "":
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()
+            tags.append(self._tag(self._keys, name))
+            tags.append(self._tag(self._values, (type(value), value)))
+        self._features.append(
+            _packed(2, tags)
+            + _key(3, _VARINT) + _varint(_POINT)
+            + _packed(4, (_MOVE_TO_ONE, _zigzag(int(x)), _zigzag(int(y))))
+        )
+
+    def encode(self) -> bytes:
+        parts = [
+            _key(15, _VARINT) + _varint(2),
+            _message(1, self.name.encode("utf-8")),
+        ]
+        parts.extend(_message(2, feature) for feature in self._features)
+        parts.extend(_message(3, key.encode("utf-8")) for key in self._keys)
+        parts.extend(_message(4, _encode_value(value)) for _, value in self._values)
+        parts.append(_key(5, _VARINT) + _varint(self.extent))
+        return b"".join(parts)
+
+
+def encode_tile(layers) -> bytes:
+    """Return the ``Tile`` message holding the non-empty ``layers``."""
+
+    return b"".join(_message(3, layer.encode()) for layer in layers if len(layer))
+
+
+def tile_pixels(
+    latitudes,
+    longitudes,
+    x: int,
+    y: int,
+    zoom: int,
+    extent: int = DEFAULT_EXTENT,
+    buffer: int = DEFAULT_BUFFER,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return tile coordinates of the points and which lie in the buffered tile.
+
+    Returns ``(columns, rows, inside)``; ``inside`` is a boolean mask.
+    """
+
+    world_x, world_y = project(latitudes, longitudes)
+    scale = 1 << zoom
+    columns = np.rint((world_x * scale - x) * extent).astype(np.int64)
+    rows = np.rint((world_y * scale - y) * extent).astype(np.int64)
+    inside = (
+        (columns >= -buffer) & (columns < extent + buffer)
+        & (rows >= -buffer) & (rows < extent + buffer)
+    )
+    return columns, rows, inside
@@ -0,0 +1,160 @@
+"""Debounced background persistence ("write-behind") for the data stores.
+
+By default every timeline edit is fsynced to the journal and every trip
+change rewrites the trip's file before the request returns.  Bulk UI actions
+fire many such requests in a row, so :mod:`app.data_cache` and
+:mod:`app.trip_store` can optionally mark themselves dirty instead and let a
+:class:`WriteBehindFlusher` persist the accumulated changes at most once per
+interval.  Pending changes are flushed when the process exits.
+
+The trade-off is durability: with an interval of ``N`` seconds a crash can
+lose up to ``N`` seconds of acknowledged edits.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+
+class WriteBehindFlusher:
+    """Call ``flush`` in a background thread at most once per ``interval``.
+
+    ``flush`` persists everything the owner has buffered.  If it raises, the
+    pending count is kept so the next cycle retries.
+    """
+
+    def __init__(self, name: str, flush: Callable[[], None], interval: float):
+        self.name = name
+        self.interval = max(0.0, float(interval))
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Set by :meth:`stop` to cut a debounce wait short.
+        self._stop_requested = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._pending = 0
+        self._dirty_since: Optional[float] = None
+        self._last_flush_monotonic = 0.0
+        self._last_flush_at: Optional[str] = None
+        self._last_flush_duration = 0.0
+        self._last_flush_count = 0
+        self._flush_count = 0
+        self._last_error = ""
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._stop_requested.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.name}-write-behind", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still pending."""
+
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+            self._stop_requested.set()
+            self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(5.0, self.interval * 2))
+        self.flush()
+
+    def mark_dirty(self, count: int = 1) -> None:
+        """Record ``count`` new unpersisted changes."""
+
+        with self._lock:
+            self._pending += count
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Persist pending changes now; return how many were flushed."""
+
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                dirty_since = self._dirty_since
+                if not pending:
+                    return 0
+                self._pending = 0
+                self._dirty_since = None
+                if not self._stopping:
+                    self._wakeup.clear()
+
+            started = time.monotonic()
+            try:
+                self._flush()
+            except Exception as exc:
+                print(f"Write-behind flush for {self.name} failed: {exc}")
+                with self._lock:
+                    self._pending += pending
+                    if self._dirty_since is None or (
+                        dirty_since is not None and dirty_since < self._dirty_since
+                    ):
+                        self._dirty_since = dirty_since
+                    self._last_error = str(exc)
+                    self._wakeup.set()
+                return 0
+
+            finished = time.monotonic()
+            with self._lock:
+                self._last_flush_monotonic = finished
+                self._last_flush_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                self._last_flush_duration = finished - started
+                self._last_flush_count = pending
+                self._flush_count += 1
+                self._last_error = ""
+            return pending
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                if self._stopping:
+                    return
+                delay = self._last_flush_monotonic + self.interval - time.monotonic()
+            if delay > 0:
+                # Debounce: let further edits accumulate until the interval
+                # since the previous flush has passed.  ``stop`` cuts the
+                # wait short and flushes by itself.
+                if self._stop_requested.wait(timeout=delay):
+                    return
+            self.flush()
+            if self._last_error:
+                # Back off instead of spinning on a persistent failure.
+                if self._stop_requested.wait(timeout=max(self.interval, 1.0)):
+                    return
+
+    def metrics(self) -> Dict[str, object]:
+        """Return pending-change and flush-lag figures for monitoring."""
+
+        with self._lock:
+            lag = 0.0
+            if self._dirty_since is not None:
+                lag = time.monotonic() - self._dirty_since
+            return {
+                "enabled": self._thread is not None,
+                "interval_seconds": self.interval,
+                "pending_mutations": self._pending,
+                "flush_lag_seconds": round(lag, 3),
+                "flush_count": self._flush_count,
+                "last_flush_at": self._last_flush_at,
+                "last_flush_duration_seconds": round(self._last_flush_duration, 3),
+                "last_flush_mutations": self._last_flush_count,
+                "last_error": self._last_error,
+            }
@@ -0,0 +1,126 @@
+"""Benchmark :func:`app.map_utils.dataframe_to_markers`.
+
+Compares the vectorised implementation with the previous ``iterrows`` based
+one on synthetic timelines and checks that both produce identical JSON.
+
+Run from the repository root::
+
+    python -m benchmarks.markers_serialisation
+    python -m benchmarks.markers_serialisation --sizes 10000 100000
+
+The legacy implementation needs roughly a minute for one million rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.map_utils import dataframe_to_markers
+from app.timeline_schema import apply_schema, format_date_value
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def legacy_dataframe_to_markers(df: pd.DataFrame, include_archived: bool = False) -> list[dict]:
+    """Row-by-row implementation kept for comparison."""
+
+    if df is None or df.empty:
+        return []
+
+    markers = []
+    for _, row in df.iterrows():
+        archived_value = bool(row.get("Archived", False))
+        if archived_value and not include_archived:
+            continue
+
+        place_name = row.get("Place Name", "")
+        if pd.isna(place_name):
+            place_name = ""
+        else:
+            place_name = str(place_name).strip()
+
+        alias_value = row.get("Alias", "")
+        if pd.isna(alias_value):
+            alias_value = ""
+        else:
+            alias_value = str(alias_value).strip()
+
+        description_value = row.get("Description", "")
+        if pd.isna(description_value):
+            description_value = ""
+        else:
+            description_str = str(description_value)
+            description_value = description_str if description_str.strip() else ""
+
+        markers.append(
+            {
+                "id": row.get("Place ID", ""),
+                "lat": row["Latitude"],
+                "lng": row["Longitude"],
+                "place": place_name,
+                "alias": alias_value,
+                "display_name": alias_value or place_name,
+                "description": description_value,
+                "date": format_date_value(row.get("Start Date", "")),
+                "source_type": row.get("Source Type", ""),
+                "archived": archived_value,
+            }
+        )
+    return markers
+
+
+def build_timeline(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Return a typed synthetic timeline with ``rows`` entries."""
+
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    df = pd.DataFrame(
+        {
+            "Place ID": [f"place-{index}" for index in range(rows)],
+            "Latitude": rng.uniform(-60, 60, rows),
+            "Longitude": rng.uniform(-180, 180, rows),
+            "Start Date": dates,
+            "Source Type": rng.choice(["google_timeline", "manual"], rows),
+            "Place Name": [f"Somewhere {index}, Some Country" for index in range(rows)],
+            "Archived": rng.random(rows) < 0.05,
+            "Alias": np.where(rng.random(rows) < 0.1, "  Favourite spot ", ""),
+            "Description": np.where(rng.random(rows) < 0.05, "Long description " * 4, "   "),
+        }
+    )
+    return apply_schema(df)
+
+
+def _time(func, df: pd.DataFrame) -> tuple[float, list[dict]]:
+    started = time.perf_counter()
+    result = func(df)
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy s':>10} {'vector s':>10} {'legacy rows/s':>14} {'vector rows/s':>14} {'speedup':>8}")
+    for size in args.sizes:
+        df = build_timeline(size)
+        legacy_seconds, legacy = _time(legacy_dataframe_to_markers, df)
+        vector_seconds, vectorised = _time(dataframe_to_markers, df)
+
+        if json.dumps(legacy) != json.dumps(vectorised):
+            raise SystemExit(f"Output mismatch at {size} rows")
+
+        print(
+            f"{size:>10} {legacy_seconds:>10.3f} {vector_seconds:>10.3f} "
+            f"{size / legacy_seconds:>14,.0f} {size / vector_seconds:>14,.0f} "
+            f"{legacy_seconds / vector_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
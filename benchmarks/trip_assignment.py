@@ -0,0 +1,189 @@
+"""Benchmark trip membership operations in :mod:`app.trip_store`.
+
+Assigns ``--places`` place IDs across ``--trips`` trips in bulk batches (with
+overlapping batches, as happens when users re-select markers), looks every
+trip up by ID, builds the place -> trips lookup used by ``/api/map_data`` and
+then removes a slice of places from all trips.  The same workload runs
+against a copy of the previous list-based store for comparison, and both
+must end up with identical memberships.
+
+Persistence is excluded: ``trip_store._persist`` is replaced with a no-op
+for the duration of the run so only the in-memory bookkeeping is measured.
+Each workload runs ``--repeat`` times and the fastest run is reported.
+
+Run from the repository root::
+
+    python -m benchmarks.trip_assignment
+    python -m benchmarks.trip_assignment --places 50000 --trips 500 50 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from app import trip_store
+
+DEFAULT_PLACES = 50_000
+DEFAULT_TRIPS = (500, 50, 5)
+BATCHES_PER_TRIP = 4
+DEFAULT_REPEAT = 5
+
+
+@dataclass
+class LegacyTrip:
+    id: str
+    place_ids: List[str] = field(default_factory=list)
+
+
+class LegacyStore:
+    """List-backed store mirroring the previous ``trip_store`` logic."""
+
+    def __init__(self):
+        self.trips: List[LegacyTrip] = []
+
+    def create_trip(self, trip_id: str) -> LegacyTrip:
+        trip = LegacyTrip(trip_id)
+        self.trips.append(trip)
+        return trip
+
+    def get_trip(self, trip_id: str):
+        for trip in self.trips:
+            if trip.id == trip_id:
+                return trip
+        return None
+
+    def add_places_to_trip(self, trip_id: str, place_ids) -> int:
+        trip = self.get_trip(trip_id)
+        added = 0
+        for place_id in place_ids:
+            if place_id not in trip.place_ids:
+                trip.place_ids.append(place_id)
+                added += 1
+        return added
+
+    def place_memberships(self) -> Dict[str, List[dict]]:
+        memberships: Dict[str, List[dict]] = {}
+        for trip in self.trips:
+            for place_id in trip.place_ids:
+                memberships.setdefault(place_id, []).append({"id": trip.id})
+        return memberships
+
+    def remove_places_from_all_trips(self, place_ids) -> int:
+        cleaned = set(place_ids)
+        removed = 0
+        for trip in self.trips:
+            filtered = [pid for pid in trip.place_ids if pid not in cleaned]
+            removed += len(trip.place_ids) - len(filtered)
+            trip.place_ids = filtered
+        return removed
+
+
+def build_workload(places: int, trips: int, seed: int = 11):
+    """Return ``(batches, removals)`` for the benchmark."""
+
+    rng = random.Random(seed)
+    place_ids = [f"place-{index}" for index in range(places)]
+    rng.shuffle(place_ids)
+
+    per_trip = places // trips
+    batches = []
+    for trip_index in range(trips):
+        own = place_ids[trip_index * per_trip:(trip_index + 1) * per_trip]
+        # Every batch repeats part of the previous one to exercise dedupe.
+        step = max(1, len(own) // BATCHES_PER_TRIP)
+        for start in range(0, len(own), step):
+            batch = own[max(0, start - step // 2):start + step]
+            batches.append((trip_index, batch))
+    rng.shuffle(batches)
+
+    removals = rng.sample(place_ids, max(1, places // 50))
+    return batches, removals
+
+
+def run_legacy(trips: int, batches, removals) -> tuple[float, Dict[str, List[str]]]:
+    store = LegacyStore()
+    ids = [store.create_trip(f"trip-{index}").id for index in range(trips)]
+
+    started = time.perf_counter()
+    for trip_index, batch in batches:
+        store.add_places_to_trip(ids[trip_index], batch)
+    for trip_id in ids:
+        store.get_trip(trip_id)
+    store.place_memberships()
+    store.remove_places_from_all_trips(removals)
+    elapsed = time.perf_counter() - started
+
+    return elapsed, {ids.index(trip.id): list(trip.place_ids) for trip in store.trips}
+
+
+def run_indexed(trips: int, batches, removals) -> tuple[float, Dict[str, List[str]]]:
+    original_persist = trip_store._persist
+    trip_store._persist = lambda *args, **kwargs: None
+    try:
+        trip_store._trips_cache = {}
+        trip_store._rebuild_membership_index()
+        ids = [trip_store.create_trip(f"Trip {index}").id for index in range(trips)]
+
+        started = time.perf_counter()
+        for trip_index, batch in batches:
+            trip_store.add_places_to_trip(ids[trip_index], batch)
+        for trip_id in ids:
+            trip_store.get_trip(trip_id)
+        trip_store.membership_index()
+        trip_store.remove_places_from_all_trips(removals)
+        elapsed = time.perf_counter() - started
+
+        result = {
+            index: list(trip_store.get_trip(trip_id).place_ids)
+            for index, trip_id in enumerate(ids)
+        }
+    finally:
+        trip_store._persist = original_persist
+        trip_store._trips_cache = None
+
+    return elapsed, result
+
+
+def best_of(repeat: int, run, *args) -> tuple[float, Dict[str, List[str]]]:
+    """Return the fastest of ``repeat`` calls of ``run(*args)``."""
+
+    best = None
+    for _ in range(max(1, repeat)):
+        # Start each run without garbage left behind by the previous one.
+        gc.collect()
+        elapsed, result = run(*args)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=DEFAULT_PLACES)
+    parser.add_argument("--trips", type=int, nargs="+", default=list(DEFAULT_TRIPS))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args()
+
+    print(f"{'places':>8} {'trips':>6} {'batches':>8} {'legacy s':>10} {'indexed s':>10} {'speedup':>8}")
+    for trips in args.trips:
+        batches, removals = build_workload(args.places, trips)
+        legacy_seconds, legacy = best_of(args.repeat, run_legacy, trips, batches, removals)
+        indexed_seconds, indexed = best_of(args.repeat, run_indexed, trips, batches, removals)
+
+        if legacy != indexed:
+            raise SystemExit(f"Membership mismatch with {trips} trips")
+
+        print(
+            f"{args.places:>8} {trips:>6} {len(batches):>8} "
+            f"{legacy_seconds:>10.3f} {indexed_seconds:>10.3f} "
+            f"{legacy_seconds / indexed_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Lock ordering between imports and journal compaction."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from app import data_cache
+
+
+class ImportLockOrderTest(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        os.makedirs('data')
+        data_cache.configure_storage('csv')
+        data_cache.journal.reset()
+        data_cache.timeline_df = None
+        data_cache.load_timeline_data()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_import_save_does_not_hold_mutation_lock(self):
+        rows = pd.DataFrame([{
+            'Place ID': 'p1',
+            'Latitude': 1.0,
+            'Longitude': 2.0,
+            'Source Type': 'google_timeline',
+        }])
+        version = data_cache.data_version
+
+        # A compaction holds the snapshot lock while writing its snapshot and
+        # then needs the mutation lock; the import must not hold the latter
+        # while it waits for the former.
+        with data_cache._snapshot_lock:
+            importer = threading.Thread(target=data_cache.merge_timeline_rows, args=(rows,))
+            importer.start()
+            deadline = time.monotonic() + 5
+            while data_cache.data_version == version and time.monotonic() < deadline:
+                time.sleep(0.01)
+            acquired = data_cache._mutation_lock.acquire(timeout=2)
+            if acquired:
+                data_cache._mutation_lock.release()
+        importer.join(timeout=5)
+
+        self.assertTrue(acquired, 'the import held _mutation_lock while waiting to save')
+        self.assertFalse(importer.is_alive())
+        self.assertEqual(len(data_cache.snapshot().df), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Published timeline frames must not change under readers holding them."""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from app import data_cache
+
+
+def _row(place_id, source_type):
+    return {
+        'Place ID': place_id,
+        'Name': place_id,
+        'Latitude': 1.0,
+        'Longitude': 2.0,
+        'Source Type': source_type,
+    }
+
+
+class PublishedFrameTest(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        os.makedirs('data')
+        data_cache.configure_storage('csv')
+        data_cache.journal.reset()
+        data_cache.timeline_df = None
+        data_cache.load_timeline_data()
+        data_cache.add_rows(pd.DataFrame([_row('p1', 'a'), _row('p2', None)]))
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_new_source_type_leaves_held_frame_alone(self):
+        held = data_cache.snapshot().df
+        categories = list(held['Source Type'].cat.categories)
+
+        data_cache.add_rows(pd.DataFrame([_row('p3', 'brand-new')]))
+
+        self.assertEqual(list(held['Source Type'].cat.categories), categories)
+        current = data_cache.snapshot().df['Source Type']
+        self.assertIsInstance(current.dtype, pd.CategoricalDtype)
+        self.assertEqual(current.tolist()[-1], 'brand-new')
+
+    def test_merge_with_new_source_type_leaves_held_frame_alone(self):
+        held = data_cache.snapshot().df
+        categories = list(held['Source Type'].cat.categories)
+
+        counts = data_cache.merge_timeline_rows(pd.DataFrame([_row('p2', 'merged')]))
+
+        self.assertEqual(counts['updated'], 1)
+        self.assertEqual(list(held['Source Type'].cat.categories), categories)
+        current = data_cache.snapshot().df
+        self.assertEqual(current.loc[current['Place ID'] == 'p2', 'Source Type'].tolist(), ['merged'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Write-behind journal flushes racing a full timeline save."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from app import data_cache
+
+
+class WriteBehindSaveRaceTest(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        os.makedirs('data')
+        data_cache.configure_storage('csv')
+        data_cache.journal.reset()
+        data_cache.timeline_df = None
+        data_cache.load_timeline_data()
+        data_cache.add_rows(pd.DataFrame([{
+            'Place ID': 'p1',
+            'Name': 'First',
+            'Latitude': 1.0,
+            'Longitude': 2.0,
+            'Source Type': 'manual',
+        }]))
+        data_cache.save_timeline_data()
+        data_cache.configure_write_behind(3600)
+
+    def tearDown(self):
+        data_cache.configure_write_behind(None)
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_save_between_taking_and_appending_records_wins(self):
+        data_cache.set_alias('p1', 'stale alias')
+
+        original_append_many = data_cache.journal.append_many
+        saved = threading.Event()
+
+        def save():
+            data_cache.save_timeline_data()
+            saved.set()
+
+        def append_many(records):
+            # Start a full save in the gap after the flusher took its records.
+            saver = threading.Thread(target=save)
+            saver.start()
+            saver.join(timeout=0.5)
+            original_append_many(records)
+
+        data_cache.journal.append_many = append_many
+        try:
+            self.assertEqual(data_cache.flush_pending_mutations(), 1)
+        finally:
+            data_cache.journal.append_many = original_append_many
+
+        self.assertTrue(saved.wait(timeout=5))
+        # The snapshot holds the alias, so no journal record may survive to
+        # be replayed over it (or over later saves) at the next start.
+        self.assertEqual(list(data_cache.journal.read_all()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
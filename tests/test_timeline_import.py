@@ -0,0 +1,97 @@
+"""Merging Timeline imports into the master timeline."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from app import data_cache, import_jobs
+from app.utils.json_processing_functions import iter_visit_batches
+
+
+def _segment(place_id, start, end):
+    return {
+        'startTime': start,
+        'endTime': end,
+        'visit': {
+            'topCandidate': {
+                'placeId': place_id,
+                'placeLocation': {'latLng': '1.5°, 2.5°'},
+            },
+        },
+    }
+
+
+class ImportDatesTest(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        os.makedirs('data')
+        data_cache.configure_storage('csv')
+        data_cache.journal.reset()
+        data_cache.timeline_df = None
+        data_cache.load_timeline_data()
+        data_cache.add_rows(pd.DataFrame([{
+            'Place ID': 'p1',
+            'Place Name': 'Known place',
+            'Latitude': 1.5,
+            'Longitude': 2.5,
+            'Start Date': '2020-06-01',
+            'End Date': '2020-06-02',
+            'Source Type': 'google_timeline',
+        }]))
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_every_visit_widens_the_date_range(self):
+        # Not in time order: neither the earliest start nor the latest end
+        # belongs to the first visit of the place.
+        segments = [
+            _segment('p1', '2021-03-01T10:00:00Z', '2021-03-01T11:00:00Z'),
+            _segment('p1', '2019-01-05T10:00:00Z', '2019-01-05T12:00:00Z'),
+            _segment('p1', '2022-07-09T22:00:00Z', '2022-07-10T01:00:00Z'),
+        ]
+        records = [
+            record
+            for batch in iter_visit_batches(segments, 'google_timeline', include_existing=True)
+            for record in batch
+        ]
+
+        counts = data_cache.merge_timeline_rows(pd.DataFrame(records))
+
+        self.assertEqual(counts['updated'], 1)
+        row = data_cache.get_place_rows(['p1']).iloc[0]
+        self.assertEqual(row['Start Date'], pd.Timestamp('2019-01-05'))
+        self.assertEqual(row['End Date'], pd.Timestamp('2022-07-10'))
+        self.assertEqual(row['Place Name'], 'Known place')
+
+    def test_failed_lookups_are_not_counted_as_geocoded(self):
+        segments = [
+            _segment('p1', '2021-03-01T10:00:00Z', '2021-03-01T11:00:00Z'),
+            _segment('p2', '2021-03-02T10:00:00Z', '2021-03-02T11:00:00Z'),
+            _segment('p3', '2021-03-03T10:00:00Z', '2021-03-03T11:00:00Z'),
+        ]
+        upload_path = os.path.join(self._tmp.name, 'upload.json')
+        with open(upload_path, 'w') as handle:
+            json.dump({'semanticSegments': segments}, handle)
+
+        job = import_jobs.ImportJob(id='job', filename='upload.json', source_type='google_timeline')
+        with mock.patch(
+            'app.utils.json_processing_functions.reverse_geocode_many',
+            return_value=['New place', 'Error ConnectionError'],
+        ):
+            import_jobs._run_timeline_import(job, upload_path)
+
+        self.assertEqual(job.state, import_jobs.JOB_COMPLETED)
+        self.assertEqual(job.places_geocoded, 1)
+        self.assertEqual(job.places_failed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
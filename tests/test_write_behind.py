@@ -0,0 +1,35 @@
+"""Shutdown behaviour of :class:`app.write_behind.WriteBehindFlusher`."""
+
+import threading
+import time
+import unittest
+
+from app.write_behind import WriteBehindFlusher
+
+
+class WriteBehindStopTest(unittest.TestCase):
+    def test_stop_during_debounce_flushes_without_waiting(self):
+        flushed = []
+        flusher = WriteBehindFlusher('test', lambda: flushed.append(time.monotonic()), 3600)
+        flusher.start()
+        # The first flush starts the interval; the next edit is debounced.
+        flusher.mark_dirty()
+        deadline = time.monotonic() + 5
+        while not flushed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(flushed), 1)
+
+        flusher.mark_dirty()
+        time.sleep(0.1)
+        self.assertEqual(len(flushed), 1)
+
+        stopper = threading.Thread(target=flusher.stop)
+        stopper.start()
+        stopper.join(timeout=5)
+        self.assertFalse(stopper.is_alive(), 'stop() waited for the debounce interval')
+        self.assertEqual(len(flushed), 2)
+        self.assertEqual(flusher.metrics()['pending_mutations'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()